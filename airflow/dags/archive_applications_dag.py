@@ -16,7 +16,7 @@ default_args = {
 dag = DAG(
     "archive_old_applications",
     default_args=default_args,
-    description="Archive les candidatures plus anciennes que 40 jours",
+    description="Archive les candidatures plus anciennes que ARCHIVE_DAYS_THRESHOLD jours",
     schedule="0 3 * * *",
     catchup=False,
     max_active_runs=1,
@@ -36,11 +36,11 @@ def run_archive_task():
 
     try:
         # Importer la fonction d'archivage
-        from app.tasks.archive_old_applications import archive_old_applications
+        from app.tasks.archive_old_applications import archive_old_applications_sync
 
         logger.info("Début de l'archivage des candidatures")
-        # Exécuter la fonction d'archivage
-        result = archive_old_applications(threshold_days=40)
+        # Exécuter la fonction d'archivage (seuil : ARCHIVE_DAYS_THRESHOLD)
+        result = archive_old_applications_sync()
         logger.info(f"Archivage terminé: {result} candidatures archivées")
         return result
     except Exception as e:
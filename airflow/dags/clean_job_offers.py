@@ -8,14 +8,17 @@ sys.path.append("/app")
 
 
 def cleanup_offers_task():
-    """Tâche de nettoyage des anciennes offres"""
+    """
+    Tâche de nettoyage des offres (normalisation, doublons, statistiques).
+    Les anciennes offres expirent via l'index TTL sur last_seen.
+    """
     import asyncio
 
     logger = logging.getLogger("airflow.task")
     try:
         from app.tasks.clean_job_offers import cleanup_workflow
 
-        logger.info("Début du nettoyage des anciennes offres")
+        logger.info("Début du nettoyage des offres")
         result = asyncio.run(cleanup_workflow())
         logger.info(f"Nettoyage terminé: {result}")
         return result
@@ -38,13 +41,13 @@ default_args = {
 dag = DAG(
     "cleanup_job_offers",
     default_args=default_args,
-    description="Nettoyage des anciennes offres d'emploi",
+    description="Normalisation et nettoyage des offres d'emploi",
     schedule="0 3 * * *",
     tags=["job-tracker", "maintenance"],
 )
 
 cleanup_task = PythonOperator(
-    task_id="cleanup_old_offers",
+    task_id="cleanup_job_offers",
     python_callable=cleanup_offers_task,
     dag=dag,
 )
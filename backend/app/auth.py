@@ -1,6 +1,8 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 import uuid
 
 from bson import ObjectId
@@ -13,12 +15,22 @@ from pydantic import BaseModel
 
 from .database import get_database
 from .models import UserModel
+from .services.principal_cache import principal_cache
 
 # Chargement des variables d'environnement
 load_dotenv()
 
-# Remplacer la configuration existante
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Coût bcrypt des nouveaux hash ; un hash d'un autre coût est refait à la connexion
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads dédiés au hachage : bcrypt bloque 100 à 300 ms par appel
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 # Configuration pour JWT
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -48,6 +60,32 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+# Versions non bloquantes pour les routes : le hachage tourne dans un pool
+# borné et la boucle d'événements continue de servir les autres requêtes
+async def verify_password_async(
+    plain_password, hashed_password
+) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifie le mot de passe hors de la boucle d'événements.
+
+    Returns:
+        (valide, nouveau hash) ; le nouveau hash est renseigné quand le hash
+        stocké n'utilise plus la configuration courante (BCRYPT_ROUNDS)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor,
+        pwd_context.verify_and_update,
+        plain_password,
+        hashed_password,
+    )
+
+
+async def get_password_hash_async(password) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, pwd_context.hash, password)
+
+
 # Fonctions pour JWT
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -101,7 +139,14 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
+    # Utilisateur en cache pour ce token (invalidé à chaque modification)
+    jti = payload.get("jti")
+    cached = principal_cache.get(user_id, jti)
+    if cached is not None:
+        return cached
+
     # Récupérer l'utilisateur depuis la base de données
+    generation = principal_cache.generation(user_id)
     user = await db["users"].find_one({"_id": ObjectId(user_id)})
 
     if user is None:
@@ -118,4 +163,6 @@ async def get_current_user(
     # Convertir l'ObjectId en chaîne avant de créer l'objet UserModel
     user["_id"] = str(user["_id"])
 
-    return UserModel(**user)
+    principal = UserModel(**user)
+    principal_cache.put(user_id, jti, principal, generation)
+    return principal.model_copy()
@@ -0,0 +1,430 @@
+"""
+Registre déclaratif des index MongoDB.
+
+Chaque collection déclare ses index sous forme de `IndexModel`. Le registre est
+synchronisé au démarrage de l'API et peut être vérifié en ligne de commande :
+
+    python -m app.indexes sync [--drop-extra]
+    python -m app.indexes check
+    python -m app.indexes explain
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.database import get_database
+from app.services.offer_validation import REJECTED_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+# Durée de conservation d'une offre qui n'est plus vue lors des collectes
+OFFER_RETENTION_DAYS = float(os.getenv("OFFER_RETENTION_DAYS", "6"))
+
+# Durée de conservation d'un job de description terminé (réussi ou abandonné)
+DESCRIPTION_JOB_RETENTION_DAYS = float(os.getenv("DESCRIPTION_JOB_RETENTION_DAYS", "7"))
+
+# Durée de validité d'une description en cache (job_descriptions)
+DESCRIPTION_CACHE_TTL_DAYS = float(os.getenv("DESCRIPTION_CACHE_TTL_DAYS", "30"))
+
+# Options d'index comparées entre la déclaration et l'existant
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "applications": [
+        # Tri et pagination par curseur (application_date, _id)
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("application_date", DESCENDING),
+                ("_id", DESCENDING),
+            ]
+        ),
+        # Archivage des candidatures anciennes (archive_old_applications)
+        IndexModel(
+            [
+                ("archived", ASCENDING),
+                ("status", ASCENDING),
+                ("application_date", ASCENDING),
+            ]
+        ),
+    ],
+    "applications_archive": [
+        # Même tri que la collection chaude (GET /applications?include_archived)
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("application_date", DESCENDING),
+                ("_id", DESCENDING),
+            ]
+        ),
+    ],
+    "tasks": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "job_offers": [
+        # URL canonique unique quand elle est exploitable (les offres sans URL
+        # sont identifiées par poste + entreprise + localisation)
+        IndexModel(
+            [("url_hash", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"url_hash": {"$type": "string"}},
+        ),
+        # Doublons approchés (même offre publiée sur plusieurs sites)
+        IndexModel([("fingerprint", ASCENDING)]),
+        IndexModel([("poste", TEXT), ("entreprise", TEXT), ("localisation", TEXT)]),
+        IndexModel([("poste", ASCENDING), ("entreprise", ASCENDING)]),
+        # Filtres entreprise / ville par préfixe sur les clés normalisées
+        IndexModel([("company_key", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("city_key", ASCENDING), ("created_at", DESCENDING)]),
+        # Champs normalisés à l'ingestion (statistiques)
+        IndexModel([("normalized_company", ASCENDING)]),
+        IndexModel([("normalized_city", ASCENDING)]),
+        IndexModel([("normalized_site", ASCENDING)]),
+        # Reprise des offres dont la normalisation est absente ou périmée
+        IndexModel([("normalization_version", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("updated_at", DESCENDING)]),
+        IndexModel([("first_seen", ASCENDING)]),
+        # Expiration des offres (TTL) : supprimées par MongoDB après
+        # OFFER_RETENTION_DAYS sans être revues par une collecte
+        IndexModel(
+            [("last_seen", ASCENDING)],
+            expireAfterSeconds=int(OFFER_RETENTION_DAYS * 86400),
+        ),
+        IndexModel([("localisation", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "job_offers_rejected": [
+        # Quarantaine de l'ingestion, expirée après REJECTED_RETENTION_DAYS
+        IndexModel(
+            [("rejected_at", ASCENDING)],
+            expireAfterSeconds=int(REJECTED_RETENTION_DAYS * 86400),
+        ),
+        IndexModel([("reason", ASCENDING), ("rejected_at", DESCENDING)]),
+    ],
+    "offer_stats": [
+        # Top-k par dimension (entreprise, ville, site, jour) : couvre aussi
+        # le départage par valeur, sans tri en mémoire
+        IndexModel(
+            [("dimension", ASCENDING), ("count", DESCENDING), ("value", ASCENDING)]
+        ),
+    ],
+    "crawl_ledger": [
+        IndexModel([("last_crawled_at", DESCENDING)]),
+    ],
+    "description_jobs": [
+        # Idempotence des demandes de génération
+        IndexModel([("application_id", ASCENDING), ("url", ASCENDING)], unique=True),
+        # Prise de job par les workers (jobs dus, baux expirés)
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)]),
+        IndexModel([("application_id", ASCENDING), ("created_at", DESCENDING)]),
+        # Les jobs en cours n'ont pas de finished_at et ne sont jamais expirés
+        IndexModel(
+            [("finished_at", ASCENDING)],
+            expireAfterSeconds=int(DESCRIPTION_JOB_RETENTION_DAYS * 86400),
+        ),
+    ],
+    "job_descriptions": [
+        # Cache par URL canonique (_id), régénéré après DESCRIPTION_CACHE_TTL_DAYS
+        IndexModel(
+            [("generated_at", ASCENDING)],
+            expireAfterSeconds=int(DESCRIPTION_CACHE_TTL_DAYS * 86400),
+        ),
+    ],
+}
+
+# Requêtes fréquentes de l'API, vérifiées avec explain() (aucun COLLSCAN attendu)
+HOT_QUERIES: List[Dict[str, Any]] = [
+    {"collection": "users", "filter": {"username": "johndoe"}},
+    {"collection": "users", "filter": {"email": "john.doe@example.com"}},
+    {
+        "collection": "applications",
+        "filter": {"user_id": "000000000000000000000000"},
+        "sort": [("application_date", DESCENDING), ("_id", DESCENDING)],
+    },
+    {
+        "collection": "applications",
+        "filter": {
+            "archived": {"$ne": True},
+            "status": {"$in": ["Refusée", "Candidature envoyée"]},
+            "application_date": {"$lt": datetime(2024, 1, 1, tzinfo=timezone.utc)},
+        },
+    },
+    {
+        "collection": "tasks",
+        "filter": {"user_id": "000000000000000000000000"},
+    },
+    {
+        "collection": "job_offers",
+        "filter": {},
+        "sort": [("created_at", DESCENDING), ("_id", DESCENDING)],
+    },
+    {"collection": "job_offers", "filter": {"url_hash": "0" * 64}},
+    {
+        "collection": "job_offers",
+        "filter": {"poste": "Data Scientist", "entreprise": "ACME"},
+    },
+    {"collection": "job_offers", "filter": {"company_key": {"$regex": "^acme"}}},
+    {"collection": "job_offers", "filter": {"city_key": {"$regex": "^lyon"}}},
+    {"collection": "job_offers", "filter": {"$text": {"$search": "python"}}},
+    {
+        "collection": "job_offers",
+        "filter": {"normalization_version": {"$ne": 2}},
+        "sort": [("_id", ASCENDING)],
+    },
+    {
+        "collection": "offer_stats",
+        "filter": {"dimension": "company", "count": {"$gt": 0}},
+        "sort": [("count", DESCENDING), ("value", ASCENDING)],
+    },
+    {
+        "collection": "description_jobs",
+        "filter": {
+            "$or": [
+                {"status": "pending", "run_at": {"$lte": datetime(2024, 1, 1)}},
+                {
+                    "status": "running",
+                    "lease_expires_at": {"$lte": datetime(2024, 1, 1)},
+                },
+            ]
+        },
+    },
+]
+
+
+def _key_signature(index: Dict[str, Any]) -> tuple:
+    """Signature comparable d'un index (les index texte sont stockés en _fts/_ftsx)"""
+    key = list(index["key"].items())
+
+    if "_fts" in index["key"]:
+        text_fields = sorted(index.get("weights", {}))
+        other = [(k, v) for k, v in key if k not in ("_fts", "_ftsx")]
+        return ("text", tuple(text_fields), tuple(other))
+
+    text_fields = sorted(k for k, v in key if v == TEXT)
+    if text_fields:
+        other = [(k, v) for k, v in key if v != TEXT]
+        return ("text", tuple(text_fields), tuple(other))
+
+    return tuple((k, int(v) if isinstance(v, (int, float)) else v) for k, v in key)
+
+
+def _options(index: Dict[str, Any]) -> Dict[str, Any]:
+    return {option: index.get(option) for option in INDEX_OPTIONS if index.get(option)}
+
+
+def _only_ttl_differs(current: Dict[str, Any], declared: Dict[str, Any]) -> bool:
+    """Vrai si l'index existant ne diffère de la déclaration que par son TTL"""
+    current_options = _options(current)
+    declared_options = _options(declared)
+    ttl = "expireAfterSeconds"
+    if current_options.get(ttl) == declared_options.get(ttl):
+        return False
+    current_options.pop(ttl, None)
+    declared_options.pop(ttl, None)
+    return current_options == declared_options and ttl in _options(declared)
+
+
+async def _set_expire_after(
+    collection, current: Dict[str, Any], declared: Dict[str, Any]
+):
+    await collection.database.command(
+        "collMod",
+        collection.name,
+        index={
+            "keyPattern": current["key"],
+            "expireAfterSeconds": declared["expireAfterSeconds"],
+        },
+    )
+
+
+async def sync_collection_indexes(
+    collection, models: List[IndexModel], drop_extra: bool = False
+) -> Dict[str, Any]:
+    """Crée les index manquants d'une collection et signale les écarts"""
+    report = {
+        "missing": [],
+        "created": [],
+        "modified": [],
+        "conflicts": [],
+        "extra": [],
+        "errors": [],
+    }
+
+    existing = {}
+    async for index in collection.list_indexes():
+        existing[_key_signature(index)] = index
+
+    declared = set()
+    to_create = []
+    for model in models:
+        document = model.document
+        signature = _key_signature(document)
+        declared.add(signature)
+
+        current = existing.get(signature)
+        if current is None:
+            report["missing"].append(document["name"])
+            to_create.append(model)
+        elif _only_ttl_differs(current, document):
+            # Le délai d'un index TTL se modifie sur place (collMod)
+            try:
+                await _set_expire_after(collection, current, document)
+                report["modified"].append(current["name"])
+            except OperationFailure as e:
+                report["errors"].append({"name": current["name"], "error": str(e)})
+        elif _options(current) != _options(document):
+            report["conflicts"].append(
+                {
+                    "name": current["name"],
+                    "declared": _options(document),
+                    "existing": _options(current),
+                }
+            )
+
+    for model in to_create:
+        try:
+            await collection.create_indexes([model])
+            report["created"].append(model.document["name"])
+        except OperationFailure as e:
+            report["errors"].append({"name": model.document["name"], "error": str(e)})
+
+    for signature, index in existing.items():
+        if index["name"] == "_id_" or signature in declared:
+            continue
+        report["extra"].append(index["name"])
+        if drop_extra:
+            await collection.drop_index(index["name"])
+
+    return report
+
+
+async def sync_indexes(db, drop_extra: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Synchronise tous les index déclarés dans INDEXES"""
+    report = {}
+    for collection_name, models in INDEXES.items():
+        report[collection_name] = await sync_collection_indexes(
+            db[collection_name], models, drop_extra
+        )
+
+        entry = report[collection_name]
+        if entry["created"]:
+            logger.info(f"Index créés sur {collection_name}: {entry['created']}")
+        if entry["modified"]:
+            logger.info(f"TTL mis à jour sur {collection_name}: {entry['modified']}")
+        for conflict in entry["conflicts"]:
+            logger.warning(f"Index divergent sur {collection_name}: {conflict}")
+        for error in entry["errors"]:
+            logger.error(f"Échec de création d'index sur {collection_name}: {error}")
+
+    return report
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Liste les étapes d'un plan d'exécution (récursif)"""
+    stages = [plan["stage"]] if "stage" in plan else []
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages += _plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def explain_hot_queries(db) -> List[Dict[str, Any]]:
+    """
+    Explique les requêtes fréquentes et signale celles qui font un COLLSCAN
+    ou un tri en mémoire (étape SORT : le tri n'est pas couvert par l'index)
+    """
+    results = []
+    for query in HOT_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+
+        explanation = await cursor.limit(50).explain()
+        stages = _plan_stages(explanation["queryPlanner"]["winningPlan"])
+        results.append(
+            {
+                "collection": query["collection"],
+                "filter": query["filter"],
+                "sort": query.get("sort"),
+                "stages": stages,
+                "collscan": "COLLSCAN" in stages,
+                "in_memory_sort": "SORT" in stages,
+            }
+        )
+    return results
+
+
+async def _main(command: str, drop_extra: bool) -> int:
+    db = await get_database()
+
+    if command == "explain":
+        await sync_indexes(db)
+        results = await explain_hot_queries(db)
+        failing = False
+        for result in results:
+            if result["collscan"]:
+                status = "COLLSCAN"
+            elif result["in_memory_sort"]:
+                status = "SORT"
+            else:
+                status = "ok"
+            failing = failing or status != "ok"
+            print(
+                f"[{status}] {result['collection']} {result['filter']}: {result['stages']}"
+            )
+        return 1 if failing else 0
+
+    if command == "check":
+        # Lecture seule : index manquants et index en base non déclarés
+        failing = False
+        for collection_name, models in INDEXES.items():
+            existing = {
+                _key_signature(index): index["name"]
+                async for index in db[collection_name].list_indexes()
+            }
+            declared = {_key_signature(model.document) for model in models}
+            missing = [
+                model.document["name"]
+                for model in models
+                if _key_signature(model.document) not in existing
+            ]
+            extra = [
+                name
+                for signature, name in existing.items()
+                if name != "_id_" and signature not in declared
+            ]
+            print(f"{collection_name}: manquants={missing} en_trop={extra}")
+            failing = failing or bool(missing) or bool(extra)
+        return 1 if failing else 0
+
+    report = await sync_indexes(db, drop_extra=drop_extra)
+    for collection_name, entry in report.items():
+        print(f"{collection_name}: {entry}")
+    return 1 if any(entry["errors"] for entry in report.values()) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gestion des index MongoDB")
+    parser.add_argument("command", choices=["sync", "check", "explain"])
+    parser.add_argument(
+        "--drop-extra",
+        action="store_true",
+        help="Supprime les index présents en base mais non déclarés",
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.command, args.drop_extra)))
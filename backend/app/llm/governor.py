@@ -0,0 +1,364 @@
+"""
+Régulateur global des appels LLM du processus.
+
+Tous les appels OpenAI (filtre et extraction crawl4ai, résumé des
+descriptions, agents CrewAI) réservent leur place auprès du même
+régulateur :
+
+- seaux à jetons sur les requêtes (LLM_RPM) et les tokens (LLM_TPM) par
+  minute ; la consommation réelle est réconciliée après l'appel ;
+- priorités : une génération de description demandée par un utilisateur
+  (INTERACTIVE) passe devant la collecte en tâche de fond (BATCH) ;
+- pause exponentielle sur 429, et disjoncteur global après
+  LLM_BREAKER_THRESHOLD 429 consécutifs ;
+- budgets de tokens / coût par exécution (llm_budget) : une exécution qui
+  dépasse son budget voit ses appels suivants refusés.
+
+Usage:
+    async with governor.limit(tokens=1500) as lease:
+        result = await chain.ainvoke(...)
+        lease.record(result.usage_metadata["total_tokens"])
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Limites du compte OpenAI (par minute)
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))
+LLM_TPM = float(os.getenv("LLM_TPM", "200000"))
+# Coût moyen (entrée + sortie) pour les budgets en dollars
+LLM_COST_PER_MILLION_TOKENS = float(os.getenv("LLM_COST_PER_MILLION_TOKENS", "0.3"))
+# Pause après un 429 : LLM_BACKOFF_SECONDS * 2^(n-1), plafonnée
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "2"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+# Disjoncteur : refus de tout appel pendant LLM_BREAKER_COOLDOWN_SECONDS
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "8"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "120"))
+
+# Classes de priorité (la plus petite passe en premier)
+INTERACTIVE = 0
+BATCH = 1
+
+
+class LLMBudgetExceeded(Exception):
+    """Le budget de l'exécution en cours est épuisé"""
+
+
+class LLMCircuitOpen(Exception):
+    """Trop de 429 consécutifs : les appels LLM sont suspendus"""
+
+
+class TokenBucket:
+    """Seau à jetons rempli en continu à `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute: float, now: float):
+        self.capacity = rate_per_minute
+        self.available = rate_per_minute
+        self.rate = rate_per_minute / 60
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(now - self.updated, 0)
+        self.available = min(self.capacity, self.available + elapsed * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Secondes avant de pouvoir prendre `amount` (0 si disponible)"""
+        self._refill(now)
+        # Une demande plus grande que le seau passe quand il est plein
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.available -= amount
+
+    def give(self, amount: float) -> None:
+        self.available = min(self.capacity, self.available + amount)
+
+
+class RunBudget:
+    """Budget de tokens et de coût d'une exécution (collecte, backfill)"""
+
+    def __init__(
+        self,
+        name: str,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+    ):
+        self.name = name
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.tokens = 0
+        self.tripped = False
+
+    @property
+    def cost(self) -> float:
+        return self.tokens * LLM_COST_PER_MILLION_TOKENS / 1_000_000
+
+    def check(self) -> None:
+        if self.tripped:
+            raise LLMBudgetExceeded(
+                f"Budget LLM de {self.name} épuisé "
+                f"({self.tokens} tokens, {self.cost:.4f} $)"
+            )
+
+    def add(self, tokens: int) -> None:
+        self.tokens += tokens
+        over_tokens = self.max_tokens is not None and self.tokens >= self.max_tokens
+        over_cost = self.max_cost is not None and self.cost >= self.max_cost
+        if (over_tokens or over_cost) and not self.tripped:
+            self.tripped = True
+            logger.warning(
+                f"🛑 Budget LLM de {self.name} atteint: {self.tokens} tokens, "
+                f"{self.cost:.4f} $ ; appels suivants refusés"
+            )
+
+
+_current_budget: ContextVar[Optional[RunBudget]] = ContextVar(
+    "llm_budget", default=None
+)
+_current_priority: ContextVar[int] = ContextVar("llm_priority", default=BATCH)
+
+
+@contextmanager
+def llm_budget(
+    name: str, max_tokens: Optional[int] = None, max_cost: Optional[float] = None
+):
+    """Applique un budget aux appels LLM faits dans ce contexte (tâches filles comprises)"""
+    budget = RunBudget(name, max_tokens, max_cost)
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+        logger.info(
+            f"💰 LLM {name}: {budget.tokens} tokens, {budget.cost:.4f} $ consommés"
+        )
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Classe de priorité des appels LLM faits dans ce contexte"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class LLMLease:
+    """Réservation accordée par le régulateur, à réconcilier avec l'usage réel"""
+
+    def __init__(self, governor: "LLMGovernor", tokens: int, budget):
+        self.governor = governor
+        self.reserved = tokens
+        self.budget = budget
+        self.used: Optional[int] = None
+
+    def record(self, tokens: Optional[int]) -> None:
+        """Tokens réellement consommés (None : on garde l'estimation)"""
+        if tokens is not None:
+            self.used = (self.used or 0) + int(tokens)
+
+    def close(self) -> None:
+        used = self.reserved if self.used is None else self.used
+        self.governor._reconcile(self.reserved, used)
+        if self.budget is not None:
+            self.budget.add(used)
+
+
+class LLMGovernor:
+    """
+    Régulateur partagé par les coroutines et les threads du processus
+    (crawl4ai et CrewAI appellent le LLM depuis des threads).
+    """
+
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        tpm: float = LLM_TPM,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._lock = threading.Lock()
+        now = clock()
+        self._requests = TokenBucket(rpm, now)
+        self._tokens = TokenBucket(tpm, now)
+        self._waiting: Dict[int, int] = {INTERACTIVE: 0, BATCH: 0}
+        self._paused_until = 0.0
+        self._rate_limits = 0
+        self._breaker_open_until = 0.0
+        self.stats = {"requests": 0, "tokens": 0, "rate_limits": 0}
+
+    def _try_acquire(self, priority: int, requests: int, tokens: int) -> float:
+        """Réserve la capacité si possible ; sinon délai avant un nouvel essai"""
+        with self._lock:
+            now = self._clock()
+            if now < self._breaker_open_until:
+                raise LLMCircuitOpen(
+                    f"Appels LLM suspendus encore "
+                    f"{self._breaker_open_until - now:.0f}s après des 429 répétés"
+                )
+            if now < self._paused_until:
+                return self._paused_until - now
+            # Les demandes prioritaires en attente passent d'abord
+            if any(self._waiting[p] for p in self._waiting if p < priority):
+                return 0.05
+
+            wait = max(
+                self._requests.wait_time(requests, now),
+                self._tokens.wait_time(tokens, now),
+            )
+            if wait > 0:
+                return wait
+
+            self._requests.take(requests, now)
+            self._tokens.take(tokens, now)
+            self.stats["requests"] += requests
+            return 0.0
+
+    def _reconcile(self, reserved: int, used: int) -> None:
+        with self._lock:
+            if used < reserved:
+                self._tokens.give(reserved - used)
+            else:
+                self._tokens.take(used - reserved, self._clock())
+            self.stats["tokens"] += used
+
+    def _prepare(self, priority: Optional[int]):
+        budget = _current_budget.get()
+        if budget is not None:
+            budget.check()
+        return (_current_priority.get() if priority is None else priority), budget
+
+    async def acquire(
+        self, priority: Optional[int] = None, tokens: int = 0, requests: int = 1
+    ) -> LLMLease:
+        priority, budget = self._prepare(priority)
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                wait = self._try_acquire(priority, requests, tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, 5))
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
+        return LLMLease(self, tokens, budget)
+
+    @asynccontextmanager
+    async def limit(
+        self, priority: Optional[int] = None, tokens: int = 0, requests: int = 1
+    ):
+        """Réserve la capacité pour un appel (ou un groupe d'appels) LLM"""
+        lease = await self.acquire(priority, tokens, requests)
+        try:
+            yield lease
+        finally:
+            lease.close()
+
+    def report_rate_limit(self, retry_after: Optional[float] = None) -> float:
+        """
+        Signale un 429 : tous les appels sont mis en pause (délai exponentiel
+        ou Retry-After), et le disjoncteur s'ouvre après trop de 429 de suite.
+
+        Returns:
+            Durée de la pause en secondes
+        """
+        with self._lock:
+            now = self._clock()
+            self._rate_limits += 1
+            self.stats["rate_limits"] += 1
+            delay = retry_after or min(
+                LLM_BACKOFF_SECONDS * 2 ** (self._rate_limits - 1),
+                LLM_BACKOFF_MAX_SECONDS,
+            )
+            self._paused_until = max(self._paused_until, now + delay)
+            if self._rate_limits >= LLM_BREAKER_THRESHOLD:
+                self._breaker_open_until = now + LLM_BREAKER_COOLDOWN_SECONDS
+                self._rate_limits = 0
+                logger.error(
+                    f"🛑 {LLM_BREAKER_THRESHOLD} erreurs 429 consécutives : appels LLM "
+                    f"suspendus {LLM_BREAKER_COOLDOWN_SECONDS:.0f}s"
+                )
+            else:
+                logger.warning(f"⏳ 429 OpenAI : pause des appels LLM de {delay:.1f}s")
+            return delay
+
+    def report_success(self) -> None:
+        with self._lock:
+            self._rate_limits = 0
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Vrai pour un 429 (openai, litellm ou erreur encapsulée)"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    if type(error).__name__ == "RateLimitError":
+        return True
+    cause = error.__cause__ or error.__context__
+    return cause is not None and cause is not error and is_rate_limit_error(cause)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Délai Retry-After renvoyé par l'API, s'il est présent"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# Régulateur unique du processus
+governor = LLMGovernor()
+
+
+def _install_litellm_hooks() -> None:
+    """
+    crawl4ai et CrewAI appellent OpenAI via litellm, depuis leurs propres
+    threads : un callback litellm remonte leurs 429 au régulateur.
+    """
+    try:
+        import litellm
+        from litellm.integrations.custom_logger import CustomLogger
+    except ImportError:
+        return
+
+    class GovernorCallback(CustomLogger):
+        def log_success_event(self, kwargs, response_obj, start_time, end_time):
+            governor.report_success()
+
+        async def async_log_success_event(
+            self, kwargs, response_obj, start_time, end_time
+        ):
+            governor.report_success()
+
+        def log_failure_event(self, kwargs, response_obj, start_time, end_time):
+            error = kwargs.get("exception")
+            if error is not None and is_rate_limit_error(error):
+                governor.report_rate_limit(retry_after_seconds(error))
+
+        async def async_log_failure_event(
+            self, kwargs, response_obj, start_time, end_time
+        ):
+            self.log_failure_event(kwargs, response_obj, start_time, end_time)
+
+    if not any(type(cb).__name__ == "GovernorCallback" for cb in litellm.callbacks):
+        litellm.callbacks.append(GovernorCallback())
+
+
+_install_litellm_hooks()
@@ -1,3 +1,10 @@
+from app.llm.governor import (
+    LLMBudgetExceeded,
+    LLMCircuitOpen,
+    governor,
+    is_rate_limit_error,
+    retry_after_seconds,
+)
 from job_crawler.crawler1 import get_filtered_markdown
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.prompts import PromptTemplate
@@ -6,10 +13,19 @@ from langchain_core.documents import Document
 import asyncio
 import logging
 import os
+from typing import Awaitable, Callable, List, Optional
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
 
+# Modèle et version du prompt de résumé, enregistrés avec chaque description
+# en cache (job_descriptions) : incrémenter la version invalide le cache
+SUMMARY_MODEL = os.getenv("DESCRIPTION_MODEL", "gpt-4o-mini")
+SUMMARY_PROMPT_VERSION = 2
+
+# Rappel recevant les tokens d'une réponse diffusée
+TokenCallback = Callable[[str], Awaitable[None]]
+
 # Appliquer nest_asyncio uniquement si ce n'est pas déjà un uvloop.Loop
 try:
     import nest_asyncio
@@ -25,10 +41,11 @@ except Exception as e:
     logger.warning(f"nest_asyncio non appliqué : {e}")
 
 
-async def fetch_documents(url: str):
+async def fetch_documents(url: str, crawler=None):
     """
     Récupère le contenu rendu de la page via Crawl4ai.
     Renvoie mardown filtre au prealable.
+    `crawler` permet de réutiliser un navigateur déjà démarré (CrawlerPool).
     """
     if not url or not url.startswith(("http://", "https://")):
         logger.warning(f"URL invalide: {url}")
@@ -36,7 +53,7 @@ async def fetch_documents(url: str):
 
     try:
         logger.info(f"Chargement du contenu depuis: {url}")
-        result = await get_filtered_markdown(url)
+        result = await get_filtered_markdown(url, crawler=crawler)
         if result.get("status") == "success" and result.get("filtered_markdown"):
             markdown_content = result["filtered_markdown"]
             metadata = result.get("metadata", {})
@@ -57,6 +74,8 @@ async def fetch_documents(url: str):
                 f"Contenu récupéré: 1 document avec {metadata.get('word_count', 0)} mots"
             )
             return [doc]
+    except (LLMBudgetExceeded, LLMCircuitOpen):
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de la récupération du contenu: {str(e)}")
         return []
@@ -70,6 +89,52 @@ def estimate_token_count(text):
     return len(text.split()) * 1.33
 
 
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Nombre de tokens du texte pour SUMMARY_MODEL, calculé avec tiktoken.
+    Se rabat sur estimate_token_count si l'encodage n'est pas disponible.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            try:
+                _encoding = tiktoken.encoding_for_model(SUMMARY_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken indisponible, estimation des tokens : {e}")
+            _encoding = False
+
+    if not _encoding:
+        return int(estimate_token_count(text))
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def pack_by_tokens(texts: List[str], max_tokens: int) -> List[List[str]]:
+    """
+    Regroupe des textes consécutifs en lots de moins de `max_tokens` tokens
+    (un texte plus long que la limite forme un lot à lui seul).
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
 def split_documents(docs, chunk_size: int = 2000, chunk_overlap: int = 200):
     """
     Découpe la liste de Document en chunks si nécessaire.
@@ -105,41 +170,9 @@ def split_documents(docs, chunk_size: int = 2000, chunk_overlap: int = 200):
     return chunks
 
 
-async def summarize_chunks(chunks):
-    """
-    Traite le contenu des chunks et génère un résumé structuré de l'offre d'emploi.
-    """
-
-    # Vérifier si la clé API est disponible
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        logger.error(
-            "OPENAI_API_KEY n'est pas définie dans les variables d'environnement"
-        )
-        return "La génération automatique de description nécessite une clé API OpenAI valide."
-
-    # Combiner les chunks en un seul texte
-    combined_text = "\n\n".join([chunk.page_content for chunk in chunks])
-
-    # Vérifier la taille estimée du texte pour le LLM
-    estimated_tokens = estimate_token_count(combined_text)
-    logger.info(f"Taille estimée du texte: ~{estimated_tokens:.0f} tokens")
-
-    # Si le texte est trop long, le tronquer
-    max_tokens = 8000  # Limite conservative pour gpt-4o-mini
-    if estimated_tokens > max_tokens:
-        logger.warning(
-            f"Texte trop long ({estimated_tokens:.0f} tokens), troncature appliquée"
-        )
-        words = combined_text.split()
-        # On garde environ 75% de la limite max pour laisser de la place à la réponse
-        safe_word_count = int(max_tokens * 0.75 / 1.33)
-        combined_text = " ".join(words[:safe_word_count])
-        logger.info(f"Texte tronqué à environ {safe_word_count} mots")
-
-    prompt = PromptTemplate(
-        input_variables=["text"],
-        template="""
+SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template="""
         Tu es un assistant spécialisé dans l'analyse d'offres d'emploi. Ta tâche est de résumer l'offre d'emploi suivante de manière structurée.
 
         Extrais et présente les informations suivantes:
@@ -156,28 +189,161 @@ async def summarize_chunks(chunks):
         Contenu de l'offre:
         {text}
         """,
+)
+
+# Étape "map" : notes factuelles extraites d'un extrait de la page
+MAP_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template="""
+        Voici un extrait d'une page d'offre d'emploi. Relève en notes courtes et factuelles tout ce qui concerne : l'entreprise et le poste, les missions, les compétences techniques et soft skills demandées, les avantages, l'équipe, la culture et le télétravail.
+
+        N'invente rien. Si l'extrait ne contient aucune de ces informations (menu, pied de page, autres offres), réponds par une chaîne vide "".
+
+        Extrait:
+        {text}
+        """,
+)
+
+# Étape "collapse" : fusion de notes trop volumineuses pour la réduction finale
+COLLAPSE_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template="""
+        Fusionne les notes suivantes, extraites d'une même offre d'emploi, en supprimant les doublons et sans perdre aucune mission ni compétence.
+
+        Notes:
+        {text}
+        """,
+)
+
+# Budget d'entrée d'un appel LLM ; au-delà, résumé map-reduce
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", "6000"))
+# Tokens de sortie réservés auprès du régulateur avant chaque appel
+SUMMARY_MAX_OUTPUT_TOKENS = int(os.getenv("SUMMARY_MAX_OUTPUT_TOKENS", "800"))
+# Tentatives d'un appel après des 429
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+
+
+def _total_tokens(message) -> Optional[int]:
+    """Tokens consommés d'après les métadonnées d'usage renvoyées par OpenAI"""
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+async def _invoke(
+    prompt: PromptTemplate, text: str, on_token: Optional[TokenCallback] = None
+) -> str:
+    """
+    Appel LLM sous la limite de concurrence partagée et le régulateur global
+    (débit, priorité, budget). Un 429 met en pause tous les appels puis
+    l'appel est retenté, sauf si des tokens ont déjà été diffusés.
+    Avec `on_token`, la réponse est diffusée (streaming) au fil de la génération.
+    """
+    # Les retries sont gérés ici pour que le régulateur voie chaque 429
+    model = ChatOpenAI(
+        model=SUMMARY_MODEL, temperature=0.2, max_retries=0, stream_usage=True
     )
+    chain = prompt | model
+    estimate = count_tokens(prompt.format(text=text)) + SUMMARY_MAX_OUTPUT_TOKENS
+
+    for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+        content = ""
+        # Le débit (requêtes et tokens par minute) est borné par le régulateur
+        async with governor.limit(tokens=estimate) as lease:
+            try:
+                if on_token is None:
+                    result = await chain.ainvoke({"text": text})
+                    # Extraire le contenu selon le format de sortie du modèle
+                    content = (
+                        result.content if hasattr(result, "content") else str(result)
+                    )
+                    lease.record(_total_tokens(result))
+                else:
+                    async for piece in chain.astream({"text": text}):
+                        lease.record(_total_tokens(piece))
+                        token = (
+                            piece.content if hasattr(piece, "content") else str(piece)
+                        )
+                        if token:
+                            content += token
+                            await on_token(token)
+            except Exception as e:
+                if not is_rate_limit_error(e) or content or attempt == LLM_MAX_ATTEMPTS:
+                    raise
+                governor.report_rate_limit(retry_after_seconds(e))
+                continue
+        governor.report_success()
+        break
+
+    return content.strip().strip('"').strip()
+
+
+async def _map_reduce(
+    texts: List[str], on_token: Optional[TokenCallback] = None
+) -> str:
+    """
+    Résumé d'un contenu trop long pour un seul appel : chaque chunk est
+    réduit en notes (en parallèle), les notes sont fusionnées par lots tant
+    qu'elles dépassent le budget, puis résumées au format habituel.
+    """
+    logger.info(f"Résumé map-reduce de {len(texts)} chunks")
+    notes = await asyncio.gather(*(_invoke(MAP_PROMPT, text) for text in texts))
+    notes = [note for note in notes if note]
+    if not notes:
+        return ""
 
-    try:
-        # Utiliser l'API correcte pour initialiser le modèle
-        model = ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
+    while (
+        len(notes) > 1 and count_tokens("\n\n".join(notes)) > SUMMARY_MAX_INPUT_TOKENS
+    ):
+        groups = pack_by_tokens(notes, SUMMARY_MAX_INPUT_TOKENS)
+        if len(groups) == len(notes):
+            # Aucune note ne peut être regroupée : la fusion ne réduirait rien
+            break
+        logger.info(f"Fusion de {len(notes)} notes en {len(groups)} lots")
+        notes = await asyncio.gather(
+            *(_invoke(COLLAPSE_PROMPT, "\n\n".join(group)) for group in groups)
+        )
 
-        # Créer une chaîne de traitement en utilisant l'opérateur pipe
-        chain = prompt | model
+    return await _invoke(SUMMARY_PROMPT, "\n\n".join(notes), on_token)
 
-        logger.info("Envoi de la requête au LLM")
-        # Traiter l'ensemble du texte en une seule fois
-        result = await chain.ainvoke({"text": combined_text})
 
-        # Extraire le contenu selon le format de sortie du modèle
-        if hasattr(result, "content"):
-            content = result.content
+async def summarize_chunks(chunks, on_token: Optional[TokenCallback] = None):
+    """
+    Traite le contenu des chunks et génère un résumé structuré de l'offre d'emploi.
+
+    Un contenu qui tient dans SUMMARY_MAX_INPUT_TOKENS est résumé en un seul
+    appel ; au-delà, les chunks sont résumés séparément puis combinés
+    (map-reduce) au lieu d'être tronqués. `on_token` reçoit les tokens du
+    résumé final au fil de la génération.
+    """
+
+    # Vérifier si la clé API est disponible
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.error(
+            "OPENAI_API_KEY n'est pas définie dans les variables d'environnement"
+        )
+        return "La génération automatique de description nécessite une clé API OpenAI valide."
+
+    texts = [chunk.page_content for chunk in chunks if chunk.page_content.strip()]
+    combined_text = "\n\n".join(texts)
+
+    total_tokens = count_tokens(combined_text)
+    logger.info(f"Taille du texte: {total_tokens} tokens")
+
+    try:
+        if total_tokens <= SUMMARY_MAX_INPUT_TOKENS or len(texts) < 2:
+            logger.info("Envoi de la requête au LLM")
+            content = await _invoke(SUMMARY_PROMPT, combined_text, on_token)
         else:
-            content = str(result)
+            content = await _map_reduce(texts, on_token)
 
         logger.info(f"Résumé généré: {len(content)} caractères")
         return content
 
+    except (LLMBudgetExceeded, LLMCircuitOpen):
+        # Budget épuisé ou disjoncteur ouvert : l'appelant interrompt son
+        # passage, ce n'est pas un échec du résumé
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de la génération du résumé: {str(e)}")
         return ""
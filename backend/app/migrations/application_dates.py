@@ -0,0 +1,58 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Ajouter le chemin parent au sys.path pour pouvoir importer les modules
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.database import get_database
+
+
+async def migrate_application_dates():
+    """
+    Convertit les dates de candidature stockées en chaînes ISO en dates BSON.
+
+    Les chaînes et les dates ne se comparent pas entre elles dans MongoDB :
+    le tri, la pagination par curseur et l'archivage reposent sur des dates.
+    """
+
+    db = await get_database()
+    string_filter = {"application_date": {"$type": "string"}}
+
+    count_before = await db["applications"].count_documents(string_filter)
+
+    if count_before == 0:
+        print("Aucune migration nécessaire. Toutes les dates sont déjà typées.")
+        return
+
+    print(f"Migration de {count_before} dates de candidature au format chaîne...")
+
+    # Conversion côté serveur, en un seul update_many
+    result = await db["applications"].update_many(
+        string_filter,
+        [
+            {
+                "$set": {
+                    "application_date": {
+                        "$dateFromString": {
+                            "dateString": "$application_date",
+                            "onError": "$created_at",
+                        }
+                    }
+                }
+            }
+        ],
+    )
+
+    print(f"Migration terminée : {result.modified_count} candidatures mises à jour.")
+
+    count_after = await db["applications"].count_documents(string_filter)
+
+    if count_after == 0:
+        print("Succès : toutes les dates de candidature sont des dates BSON.")
+    else:
+        print(f"Attention : {count_after} dates sont toujours des chaînes.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_application_dates())
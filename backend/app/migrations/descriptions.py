@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Ajouter le chemin parent au sys.path pour pouvoir importer les modules
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.database import get_database
+from app.services.description_backfill import (
+    BACKFILL_BATCH_SIZE,
+    BACKFILL_CONCURRENCY,
+    DescriptionBackfill,
+)
+
+
+async def backfill_descriptions(
+    concurrency: int = BACKFILL_CONCURRENCY,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    retry_failed: bool = False,
+    restart: bool = False,
+    max_tokens=None,
+    max_cost=None,
+):
+    """
+    Génère les descriptions manquantes des candidatures ayant une URL.
+
+    Reprend au dernier lot terminé si le script a été interrompu ; les URLs
+    en échec sont listées dans description_backfill_errors et ne sont
+    retentées qu'avec --retry-failed. Avec --max-tokens / --max-cost, le
+    passage s'arrête quand le budget LLM est épuisé et reprendra au même lot.
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        print("❌ OPENAI_API_KEY n'est pas définie dans les variables d'environnement")
+        return 1
+
+    db = await get_database()
+    backfill = DescriptionBackfill(
+        db,
+        concurrency=concurrency,
+        batch_size=batch_size,
+        retry_failed=retry_failed,
+        max_tokens=max_tokens,
+        max_cost=max_cost,
+    )
+    report = await backfill.run(restart=restart)
+
+    print(f"Candidatures traitées: {report['applications']}")
+    print(f"Descriptions enregistrées: {report['updated']}")
+    print(f"Pages résumées: {report['urls_crawled']}")
+    print(f"Descriptions lues dans le cache: {report['urls_reused']}")
+    print(f"URLs en échec: {report['failed_urls']}")
+    print(f"Candidatures ignorées: {report['skipped']}")
+    print(
+        f"Durée: {report['duration_seconds']}s "
+        f"({report['applications_per_minute']} candidatures/min, "
+        f"{report['urls_per_minute']} pages/min)"
+    )
+    if report["interrupted"]:
+        print(f"⏸️ Passage interrompu: {report['interrupted']}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="Backfill des descriptions")
+    parser.add_argument("--concurrency", type=int, default=BACKFILL_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    parser.add_argument("--retry-failed", action="store_true")
+    parser.add_argument("--restart", action="store_true")
+    parser.add_argument("--max-tokens", type=int, default=None)
+    parser.add_argument("--max-cost", type=float, default=None)
+    args = parser.parse_args()
+    sys.exit(
+        asyncio.run(
+            backfill_descriptions(
+                concurrency=args.concurrency,
+                batch_size=args.batch_size,
+                retry_failed=args.retry_failed,
+                restart=args.restart,
+                max_tokens=args.max_tokens,
+                max_cost=args.max_cost,
+            )
+        )
+    )
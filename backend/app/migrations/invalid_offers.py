@@ -0,0 +1,77 @@
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Ajouter le chemin parent au sys.path pour pouvoir importer les modules
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.database import get_database
+from app.services.offer_stats import decrement_matching
+from app.services.offer_validation import (
+    MISSING_COMPANY,
+    MISSING_TITLE,
+    REJECTED_COLLECTION,
+)
+
+# Offres invalides enregistrées avant la validation à l'ingestion
+INVALID_OFFERS = {
+    MISSING_TITLE: {"poste": {"$in": [None, "", "Poste non spécifié"]}},
+    MISSING_COMPANY: {
+        "entreprise": {"$in": [None, "", "Entreprise non spécifiée", "Non spécifié"]}
+    },
+}
+
+
+async def migrate_invalid_offers():
+    """
+    Déplace les offres invalides déjà présentes dans job_offers vers la
+    quarantaine job_offers_rejected, avec leur code de rejet.
+
+    À lancer une fois : les nouvelles offres invalides sont refusées dès
+    l'ingestion et le nettoyage nocturne ne les recherche plus.
+    """
+
+    db = await get_database()
+    collection = db["job_offers"]
+
+    for reason, invalid_filter in INVALID_OFFERS.items():
+        count_before = await collection.count_documents(invalid_filter)
+
+        if count_before == 0:
+            print(f"{reason} : aucune offre à déplacer.")
+            continue
+
+        print(f"{reason} : déplacement de {count_before} offres en quarantaine...")
+
+        # Copie côté serveur, sans passer par Python
+        await collection.aggregate(
+            [
+                {"$match": invalid_filter},
+                {
+                    "$project": {
+                        "_id": 0,
+                        "reason": {"$literal": reason},
+                        "raw_data": "$$ROOT",
+                        "source_query": "$source_query",
+                        "rejected_at": {"$literal": datetime.now(timezone.utc)},
+                    }
+                },
+                {
+                    "$merge": {
+                        "into": REJECTED_COLLECTION,
+                        "whenMatched": "keepExisting",
+                    }
+                },
+            ]
+        ).to_list(length=None)
+
+        await decrement_matching(db, invalid_filter)
+        result = await collection.delete_many(invalid_filter)
+        print(f"{reason} : {result.deleted_count} offres supprimées de job_offers.")
+
+    print("Migration terminée.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_invalid_offers())
@@ -0,0 +1,101 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Ajouter le chemin parent au sys.path pour pouvoir importer les modules
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.database import get_database
+
+DATE_FIELDS = ("created_at", "updated_at", "first_seen", "last_seen")
+
+
+async def migrate_offer_dates():
+    """
+    Convertit les dates des offres stockées en chaînes en dates BSON et
+    renseigne last_seen quand il manque.
+
+    L'index TTL sur last_seen ne supprime que les documents dont le champ est
+    une date : une offre avec une date en chaîne ne serait jamais expirée.
+    """
+
+    db = await get_database()
+    collection = db["job_offers"]
+
+    for field in DATE_FIELDS:
+        string_filter = {field: {"$type": "string"}}
+        count_before = await collection.count_documents(string_filter)
+
+        if count_before == 0:
+            print(f"{field} : aucune date au format chaîne.")
+            continue
+
+        print(f"{field} : conversion de {count_before} dates au format chaîne...")
+
+        # Conversion côté serveur, en un seul update_many
+        result = await collection.update_many(
+            string_filter,
+            [
+                {
+                    "$set": {
+                        field: {
+                            "$dateFromString": {
+                                "dateString": f"${field}",
+                                # Chaîne illisible : conservée telle quelle
+                                "onError": f"${field}",
+                            }
+                        }
+                    }
+                }
+            ],
+        )
+        print(f"{field} : {result.modified_count} offres mises à jour.")
+
+        remaining = await collection.count_documents(string_filter)
+        if remaining:
+            print(
+                f"Attention : {remaining} valeurs de {field} illisibles, "
+                f"laissées en chaîne (à corriger à la main)."
+            )
+
+    # Sans last_seen, l'offre n'expire pas : on repart de la date de collecte
+    # (ou de maintenant, pour ne pas supprimer d'un coup les offres sans date
+    # ou dont la date est restée une chaîne illisible)
+    result = await collection.update_many(
+        {"last_seen": {"$not": {"$type": "date"}}},
+        [
+            {
+                "$set": {
+                    "last_seen": {
+                        "$switch": {
+                            "branches": [
+                                {
+                                    "case": {"$eq": [{"$type": "$updated_at"}, "date"]},
+                                    "then": "$updated_at",
+                                },
+                                {
+                                    "case": {"$eq": [{"$type": "$created_at"}, "date"]},
+                                    "then": "$created_at",
+                                },
+                            ],
+                            "default": "$$NOW",
+                        }
+                    }
+                }
+            }
+        ],
+    )
+    print(f"last_seen renseigné pour {result.modified_count} offres.")
+
+    count_after = await collection.count_documents(
+        {"last_seen": {"$not": {"$type": "date"}}}
+    )
+
+    if count_after == 0:
+        print("Succès : toutes les offres ont une date last_seen et expireront.")
+    else:
+        print(f"Attention : {count_after} offres n'ont toujours pas de last_seen.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_offer_dates())
@@ -0,0 +1,55 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Ajouter le chemin parent au sys.path pour pouvoir importer les modules
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from pymongo.errors import OperationFailure
+
+from app.database import get_database
+from app.indexes import INDEXES, sync_collection_indexes
+from app.tasks.clean_job_offers import normalize_existing_data, remove_duplicates
+
+URL_HASH_INDEX = "url_hash_1"
+LEGACY_URL_INDEX = "url_1"
+
+
+async def migrate_offer_url_hash():
+    """
+    Passe l'identité des offres de l'URL brute au hash de l'URL canonique.
+
+    L'index unique sur url_hash ne peut être créé tant que des doublons
+    existent : on calcule url_hash et fingerprint pour toutes les offres,
+    on supprime les doublons, puis on crée les index déclarés.
+    """
+
+    db = await get_database()
+    collection = db["job_offers"]
+
+    # Un index unique créé avant le calcul ferait échouer les doublons
+    for index_name in (URL_HASH_INDEX, LEGACY_URL_INDEX):
+        try:
+            await collection.drop_index(index_name)
+            print(f"Index {index_name} supprimé.")
+        except OperationFailure:
+            pass
+
+    print("Calcul de url_hash et fingerprint pour les offres existantes...")
+    result = await normalize_existing_data()
+    print(f"Normalisation : {result}")
+
+    print("Suppression des doublons...")
+    result = await remove_duplicates()
+    print(f"Doublons : {result}")
+
+    report = await sync_collection_indexes(collection, INDEXES["job_offers"])
+
+    if report["errors"]:
+        print(f"Attention : index non créés : {report['errors']}")
+    else:
+        print(f"Succès : index créés : {report['created']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_offer_url_hash())
@@ -1,6 +1,7 @@
+import os
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 from bson import ObjectId
 from pydantic import BaseModel, Field, GetCoreSchemaHandler, HttpUrl, ConfigDict
 from pydantic_core import core_schema
@@ -202,6 +203,52 @@ class JobApplicationResponse(BaseModel):
     model_config = {"populate_by_name": True, "arbitrary_types_allowed": True}
 
 
+# Vue allégée de GET /applications/?view=summary (sans description ni notes)
+class JobApplicationSummary(BaseModel):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    company: str
+    position: str
+    url: Optional[HttpUrl] = None
+    application_date: datetime
+    status: ApplicationStatus
+    location: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    archived: Optional[bool] = False
+    has_description: bool = False
+    notes_count: int = 0
+
+    model_config = {"populate_by_name": True, "arbitrary_types_allowed": True}
+
+
+class ListView(str, Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class DescriptionJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+# Modèle pour l'état de la génération de description d'une candidature
+class DescriptionJobResponse(BaseModel):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    application_id: PyObjectId
+    url: str
+    status: DescriptionJobStatus
+    attempts: int = 0
+    last_error: Optional[str] = None
+    run_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"populate_by_name": True}
+
+
 class TaskStatus(str, Enum):
     TODO = "À faire"
     IN_PROGRESS = "En cours"
@@ -252,6 +299,51 @@ class TaskCreate(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class BulkAction(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    ARCHIVE = "archive"
+    DELETE = "delete"
+
+
+# Opération d'un lot : `data` pour create / update, `id` pour les autres
+class BulkOperation(BaseModel):
+    action: BulkAction
+    id: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+
+# Nombre maximal d'opérations par requête /bulk
+BULK_MAX_OPERATIONS = int(os.getenv("BULK_MAX_OPERATIONS", "200"))
+
+
+class BulkRequest(BaseModel):
+    operations: List[BulkOperation] = Field(
+        ..., min_length=1, max_length=BULK_MAX_OPERATIONS
+    )
+
+
+class BulkItemStatus(str, Enum):
+    OK = "ok"
+    NOT_FOUND = "not_found"
+    INVALID = "invalid"
+    ERROR = "error"
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    action: BulkAction
+    id: Optional[str] = None
+    status: BulkItemStatus
+    error: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
 class JobOfferCreate(BaseModel):
     poste: str
     entreprise: str
@@ -0,0 +1,153 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Response
+
+# En-tête portant le jeton de la page suivante
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: Any, last_id: ObjectId) -> str:
+    """
+    Encode la position du dernier élément d'une page en jeton opaque.
+    `value` est la valeur du champ de tri (datetime ou None).
+    """
+    payload = {
+        "v": value.isoformat() if isinstance(value, datetime) else value,
+        "id": str(last_id),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, ObjectId]:
+    """Décode un jeton produit par encode_cursor (400 si le jeton est invalide)"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        value = payload["v"]
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return value, ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Jeton opaque pour les listes triées par pertinence (non paginables par clé)"""
+    raw = json.dumps({"o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_offset_cursor(token: Optional[str]) -> int:
+    """Décode un jeton produit par encode_offset_cursor (0 si absent)"""
+    if not token:
+        return 0
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded))["o"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(offset)
+        return offset
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def keyset_filter(field: str, token: Optional[str]) -> dict:
+    """
+    Filtre des éléments situés après le curseur, pour un tri (field, _id) décroissant.
+    Le coût d'une page ne dépend pas de sa profondeur et reste stable
+    même si des documents sont insérés entre deux pages.
+    """
+    if not token:
+        return {}
+
+    value, last_id = decode_cursor(token)
+    if value is None:
+        return {field: None, "_id": {"$lt": last_id}}
+
+    return {
+        "$or": [
+            {field: {"$lt": value}},
+            {field: value, "_id": {"$lt": last_id}},
+            {field: None},
+        ]
+    }
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    field: str,
+    limit: int,
+    response: Response,
+    projection: Optional[dict] = None,
+):
+    """
+    Récupère une page triée par (field, _id) décroissants et renseigne
+    l'en-tête X-Next-Cursor s'il reste des éléments.
+    `projection` doit conserver `field`, nécessaire au curseur.
+    """
+    documents = (
+        await collection.find(query, projection)
+        .sort([(field, -1), ("_id", -1)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            last.get(field), last["_id"]
+        )
+
+    return documents
+
+
+def _sort_key(field: str):
+    """Clé de tri (field, _id) décroissants ; MongoDB classe null en dernier"""
+
+    def key(document):
+        value = document.get(field)
+        return (value is not None, value or 0, document["_id"])
+
+    return key
+
+
+async def fetch_merged_page(
+    collections,
+    query: dict,
+    field: str,
+    limit: int,
+    response: Response,
+    projection: Optional[dict] = None,
+):
+    """
+    Comme fetch_page, sur plusieurs collections de même schéma.
+    Chaque collection fournit au plus limit + 1 documents via son index,
+    puis les résultats sont fusionnés : le curseur reste valable pour toutes.
+    """
+    documents = []
+    for collection in collections:
+        documents += (
+            await collection.find(query, projection)
+            .sort([(field, -1), ("_id", -1)])
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+
+    documents.sort(key=_sort_key(field), reverse=True)
+
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            last.get(field), last["_id"]
+        )
+
+    return documents
@@ -0,0 +1,59 @@
+"""
+Projections des vues liste.
+
+Les listes ne lisent dans MongoDB que les champs qu'elles renvoient : la
+description générée (plusieurs Ko) et les notes restent sur le serveur
+pour GET /applications/?view=summary, et la copie brute `raw_data` des
+offres n'est jamais lue par GET /job-offers/. Les routes de détail lisent
+le document complet.
+"""
+
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+
+from .models import JobApplicationResponse, JobOfferResponse
+
+# Champs de GET /applications/?view=summary ; description et notes sont
+# remplacées par des indicateurs calculés côté serveur
+APPLICATION_SUMMARY_PROJECTION = {
+    "company": 1,
+    "position": 1,
+    "url": 1,
+    "application_date": 1,
+    "status": 1,
+    "location": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "archived": 1,
+    "has_description": {"$gt": [{"$strLenCP": {"$ifNull": ["$description", ""]}}, 0]},
+    "notes_count": {"$size": {"$ifNull": ["$notes", []]}},
+}
+
+# Champs sélectionnables avec GET /applications/?fields=...
+APPLICATION_FIELDS = frozenset(
+    name for name in JobApplicationResponse.model_fields if name != "id"
+)
+
+# Champs de JobOfferResponse présents en base (id est dérivé de _id)
+OFFER_LIST_PROJECTION = {
+    name: 1 for name in JobOfferResponse.model_fields if name != "id"
+}
+
+
+def fields_projection(
+    fields: Optional[str], allowed: Iterable[str], always: Iterable[str] = ()
+) -> Optional[dict]:
+    """
+    Projection d'un paramètre `fields` ("company,status") ; 400 sur un champ
+    inconnu. `always` ajoute les champs nécessaires à la route (clé de tri).
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Champs inconnus: {', '.join(unknown)}"
+        )
+    return {name: 1 for name in (*names, *always)}
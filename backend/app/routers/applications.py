@@ -1,96 +1,174 @@
-from fastapi import APIRouter, Body, Depends, status, HTTPException, BackgroundTasks
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    status,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime, timezone
-import pymongo
+import json
 import logging
 from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
 
 from ..models import (
+    BulkAction,
+    BulkRequest,
+    BulkResponse,
+    DescriptionJobResponse,
     JobApplicationCreate,
     JobApplicationResponse,
+    JobApplicationSummary,
     JobApplicationUpdate,
+    ListView,
     UserModel,
 )
 from ..database import get_database
 from ..utils import serialize_mongodb_doc, capitalize_words
 from ..auth import get_current_user
-from ..llm.utils import fetch_documents, split_documents, summarize_chunks
+from ..pagination import (
+    NEXT_CURSOR_HEADER,
+    fetch_merged_page,
+    fetch_page,
+    keyset_filter,
+)
+from ..projections import (
+    APPLICATION_FIELDS,
+    APPLICATION_SUMMARY_PROJECTION,
+    fields_projection,
+)
+from ..services.application_archive import (
+    ARCHIVE_COLLECTION,
+    HOT_COLLECTION,
+    restore_application,
+    restore_applications,
+)
+from ..services.description_cache import (
+    get_cached_description,
+    get_cached_descriptions,
+)
+from ..services.description_events import FINAL_EVENTS, tail_events
+from ..services.description_queue import (
+    PENDING,
+    RUNNING,
+    enqueue_description,
+    enqueue_descriptions,
+    get_latest_job,
+)
+from ..services.owned_documents import (
+    BULK_INVALID,
+    BULK_OK,
+    OwnedDocuments,
+    bulk_object_id,
+    bulk_results,
+)
 
 logger = logging.getLogger(__name__)
 
 job_router = APIRouter(prefix="/applications", tags=["applications"])
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
-async def _generate_description_bg(application_id: ObjectId, url: str, db):
-    logger.info(f"[description_bg] Démarrage pour ID={application_id}, URL={url}")
-    try:
-        docs = await fetch_documents(url)
-        if not docs:
-            logger.warning(f"[description_bg] Aucun document récupéré pour {url}")
-            return
 
-        chunks = split_documents(docs)
-        description = await summarize_chunks(chunks)
+def _applications(db, current_user: UserModel) -> OwnedDocuments:
+    """Candidatures de l'utilisateur, collection chaude puis archive"""
+    return OwnedDocuments(db, [HOT_COLLECTION, ARCHIVE_COLLECTION], current_user.id)
 
-        if description:
-            logger.info(
-                f"[description_bg] Description générée ({len(description)} chars)"
-            )
-            await db["applications"].update_one(
-                {"_id": ObjectId(application_id)},
-                {
-                    "$set": {
-                        "description": description,
-                        "updated_at": datetime.now(timezone.utc),
-                    }
-                },
-            )
-        else:
-            logger.warning("[description_bg] Échec de génération de description")
-    except Exception as e:
-        logger.error(f"[description_bg] Erreur: {str(e)}")
+
+def _application_fields(application) -> dict:
+    """
+    Champs renseignés d'une création / modification de candidature : valeurs
+    vides retirées, entreprise et poste capitalisés.
+    """
+    raw_data = jsonable_encoder(application)
+    data = {
+        k: v
+        for k, v in raw_data.items()
+        if v is not None and (not isinstance(v, str) or v.strip() != "")
+    }
+
+    if "company" in data and data["company"]:
+        data["company"] = capitalize_words(data["company"])
+
+    if "position" in data and data["position"]:
+        data["position"] = capitalize_words(data["position"])
+
+    # Garder une vraie date BSON (jsonable_encoder la convertit en chaîne)
+    if application.application_date:
+        data["application_date"] = application.application_date
+
+    return data
+
+
+def _new_application_data(application: JobApplicationCreate, now: datetime) -> dict:
+    app_data = _application_fields(application)
+    app_data["created_at"] = now
+    app_data.setdefault("application_date", now)
+    return app_data
+
+
+def _sse(event: str, data: dict) -> str:
+    """Formate un événement server-sent events"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _stream_events(request: Request, db, query: dict, since=None):
+    """
+    Relaie les événements de description vers le client SSE, jusqu'à un
+    événement final si `query` cible un job, ou jusqu'à la déconnexion.
+    """
+    single_job = "job_id" in query
+    async for event in tail_events(db, query, since):
+        if event is None:
+            if await request.is_disconnected():
+                return
+            yield ": keep-alive\n\n"
+            continue
+
+        yield _sse(
+            event["event"],
+            {"application_id": str(event["application_id"]), **event["data"]},
+        )
+        if single_job and event["event"] in FINAL_EVENTS:
+            return
 
 
 @job_router.post(
     "/", response_model=JobApplicationResponse, status_code=status.HTTP_201_CREATED
 )
 async def create_application(
-    background_tasks: BackgroundTasks,
     application: JobApplicationCreate = Body(...),
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
-    raw_data = jsonable_encoder(application)
-    app_data = {
-        k: v
-        for k, v in raw_data.items()
-        if v is not None and (not isinstance(v, str) or v.strip() != "")
-    }
+    app_data = _new_application_data(application, datetime.now(timezone.utc))
 
-    if "company" in app_data and app_data["company"]:
-        app_data["company"] = capitalize_words(app_data["company"])
-
-    if "position" in app_data and app_data["position"]:
-        app_data["position"] = capitalize_words(app_data["position"])
+    url_exists = "url" in app_data and app_data["url"] and app_data["url"].strip() != ""
+    description_missing = "description" not in app_data or not app_data["description"]
+    needs_description = url_exists and description_missing
 
-    app_data["user_id"] = current_user.id
-    app_data["created_at"] = datetime.now(timezone.utc)
-    if not app_data.get("application_date"):
-        app_data["application_date"] = app_data["created_at"]
+    # Description déjà générée pour cette offre : attachée immédiatement
+    if needs_description:
+        cached = await get_cached_description(db, app_data["url"].strip())
+        if cached:
+            app_data["description"] = cached
+            needs_description = False
 
-    result = await db["applications"].insert_one(app_data)
-    created = await db["applications"].find_one({"_id": result.inserted_id})
+    created = await _applications(db, current_user).insert(app_data)
 
-    url_exists = "url" in app_data and app_data["url"] and app_data["url"].strip() != ""
-    description_missing = "description" not in app_data or not app_data["description"]
-    if url_exists and description_missing:
+    if needs_description:
         try:
             url = app_data.get("url")
-            logger.info(f"[create_application] URL: {url!r}, ID: {result.inserted_id}")
-            app_id = result.inserted_id
-            background_tasks.add_task(_generate_description_bg, app_id, url.strip(), db)
-            logger.info(f"[create_application] Tâche planifiée pour URL: {url}")
+            logger.info(f"[create_application] URL: {url!r}, ID: {created['_id']}")
+            await enqueue_description(db, created["_id"], url.strip(), current_user.id)
+            logger.info(f"[create_application] Génération planifiée pour URL: {url}")
         except Exception as e:
             logger.error(f"[create_application] Erreur: {str(e)}")
 
@@ -99,7 +177,22 @@ async def create_application(
 
 @job_router.get("/", response_model=List[JobApplicationResponse])
 async def get_applications(
+    response: Response,
     status: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(
+        None, description="Jeton de page suivante (en-tête X-Next-Cursor)"
+    ),
+    include_archived: bool = Query(
+        True, description="Inclure les candidatures archivées"
+    ),
+    view: ListView = Query(
+        ListView.FULL,
+        description="summary : sans description ni notes (JobApplicationSummary)",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Champs à renvoyer, séparés par des virgules"
+    ),
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
@@ -108,12 +201,65 @@ async def get_applications(
     if status:
         query["status"] = status
 
-    applications = (
-        await db["applications"]
-        .find(query)
-        .sort("application_date", pymongo.DESCENDING)
-        .to_list(length=100)
+    if not include_archived:
+        query["archived"] = {"$ne": True}
+
+    page_filter = keyset_filter("application_date", cursor)
+    if page_filter:
+        query = {"$and": [query, page_filter]}
+
+    # Projection poussée dans la requête : les champs lourds ne sont pas lus
+    projection = fields_projection(
+        fields, APPLICATION_FIELDS, always=["application_date"]
     )
+    if projection is None and view == ListView.SUMMARY:
+        projection = APPLICATION_SUMMARY_PROJECTION
+
+    if include_archived:
+        # Collection chaude + archive, fusionnées sur le même curseur
+        applications = await fetch_merged_page(
+            [db[HOT_COLLECTION], db[ARCHIVE_COLLECTION]],
+            query,
+            "application_date",
+            limit,
+            response,
+            projection,
+        )
+    else:
+        applications = await fetch_page(
+            db[HOT_COLLECTION],
+            query,
+            "application_date",
+            limit,
+            response,
+            projection,
+        )
+
+    if projection is not None:
+        if fields:
+            # serialize_mongodb_doc ajoute location : on s'en tient aux champs demandés
+            items = [
+                {
+                    key: value
+                    for key, value in serialize_mongodb_doc(app).items()
+                    if key == "_id" or key in projection
+                }
+                for app in applications
+            ]
+        else:
+            items = [
+                JobApplicationSummary.model_validate(
+                    serialize_mongodb_doc(app)
+                ).model_dump(by_alias=True)
+                for app in applications
+            ]
+        # Réponse partielle : hors du modèle complet, en-tête de pagination conservé
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() == NEXT_CURSOR_HEADER.lower()
+        }
+        return JSONResponse(jsonable_encoder(items), headers=headers)
 
     serialized_applications = []
     for app in applications:
@@ -125,126 +271,281 @@ async def get_applications(
     return serialized_applications
 
 
+@job_router.get("/descriptions/stream")
+async def stream_description_feed(
+    request: Request,
+    db=Depends(get_database),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """
+    Flux SSE des générations de description de l'utilisateur (étapes et
+    événements finaux, sans les tokens) : remplace le polling des listes.
+    """
+    query = {"user_id": current_user.id, "event": {"$ne": "token"}}
+    return StreamingResponse(
+        _stream_events(request, db, query),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@job_router.post("/bulk", response_model=BulkResponse)
+async def bulk_applications(
+    payload: BulkRequest = Body(...),
+    db=Depends(get_database),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """
+    Lot de créations, modifications, archivages et suppressions (import,
+    actions multi-sélection) : une lecture et un bulk_write par collection au
+    lieu d'une requête par candidature. Chaque opération a son propre statut.
+    """
+    now = datetime.now(timezone.utc)
+    items = []
+    for index, operation in enumerate(payload.operations):
+        item = {"index": index, "action": operation.action}
+        try:
+            if operation.action == BulkAction.CREATE:
+                application = JobApplicationCreate.model_validate(operation.data or {})
+                item["document"] = _new_application_data(application, now)
+            else:
+                item["id"] = bulk_object_id(operation.id)
+                if operation.action == BulkAction.UPDATE:
+                    changes = JobApplicationUpdate.model_validate(operation.data or {})
+                    item["set"] = {**_application_fields(changes), "updated_at": now}
+                elif operation.action == BulkAction.ARCHIVE:
+                    item["set"] = {"archived": True, "updated_at": now}
+        except (ValidationError, ValueError) as e:
+            item["status"] = BULK_INVALID
+            item["error"] = str(e)
+        items.append(item)
+
+    # Descriptions déjà générées pour les URLs sans description : une lecture
+    fields = [item.get("document") or item.get("set") or {} for item in items]
+    urls = [
+        data["url"].strip()
+        for data in fields
+        if data.get("url") and not data.get("description")
+    ]
+    cached = await get_cached_descriptions(db, urls) if urls else {}
+    for data in fields:
+        if data.get("url") and not data.get("description"):
+            description = cached.get(data["url"].strip())
+            if description:
+                data["description"] = description
+    for item in items:
+        if "set" in item:
+            item["update"] = {"$set": item["set"]}
+
+    await _applications(db, current_user).bulk(items, projection={"url": 1})
+
+    jobs = []
+    restored = []
+    for item in items:
+        if item["status"] != BULK_OK or item["action"] in (
+            BulkAction.ARCHIVE,
+            BulkAction.DELETE,
+        ):
+            continue
+        data = item.get("document") or item["set"]
+        url = (data.get("url") or "").strip()
+        url_changed = "previous" in item and url != item["previous"].get("url", "")
+        if url and (not data.get("description") or url_changed):
+            jobs.append((item["id"], url))
+        # Une candidature désarchivée revient dans la collection chaude
+        if item["collection"] == ARCHIVE_COLLECTION and data.get("archived") is False:
+            restored.append(item["id"])
+
+    await restore_applications(db, restored)
+
+    if jobs:
+        try:
+            # Les créations n'ont pas encore de job : le flag ne relance que
+            # les modifications qui reviennent à une URL déjà décrite
+            await enqueue_descriptions(db, jobs, current_user.id, regenerate=True)
+        except Exception as e:
+            logger.error(f"Failed to schedule description generation: {e}")
+
+    return bulk_results(items)
+
+
 @job_router.get("/{application_id}", response_model=JobApplicationResponse)
 async def get_application(
     application_id: str,
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
-    application = await db["applications"].find_one({"_id": ObjectId(application_id)})
+    application, _ = await _applications(db, current_user).get(ObjectId(application_id))
 
     if not application:
         raise HTTPException(status_code=404, detail="Candidature non trouvée")
 
-    if str(application["user_id"]) != str(current_user.id):
-        raise HTTPException(
-            status_code=403, detail="Accès non autorisé à cette candidature"
-        )
-
     return serialize_mongodb_doc(application)
 
 
 @job_router.put("/{application_id}", response_model=JobApplicationResponse)
 async def update_application(
-    background_tasks: BackgroundTasks,
     application_id: str,
     application_data: JobApplicationUpdate = Body(...),
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
-    application = await db["applications"].find_one({"_id": ObjectId(application_id)})
+    update_data = _application_fields(application_data)
 
-    if not application:
-        raise HTTPException(status_code=404, detail="Candidature non trouvée")
+    url_provided = "url" in update_data and update_data["url"]
+    description_provided = "description" in update_data and update_data["description"]
+    needs_description = False
 
-    if str(application["user_id"]) != str(current_user.id):
-        raise HTTPException(
-            status_code=403, detail="Accès non autorisé à cette candidature"
-        )
+    # URL sans description : la description en cache est attachée immédiatement
+    if url_provided and not description_provided:
+        cached = await get_cached_description(db, update_data["url"].strip())
+        if cached:
+            update_data["description"] = cached
+        else:
+            needs_description = True
 
-    raw_data = jsonable_encoder(application_data)
-    update_data = {
-        k: v
-        for k, v in raw_data.items()
-        if v is not None and (not isinstance(v, str) or v.strip() != "")
-    }
+    update_data["updated_at"] = datetime.now(timezone.utc)
 
-    if "company" in update_data and update_data["company"]:
-        update_data["company"] = capitalize_words(update_data["company"])
+    # Un seul aller-retour : la propriété est dans le filtre et le document
+    # d'avant sert à détecter un changement d'URL
+    previous, collection_name = await _applications(db, current_user).update(
+        ObjectId(application_id),
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE,
+    )
 
-    if "position" in update_data and update_data["position"]:
-        update_data["position"] = capitalize_words(update_data["position"])
+    if not previous:
+        raise HTTPException(status_code=404, detail="Candidature non trouvée")
 
-    url_provided = "url" in update_data and update_data["url"]
-    url_changed = url_provided and update_data["url"] != application.get("url", "")
-    description_provided = "description" in update_data and update_data["description"]
+    updated_application = {**previous, **update_data}
 
-    update_data["updated_at"] = datetime.now(timezone.utc)
-    await db["applications"].update_one(
-        {"_id": ObjectId(application_id)}, {"$set": update_data}
-    )
+    # URL modifiée avec une description fournie : on regénère quand même
+    # (le job lit le cache s'il connaît déjà la page)
+    if url_provided and update_data["url"] != previous.get("url", ""):
+        needs_description = True
 
-    if url_changed or (url_provided and not description_provided):
+    # Une candidature désarchivée revient dans la collection chaude
+    if collection_name == ARCHIVE_COLLECTION and update_data.get("archived") is False:
+        await restore_application(db, ObjectId(application_id))
+
+    if needs_description:
         try:
-            background_tasks.add_task(
-                _generate_description_bg,
-                ObjectId(application_id),
-                update_data["url"],
+            await enqueue_description(
                 db,
+                ObjectId(application_id),
+                update_data["url"].strip(),
+                current_user.id,
+                regenerate=True,
             )
         except Exception as e:
             logger.error(f"Failed to schedule description generation: {e}")
 
-    updated_application = await db["applications"].find_one(
-        {"_id": ObjectId(application_id)}
-    )
     return serialize_mongodb_doc(updated_application)
 
 
-@job_router.delete("/{application_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_application(
+@job_router.get(
+    "/{application_id}/description-job", response_model=DescriptionJobResponse
+)
+async def get_description_job(
     application_id: str,
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
-    application = await db["applications"].find_one({"_id": ObjectId(application_id)})
+    """État de la dernière génération de description de la candidature"""
+    application, _ = await _applications(db, current_user).get(ObjectId(application_id))
 
     if not application:
         raise HTTPException(status_code=404, detail="Candidature non trouvée")
 
-    if str(application["user_id"]) != str(current_user.id):
+    job = await get_latest_job(
+        db, ObjectId(application_id), (application.get("url") or "").strip()
+    )
+    if not job:
         raise HTTPException(
-            status_code=403, detail="Accès non autorisé à cette candidature"
+            status_code=404, detail="Aucune génération de description planifiée"
         )
 
-    await db["applications"].delete_one({"_id": ObjectId(application_id)})
-    return None
+    return serialize_mongodb_doc(job)
 
 
-@job_router.post("/{application_id}/notes", response_model=JobApplicationResponse)
-async def add_note(
+@job_router.get("/{application_id}/description/stream")
+async def stream_description(
+    request: Request,
     application_id: str,
-    note: str = Body(..., embed=True),
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
-    application = await db["applications"].find_one({"_id": ObjectId(application_id)})
+    """
+    Flux SSE de la génération de description : étapes (queued, fetching,
+    summarizing), tokens du résumé au fil de l'eau, puis done ou error.
+    Une connexion ouverte en cours de génération reçoit d'abord les
+    événements déjà publiés.
+    """
+    application, _ = await _applications(db, current_user).get(ObjectId(application_id))
 
     if not application:
         raise HTTPException(status_code=404, detail="Candidature non trouvée")
 
-    if str(application["user_id"]) != str(current_user.id):
-        raise HTTPException(
-            status_code=403, detail="Accès non autorisé à cette candidature"
-        )
+    job = await get_latest_job(
+        db, ObjectId(application_id), (application.get("url") or "").strip()
+    )
 
-    await db["applications"].update_one(
-        {"_id": ObjectId(application_id)},
-        {"$push": {"notes": note}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+    async def events():
+        if not job or job["status"] not in (PENDING, RUNNING):
+            # Rien en cours : l'état final est envoyé immédiatement
+            if application.get("description"):
+                yield _sse(
+                    "done",
+                    {
+                        "application_id": application_id,
+                        "description": application["description"],
+                    },
+                )
+            else:
+                yield _sse(
+                    "error",
+                    {
+                        "application_id": application_id,
+                        "message": (job or {}).get("last_error")
+                        or "Aucune génération de description en cours",
+                    },
+                )
+            return
+
+        yield _sse("stage", {"application_id": application_id, "stage": "queued"})
+        since = ObjectId.from_datetime(job.get("enqueued_at") or job["created_at"])
+        async for chunk in _stream_events(request, db, {"job_id": job["_id"]}, since):
+            yield chunk
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers=SSE_HEADERS
     )
 
-    updated_application = await db["applications"].find_one(
-        {"_id": ObjectId(application_id)}
+
+@job_router.delete("/{application_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_application(
+    application_id: str,
+    db=Depends(get_database),
+    current_user: UserModel = Depends(get_current_user),
+):
+    if not await _applications(db, current_user).delete(ObjectId(application_id)):
+        raise HTTPException(status_code=404, detail="Candidature non trouvée")
+    return None
+
+
+@job_router.post("/{application_id}/notes", response_model=JobApplicationResponse)
+async def add_note(
+    application_id: str,
+    note: str = Body(..., embed=True),
+    db=Depends(get_database),
+    current_user: UserModel = Depends(get_current_user),
+):
+    updated_application, _ = await _applications(db, current_user).update(
+        ObjectId(application_id),
+        {"$push": {"notes": note}, "$set": {"updated_at": datetime.now(timezone.utc)}},
     )
 
+    if not updated_application:
+        raise HTTPException(status_code=404, detail="Candidature non trouvée")
+
     return serialize_mongodb_doc(updated_application)
@@ -14,10 +14,11 @@ from ..auth import (
     create_access_token,
     create_refresh_token,
     get_current_user,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
 )
 from ..database import get_database
+from ..services.principal_cache import invalidate_principal
 from ..models import UserCreate, UserResponse, UserModel
 from ..utils import serialize_mongodb_doc
 
@@ -43,7 +44,12 @@ async def login_for_access_token(
         }
     )
 
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    valid, new_hash = (
+        await verify_password_async(form_data.password, user["hashed_password"])
+        if user
+        else (False, None)
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Nom d'utilisateur ou mot de passe incorrect",
@@ -75,6 +81,15 @@ async def login_for_access_token(
         {"_id": user["_id"]}, {"$set": {"last_login": datetime.now(timezone.utc)}}
     )
 
+    # Hash produit avec un autre coût bcrypt : remplacé de façon transparente,
+    # sauf si le mot de passe a changé entre-temps
+    if new_hash:
+        await db["users"].update_one(
+            {"_id": user["_id"], "hashed_password": user["hashed_password"]},
+            {"$set": {"hashed_password": new_hash}},
+        )
+        await invalidate_principal(db, user["_id"])
+
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -106,14 +121,17 @@ async def change_password(
     current_user: UserModel = Depends(get_current_user),
 ):
     # Vérifier le mot de passe actuel
-    if not verify_password(current_password, current_user.hashed_password):
+    valid, _ = await verify_password_async(
+        current_password, current_user.hashed_password
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Mot de passe actuel incorrect",
         )
 
     # Hasher le nouveau mot de passe
-    hashed_password = get_password_hash(new_password)
+    hashed_password = await get_password_hash_async(new_password)
 
     # Mettre à jour le mot de passe
     await db["users"].update_one(
@@ -126,6 +144,8 @@ async def change_password(
         },
     )
 
+    await invalidate_principal(db, current_user.id)
+
     # Récupérer l'utilisateur mis à jour
     updated_user = await db["users"].find_one({"_id": ObjectId(current_user.id)})
 
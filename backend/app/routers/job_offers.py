@@ -1,111 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Optional
 from bson import ObjectId
-import re
 
 from ..models import JobOfferResponse
 from ..database import get_database
+from ..pagination import (
+    decode_offset_cursor,
+    encode_offset_cursor,
+    fetch_page,
+    keyset_filter,
+    NEXT_CURSOR_HEADER,
+)
+from ..projections import OFFER_LIST_PROJECTION
+from ..services.offer_query import compile_offer_query
+from ..services.offer_stats import get_stats_summary
 
 job_offers_router = APIRouter(prefix="/job-offers", tags=["job-offers"])
 
 
-# Fonctions utilitaires pour le formatage
-def normalize_city(city: str) -> str:
-    """Normalise les noms de villes pour éviter les doublons"""
-    if not city:
-        return "Non spécifié"
-
-    # Supprimer les codes postaux complets (ex: "44000 Nantes" -> "Nantes")
-    city = re.sub(r"^\d{5}\s+", "", city)
-
-    # Supprimer les codes postaux avec tiret (ex: "Nantes - 44" -> "Nantes")
-    city = re.sub(r"\s*-\s*\d+.*$", "", city)
-
-    # Supprimer les arrondissements avec tiret (ex: "Lyon - 01" -> "Lyon")
-    city = re.sub(r"\s*-\s*\d{2}$", "", city)
-
-    # Supprimer les arrondissements avec espace (ex: "LYON 01" -> "LYON")
-    city = re.sub(r"\s+\d{2}$", "", city)
-
-    # Supprimer les arrondissements avec "er", "ème", etc. (ex: "Lyon 1er" -> "Lyon")
-    city = re.sub(r"\s+\d{1,2}(er|ème|e)?$", "", city, flags=re.IGNORECASE)
-
-    # Supprimer les parenthèses et leur contenu (ex: "Lyon (Rhône)" -> "Lyon")
-    city = re.sub(r"\s*\([^)]*\)", "", city)
-
-    # Nettoyer les espaces multiples
-    city = re.sub(r"\s+", " ", city.strip())
-
-    # Capitaliser correctement (première lettre de chaque mot en majuscule)
-    return city.title() if city else "Non spécifié"
-
-
-def normalize_company(company: str) -> str:
-    """Normalise les noms d'entreprises pour éviter les doublons"""
-    if not company:
-        return "Non spécifié"
-
-    # Convertir en majuscules pour comparaison
-    normalized = company.upper()
-
-    # Supprimer les suffixes courants
-    suffixes = [" SAS", " SA", " SARL", " EURL", " SNC", " SCOP", " SASU", " SCIC"]
-    for suffix in suffixes:
-        if normalized.endswith(suffix):
-            normalized = normalized[: -len(suffix)]
-            break
-
-    # Nettoyer les espaces multiples
-    normalized = re.sub(r"\s+", " ", normalized.strip())
-
-    return normalized if normalized else "Non spécifié"
-
-
-def extract_domain(url: str) -> str:
-    """Extrait et normalise le domaine d'une URL"""
-    if not url:
-        return "Non spécifié"
-
-    # Extraire le domaine
-    if "://" in url:
-        domain = url.split("://")[1].split("/")[0]
-    else:
-        domain = url.split("/")[0]
-
-    # Supprimer www.
-    if domain.startswith("www."):
-        domain = domain[4:]
-
-    return domain.lower()
-
-
 @job_offers_router.get("/", response_model=List[JobOfferResponse])
 async def get_job_offers(
+    response: Response,
     keywords: Optional[str] = Query(None, description="Mots-clés à rechercher"),
     location: Optional[str] = Query(None, description="Localisation"),
     company: Optional[str] = Query(None, description="Entreprise"),
-    limit: int = Query(50, le=100),
-    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    skip: int = Query(0, ge=0, description="Obsolète : préférer cursor"),
+    cursor: Optional[str] = Query(
+        None, description="Jeton de page suivante (en-tête X-Next-Cursor)"
+    ),
     db=Depends(get_database),
 ):
-    """Récupère les offres d'emploi avec filtres optionnels"""
-    query_filter = {}
-
-    if keywords:
-        query_filter["poste"] = {"$regex": keywords, "$options": "i"}
-    if location:
-        query_filter["localisation"] = {"$regex": location, "$options": "i"}
-    if company:
-        query_filter["entreprise"] = {"$regex": company, "$options": "i"}
-
-    cursor = (
-        db["job_offers"]
-        .find(query_filter)
-        .skip(skip)
-        .limit(limit)
-        .sort("created_at", -1)
-    )
-    offers = await cursor.to_list(length=limit)
+    """
+    Récupère les offres d'emploi avec filtres optionnels.
+    Les mots-clés passent par l'index texte (tri par pertinence), l'entreprise
+    et la ville par un préfixe sur les clés normalisées.
+    La pagination se fait par curseur (created_at, _id) ; `skip` reste accepté
+    pour compatibilité mais son coût croît avec la profondeur.
+    Seuls les champs de JobOfferResponse sont lus (pas de raw_data).
+    """
+    compiled = compile_offer_query(keywords, location, company)
+    query_filter = compiled.filter
+
+    if compiled.text_search:
+        # Tri par pertinence : pagination par position dans le classement
+        offset = decode_offset_cursor(cursor) if cursor else skip
+        offers = (
+            await db["job_offers"]
+            .find(query_filter, OFFER_LIST_PROJECTION)
+            .sort([("score", {"$meta": "textScore"}), ("created_at", -1), ("_id", -1)])
+            .skip(offset)
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+        if len(offers) > limit:
+            offers = offers[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_offset_cursor(offset + limit)
+    elif cursor or not skip:
+        page_filter = keyset_filter("created_at", cursor)
+        if page_filter:
+            query_filter = {"$and": [query_filter, page_filter]}
+        offers = await fetch_page(
+            db["job_offers"],
+            query_filter,
+            "created_at",
+            limit,
+            response,
+            OFFER_LIST_PROJECTION,
+        )
+    else:
+        offers = (
+            await db["job_offers"]
+            .find(query_filter, OFFER_LIST_PROJECTION)
+            .sort([("created_at", -1), ("_id", -1)])
+            .skip(skip)
+            .limit(limit)
+            .to_list(length=limit)
+        )
 
     for offer in offers:
         offer["id"] = str(offer["_id"])
@@ -144,112 +115,11 @@ async def delete_job_offer(offer_id: str, db=Depends(get_database)):
 
 @job_offers_router.get("/stats/summary")
 async def get_offers_stats(db=Depends(get_database)):
-    """Récupère les statistiques des offres d'emploi"""
-
-    # Total des offres
-    total_offers = await db["job_offers"].count_documents({})
-
-    # TOP WEBSITES - Pipeline simplifié
-    website_pipeline = [
-        {
-            "$addFields": {
-                "normalized_site": {
-                    "$toLower": {
-                        "$let": {
-                            "vars": {
-                                "domain": {
-                                    "$arrayElemAt": [
-                                        {
-                                            "$split": [
-                                                {
-                                                    "$arrayElemAt": [
-                                                        {"$split": ["$url", "://"]},
-                                                        1,
-                                                    ]
-                                                },
-                                                "/",
-                                            ]
-                                        },
-                                        0,
-                                    ]
-                                }
-                            },
-                            "in": {
-                                "$cond": {
-                                    "if": {
-                                        "$regexMatch": {
-                                            "input": "$$domain",
-                                            "regex": "^www\\.",
-                                        }
-                                    },
-                                    "then": {"$substr": ["$$domain", 4, -1]},
-                                    "else": "$$domain",
-                                }
-                            },
-                        }
-                    }
-                }
-            }
-        },
-        {"$match": {"normalized_site": {"$nin": [None, ""]}}},
-        {"$group": {"_id": "$normalized_site", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 10},
-    ]
-
-    # TOP COMPANIES - Traitement côté Python
-    # Récupérer toutes les entreprises
-    companies_cursor = db["job_offers"].find(
-        {"entreprise": {"$exists": True, "$nin": [None, ""]}}, {"entreprise": 1}
-    )
-    companies_data = await companies_cursor.to_list(length=None)
-
-    # Normaliser côté Python
-    company_counts = {}
-    for doc in companies_data:
-        if doc.get("entreprise"):
-            normalized = normalize_company(doc["entreprise"])
-            company_counts[normalized] = company_counts.get(normalized, 0) + 1
-
-    # Trier et limiter
-    top_companies = [
-        {"_id": company, "count": count}
-        for company, count in sorted(
-            company_counts.items(), key=lambda x: x[1], reverse=True
-        )[:10]
-    ]
-
-    # TOP CITIES - Traitement côté Python
-    # Récupérer toutes les localisations
-    cities_cursor = db["job_offers"].find(
-        {"localisation": {"$exists": True, "$nin": [None, ""]}}, {"localisation": 1}
-    )
-    cities_data = await cities_cursor.to_list(length=None)
-
-    # Normaliser côté Python
-    city_counts = {}
-    for doc in cities_data:
-        if doc.get("localisation"):
-            normalized = normalize_city(doc["localisation"])
-            city_counts[normalized] = city_counts.get(normalized, 0) + 1
-
-    # Trier et limiter
-    top_cities = [
-        {"_id": city, "count": count}
-        for city, count in sorted(
-            city_counts.items(), key=lambda x: x[1], reverse=True
-        )[:10]
-    ]
-
-    # Exécuter le pipeline pour les websites
-    top_websites = await db["job_offers"].aggregate(website_pipeline).to_list(length=10)
-
-    return {
-        "total_offers": total_offers,
-        "top_websites": top_websites,
-        "top_companies": top_companies,
-        "top_cities": top_cities,
-    }
+    """
+    Récupère les statistiques des offres d'emploi.
+    Lecture des top-k dans le rollup offer_stats, maintenu à l'ingestion.
+    """
+    return await get_stats_summary(db)
 
 
 @job_offers_router.get("/count/")
@@ -261,20 +131,7 @@ async def count_job_offers(
 ):
     """Compter le nombre total d'offres d'emploi avec filtres"""
     try:
-        filter_dict = {}
-
-        # Construction des filtres de recherche
-        if keywords:
-            filter_dict["$or"] = [
-                {"poste": {"$regex": keywords, "$options": "i"}},
-                {"entreprise": {"$regex": keywords, "$options": "i"}},
-            ]
-
-        if location:
-            filter_dict["localisation"] = {"$regex": location, "$options": "i"}
-
-        if company:
-            filter_dict["entreprise"] = {"$regex": company, "$options": "i"}
+        filter_dict = compile_offer_query(keywords, location, company).filter
 
         # Compter les documents
         total = await db["job_offers"].count_documents(filter_dict)
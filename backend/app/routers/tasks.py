@@ -2,15 +2,34 @@ from fastapi import APIRouter, Body, Depends, status, HTTPException
 from typing import List
 from bson import ObjectId
 from datetime import datetime, timezone
-
-from ..models import Task, TaskCreate, TaskUpdate, UserModel
+from pydantic import ValidationError
+
+from ..models import (
+    BulkAction,
+    BulkRequest,
+    BulkResponse,
+    Task,
+    TaskCreate,
+    TaskUpdate,
+    UserModel,
+)
 from ..database import get_database
 from ..utils import serialize_mongodb_doc
 from ..auth import get_current_user
+from ..services.owned_documents import (
+    BULK_INVALID,
+    OwnedDocuments,
+    bulk_object_id,
+    bulk_results,
+)
 
 task_router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
+def _tasks(db, current_user: UserModel) -> OwnedDocuments:
+    return OwnedDocuments(db, ["tasks"], current_user.id)
+
+
 @task_router.get("/", response_model=List[Task])
 async def get_tasks(
     db=Depends(get_database),
@@ -33,17 +52,59 @@ async def get_tasks(
     return [serialize_mongodb_doc(task) for task in tasks]
 
 
+@task_router.post("/bulk", response_model=BulkResponse)
+async def bulk_tasks(
+    payload: BulkRequest = Body(...),
+    db=Depends(get_database),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """
+    Lot de créations, modifications (ex. statut de plusieurs tâches),
+    archivages et suppressions en un seul bulk_write.
+    """
+    now = datetime.now(timezone.utc)
+    items = []
+    for index, operation in enumerate(payload.operations):
+        item = {"index": index, "action": operation.action}
+        try:
+            if operation.action == BulkAction.CREATE:
+                task = TaskCreate.model_validate(operation.data or {})
+                item["document"] = {
+                    **task.model_dump(),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            else:
+                item["id"] = bulk_object_id(operation.id)
+                if operation.action == BulkAction.UPDATE:
+                    changes = TaskUpdate.model_validate(operation.data or {})
+                    update_data = {
+                        k: v
+                        for k, v in changes.model_dump(exclude_unset=True).items()
+                        if v is not None
+                    }
+                    update_data["updated_at"] = now
+                    item["update"] = {"$set": update_data}
+                elif operation.action == BulkAction.ARCHIVE:
+                    item["update"] = {"$set": {"archived": True, "updated_at": now}}
+        except (ValidationError, ValueError) as e:
+            item["status"] = BULK_INVALID
+            item["error"] = str(e)
+        items.append(item)
+
+    await _tasks(db, current_user).bulk(items)
+    return bulk_results(items)
+
+
 @task_router.get("/{task_id}", response_model=Task)
 async def get_task(
     task_id: str,
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
-    task = await db["tasks"].find_one({"_id": ObjectId(task_id)})
+    task, _ = await _tasks(db, current_user).get(ObjectId(task_id))
     if not task:
         raise HTTPException(status_code=404, detail="Tâche non trouvée")
-    if str(task["user_id"]) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Accès non autorisé à cette tâche")
     return serialize_mongodb_doc(task)
 
 
@@ -54,12 +115,10 @@ async def create_task(
     current_user: UserModel = Depends(get_current_user),
 ):
     task_data = task.model_dump()
-    task_data["user_id"] = current_user.id
     task_data["created_at"] = datetime.now(timezone.utc)
     task_data["updated_at"] = datetime.now(timezone.utc)
 
-    result = await db["tasks"].insert_one(task_data)
-    created_task = await db["tasks"].find_one({"_id": result.inserted_id})
+    created_task = await _tasks(db, current_user).insert(task_data)
 
     return serialize_mongodb_doc(created_task)
 
@@ -71,18 +130,15 @@ async def update_task(
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
-    task = await db["tasks"].find_one({"_id": ObjectId(task_id)})
-    if not task:
-        raise HTTPException(status_code=404, detail="Tâche non trouvée")
-    if str(task["user_id"]) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Accès non autorisé à cette tâche")
-
     update_dict = task_update.model_dump(exclude_unset=True)
     update_data = {k: v for k, v in update_dict.items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc)
 
-    await db["tasks"].update_one({"_id": ObjectId(task_id)}, {"$set": update_data})
-    updated_task = await db["tasks"].find_one({"_id": ObjectId(task_id)})
+    updated_task, _ = await _tasks(db, current_user).update(
+        ObjectId(task_id), {"$set": update_data}
+    )
+    if not updated_task:
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
     return serialize_mongodb_doc(updated_task)
 
 
@@ -92,10 +148,6 @@ async def delete_task(
     db=Depends(get_database),
     current_user: UserModel = Depends(get_current_user),
 ):
-    task = await db["tasks"].find_one({"_id": ObjectId(task_id)})
-    if not task:
+    if not await _tasks(db, current_user).delete(ObjectId(task_id)):
         raise HTTPException(status_code=404, detail="Tâche non trouvée")
-    if str(task["user_id"]) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="Accès non autorisé à cette tâche")
-    await db["tasks"].delete_one({"_id": ObjectId(task_id)})
     return None
@@ -8,7 +8,8 @@ from uuid import uuid4
 from ..models import UserCreate, UserResponse, UserModel
 from ..database import get_database
 from ..utils import serialize_mongodb_doc
-from ..auth import get_current_user, get_password_hash
+from ..auth import get_current_user, get_password_hash_async
+from ..services.principal_cache import invalidate_principal
 
 UPLOAD_DIR = "app/uploads"
 
@@ -38,6 +39,7 @@ async def upload_cv(
 
     url = f"/uploads/{filename}"
     await db["users"].update_one({"_id": current_user.id}, {"$set": {"cv_url": url}})
+    await invalidate_principal(db, current_user.id)
 
     return {"cv_url": url}
 
@@ -52,7 +54,7 @@ async def create_user(user: UserCreate = Body(...), db=Depends(get_database)):
             detail="Un utilisateur avec cet email ou ce nom d'utilisateur existe déjà",
         )
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
 
     user_data = {
         "username": user.username,
@@ -122,6 +124,9 @@ async def update_user(
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
+    # Profil ou désactivation : le cache d'authentification doit relire l'utilisateur
+    await invalidate_principal(db, user_id)
+
     updated_user = await db["users"].find_one({"_id": ObjectId(user_id)})
     return serialize_mongodb_doc(updated_user)
 
@@ -140,5 +145,6 @@ async def delete_user(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
+    await invalidate_principal(db, user_id)
     await db["applications"].delete_many({"user_id": ObjectId(user_id)})
     return None
@@ -0,0 +1,91 @@
+"""
+Séparation chaud / froid des candidatures.
+
+Les candidatures archivées sont déplacées de `applications` vers
+`applications_archive` par lots : la collection chaude et ses index ne
+contiennent que les candidatures actives. Les routes restent transparentes
+(voir find_application et l'option include_archived de GET /applications).
+"""
+
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.bulk_writes import BULK_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+HOT_COLLECTION = "applications"
+ARCHIVE_COLLECTION = "applications_archive"
+
+# "move" : les candidatures archivées partent dans applications_archive
+# "flag" : elles restent dans applications avec archived=True
+ARCHIVE_MODE = os.getenv("ARCHIVE_MODE", "move")
+
+
+async def _move(db, source: str, target: str, ids: list) -> int:
+    """
+    Copie côté serveur ($merge, idempotent) puis supprime de la source.
+    Une interruption entre les deux étapes est rattrapée au passage suivant.
+    """
+    await db[source].aggregate(
+        [
+            {"$match": {"_id": {"$in": ids}}},
+            {"$merge": {"into": target, "on": "_id", "whenMatched": "replace"}},
+        ]
+    ).to_list(length=None)
+    result = await db[source].delete_many({"_id": {"$in": ids}})
+    return result.deleted_count
+
+
+async def move_archived_applications(db, batch_size: int = BULK_BATCH_SIZE) -> int:
+    """
+    Déplace toutes les candidatures marquées archived=True vers
+    applications_archive, par lots de `batch_size`.
+
+    Returns:
+        Nombre de candidatures déplacées
+    """
+    moved = 0
+    while True:
+        ids = [
+            doc["_id"]
+            async for doc in db[HOT_COLLECTION]
+            .find({"archived": True}, {"_id": 1})
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        moved += await _move(db, HOT_COLLECTION, ARCHIVE_COLLECTION, ids)
+
+    if moved:
+        logger.info(f"📦 {moved} candidatures déplacées vers {ARCHIVE_COLLECTION}")
+    return moved
+
+
+async def restore_application(db, application_id) -> bool:
+    """Ramène une candidature désarchivée dans la collection chaude"""
+    return await restore_applications(db, [application_id]) > 0
+
+
+async def restore_applications(db, ids: list) -> int:
+    """Ramène des candidatures désarchivées dans la collection chaude (un $merge)"""
+    if not ids:
+        return 0
+    return await _move(db, ARCHIVE_COLLECTION, HOT_COLLECTION, ids)
+
+
+async def find_application(
+    db, query: Dict[str, Any]
+) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Cherche une candidature dans la collection chaude puis dans l'archive.
+
+    Returns:
+        (document, nom de la collection qui le contient) ou (None, None)
+    """
+    for collection_name in (HOT_COLLECTION, ARCHIVE_COLLECTION):
+        document = await db[collection_name].find_one(query)
+        if document:
+            return document, collection_name
+    return None, None
@@ -0,0 +1,73 @@
+import logging
+import os
+from typing import Any, Dict, List
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Taille par défaut des lots envoyés à bulk_write
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+
+
+def _empty_report() -> Dict[str, Any]:
+    return {
+        "inserted": 0,
+        "upserted": 0,
+        "matched": 0,
+        "modified": 0,
+        "deleted": 0,
+        "upserted_ids": {},
+        "errors": [],
+    }
+
+
+async def bulk_write_in_batches(
+    collection, operations: List[Any], batch_size: int = BULK_BATCH_SIZE
+) -> Dict[str, Any]:
+    """
+    Exécute des opérations (InsertOne, UpdateOne, DeleteMany...) par lots
+    non ordonnés : une erreur sur un élément n'interrompt pas le reste du lot.
+
+    Args:
+        collection: collection motor cible
+        operations: liste d'opérations pymongo
+        batch_size: nombre d'opérations par appel à bulk_write
+
+    Returns:
+        Dict avec les compteurs cumulés, les ids upsertés (indexés par position
+        dans `operations`) et la liste des erreurs par élément
+    """
+    report = _empty_report()
+
+    for offset in range(0, len(operations), batch_size):
+        batch = operations[offset : offset + batch_size]
+
+        try:
+            result = await collection.bulk_write(batch, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get("writeErrors", []):
+                report["errors"].append(
+                    {
+                        "index": offset + error["index"],
+                        "code": error.get("code"),
+                        "message": error.get("errmsg"),
+                    }
+                )
+
+        report["inserted"] += details.get("nInserted", 0)
+        report["upserted"] += details.get("nUpserted", 0)
+        report["matched"] += details.get("nMatched", 0)
+        report["modified"] += details.get("nModified", 0)
+        report["deleted"] += details.get("nRemoved", 0)
+        for upserted in details.get("upserted", []):
+            report["upserted_ids"][offset + upserted["index"]] = upserted["_id"]
+
+    if report["errors"]:
+        logger.warning(
+            f"⚠️ {len(report['errors'])} erreurs sur {len(operations)} opérations groupées"
+        )
+
+    return report
@@ -0,0 +1,27 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Points de reprise des traitements longs (backfills, migrations)
+CHECKPOINTS_COLLECTION = "job_checkpoints"
+
+
+async def load_checkpoint(db, name: str) -> Optional[dict]:
+    """Retourne l'état sauvegardé d'un traitement, ou None s'il n'y en a pas"""
+    return await db[CHECKPOINTS_COLLECTION].find_one({"_id": name})
+
+
+async def save_checkpoint(db, name: str, **state: Any) -> None:
+    """Enregistre la progression d'un traitement (écrase l'état précédent)"""
+    await db[CHECKPOINTS_COLLECTION].update_one(
+        {"_id": name},
+        {"$set": {**state, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+async def clear_checkpoint(db, name: str) -> None:
+    """Supprime le point de reprise d'un traitement terminé"""
+    await db[CHECKPOINTS_COLLECTION].delete_one({"_id": name})
@@ -0,0 +1,166 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.utils import canonicalize_url, url_hash
+
+logger = logging.getLogger(__name__)
+
+# Fenêtre pendant laquelle une URL déjà crawlée n'est pas re-crawlée
+CRAWL_FRESHNESS_HOURS = float(os.getenv("CRAWL_FRESHNESS_HOURS", "24"))
+# Attente après un échec, doublée à chaque échec consécutif (plafonnée par
+# la fenêtre de fraîcheur)
+CRAWL_FAILURE_BACKOFF_MINUTES = float(os.getenv("CRAWL_FAILURE_BACKOFF_MINUTES", "30"))
+
+# Seul un crawl réussi rend une URL fraîche
+CRAWL_SUCCESS = "success"
+
+
+class CrawlLedger:
+    """
+    Registre des crawls (collection `crawl_ledger`) indexé par URL canonique.
+
+    Pour chaque URL on conserve la date du dernier crawl réussi, le hash du
+    contenu, le nombre d'offres trouvées, la latence et les tokens LLM
+    consommés. Les échecs sont notés à part (last_failed_at,
+    consecutive_failures) : une URL en échec est retentée après un délai
+    court et croissant, pas après toute la fenêtre de fraîcheur.
+    Le registre sert à ignorer les URLs crawlées récemment et à prioriser
+    celles qui rapportent le plus d'offres par token.
+    """
+
+    def __init__(
+        self,
+        db,
+        freshness_hours: float = CRAWL_FRESHNESS_HOURS,
+        failure_backoff_minutes: float = CRAWL_FAILURE_BACKOFF_MINUTES,
+    ):
+        self.collection = db["crawl_ledger"]
+        self.freshness = timedelta(hours=freshness_hours)
+        self.failure_backoff = timedelta(minutes=failure_backoff_minutes)
+
+    def _retry_at(self, entry) -> Optional[datetime]:
+        """Date avant laquelle l'URL n'est pas re-crawlée (None : à crawler)"""
+        if not entry:
+            return None
+        dates = []
+        last_crawled_at = entry.get("last_crawled_at")
+        if last_crawled_at:
+            dates.append(last_crawled_at.replace(tzinfo=timezone.utc) + self.freshness)
+        last_failed_at = entry.get("last_failed_at")
+        if last_failed_at:
+            failures = max(entry.get("consecutive_failures", 1), 1)
+            backoff = min(self.failure_backoff * 2 ** (failures - 1), self.freshness)
+            dates.append(last_failed_at.replace(tzinfo=timezone.utc) + backoff)
+        return max(dates) if dates else None
+
+    async def plan(self, urls: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Sépare les URLs à crawler de celles encore fraîches.
+
+        Returns:
+            (urls à crawler triées par rendement décroissant, urls ignorées)
+        """
+        keys = {}
+        for url in urls:
+            key = url_hash(url)
+            if key and key not in keys:
+                keys[key] = url
+
+        entries = await self.collection.find(
+            {"_id": {"$in": list(keys)}},
+            {
+                "last_crawled_at": 1,
+                "last_failed_at": 1,
+                "consecutive_failures": 1,
+                "total_offers": 1,
+                "total_tokens": 1,
+            },
+        ).to_list(length=None)
+        history = {entry["_id"]: entry for entry in entries}
+
+        now = datetime.now(timezone.utc)
+        to_crawl, skipped = [], []
+
+        for key, url in keys.items():
+            entry = history.get(key)
+            retry_at = self._retry_at(entry)
+            if retry_at and retry_at > now:
+                skipped.append(url)
+            else:
+                to_crawl.append((self._score(entry), url))
+
+        # Les URLs jamais vues passent en premier, puis rendement offres/token
+        to_crawl.sort(key=lambda item: item[0], reverse=True)
+
+        if skipped:
+            logger.info(
+                f"⏭️ {len(skipped)} URLs ignorées (crawlées récemment ou en échec)"
+            )
+
+        return [url for _, url in to_crawl], skipped
+
+    @staticmethod
+    def _score(entry) -> float:
+        if not entry:
+            return float("inf")
+        return entry.get("total_offers", 0) / max(entry.get("total_tokens", 0), 1)
+
+    async def record_many(self, results: List[Dict[str, Any]]) -> None:
+        """Enregistre le résultat de chaque crawl en une seule écriture groupée"""
+        now = datetime.now(timezone.utc)
+        operations = []
+
+        for result in results:
+            key = url_hash(result.get("url"))
+            if not key:
+                continue
+
+            offers_count = result.get("offers_count", 0)
+            tokens = result.get("tokens", 0)
+
+            fields = {
+                "url": canonicalize_url(result["url"]),
+                "last_status": result.get("status"),
+                "last_latency_ms": result.get("latency_ms"),
+                "last_tokens": tokens,
+            }
+            increments = {"crawls": 1, "total_tokens": tokens}
+
+            if result.get("status") == CRAWL_SUCCESS:
+                update = {
+                    "$set": {
+                        **fields,
+                        "last_crawled_at": now,
+                        "content_hash": result.get("content_hash"),
+                        "last_offers": offers_count,
+                        "consecutive_failures": 0,
+                    },
+                    "$unset": {"last_failed_at": "", "last_error": ""},
+                    "$inc": {**increments, "total_offers": offers_count},
+                }
+            else:
+                # Échec (timeout, page vide...) : l'URL garde son dernier
+                # crawl réussi et sera retentée après un court délai
+                update = {
+                    "$set": {
+                        **fields,
+                        "last_failed_at": now,
+                        "last_error": result.get("error"),
+                    },
+                    "$inc": {**increments, "failures": 1, "consecutive_failures": 1},
+                }
+
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+
+        if not operations:
+            return
+
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Le registre est un cache d'optimisation : ne jamais faire échouer la collecte
+            logger.error(f"💥 Erreur mise à jour du registre de crawl: {e}")
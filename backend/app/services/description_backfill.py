@@ -0,0 +1,242 @@
+"""
+Génération en masse des descriptions de candidatures manquantes.
+
+Les candidatures avec URL mais sans description sont lues par lots (ordre
+_id), regroupées par URL canonique et servies par le cache job_descriptions
+quand la page a déjà été résumée ; les autres sont traitées en parallèle sur
+un pool de navigateurs. Chaque lot terminé fait avancer un point de reprise ;
+les échecs sont enregistrés par URL dans `description_backfill_errors` sans
+interrompre le traitement. Les appels LLM passent par le régulateur global
+en priorité basse ; un budget de tokens / coût épuisé (ou le disjoncteur
+ouvert) arrête le passage sans avancer le point de reprise.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateMany
+
+from app.llm.governor import LLMBudgetExceeded, LLMCircuitOpen, llm_budget
+from app.services.bulk_writes import bulk_write_in_batches
+from app.services.checkpoints import clear_checkpoint, load_checkpoint, save_checkpoint
+from app.services.description_cache import (
+    generate_description,
+    get_cached_description,
+    store_description,
+)
+from app.utils import url_hash
+from job_crawler.crawler1 import CrawlerPool
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_CONCURRENCY = int(os.getenv("DESCRIPTION_BACKFILL_CONCURRENCY", "3"))
+BACKFILL_BATCH_SIZE = int(os.getenv("DESCRIPTION_BACKFILL_BATCH_SIZE", "50"))
+BACKFILL_CHECKPOINT = "description_backfill"
+ERRORS_COLLECTION = "description_backfill_errors"
+
+# Candidatures à compléter
+PENDING_QUERY = {
+    "url": {"$exists": True, "$nin": [None, ""]},
+    "$or": [
+        {"description": {"$exists": False}},
+        {"description": None},
+        {"description": ""},
+    ],
+}
+
+
+async def _record_error(db, key: str, url: str, ids: List[Any], error: Exception):
+    await db[ERRORS_COLLECTION].update_one(
+        {"_id": key},
+        {
+            "$set": {
+                "url": url,
+                "application_ids": ids,
+                "code": getattr(error, "code", "exception"),
+                "error": str(error),
+                "last_error_at": datetime.now(timezone.utc),
+            },
+            "$inc": {"attempts": 1},
+        },
+        upsert=True,
+    )
+
+
+class DescriptionBackfill:
+    """
+    Moteur de backfill des descriptions.
+
+    Args:
+        db: base de données motor
+        concurrency: nombre de pages traitées en parallèle (taille du pool)
+        batch_size: nombre de candidatures lues par lot
+        retry_failed: retente les URLs déjà en échec
+        max_tokens: budget de tokens LLM du passage (None : illimité)
+        max_cost: budget en dollars du passage (None : illimité)
+    """
+
+    def __init__(
+        self,
+        db,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        batch_size: int = BACKFILL_BATCH_SIZE,
+        retry_failed: bool = False,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+    ):
+        self.db = db
+        self.collection = db["applications"]
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size
+        self.retry_failed = retry_failed
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        # Raison de l'arrêt anticipé (budget, disjoncteur)
+        self.interrupted: Optional[str] = None
+        self.stats = {
+            "applications": 0,
+            "updated": 0,
+            "urls_crawled": 0,
+            "urls_reused": 0,
+            "failed_urls": 0,
+            "skipped": 0,
+        }
+
+    async def _pending_batch(self, last_id) -> List[dict]:
+        query = dict(PENDING_QUERY)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        return (
+            await self.collection.find(query, {"url": 1})
+            .sort("_id", 1)
+            .limit(self.batch_size)
+            .to_list(length=self.batch_size)
+        )
+
+    async def _failed_keys(self, keys: List[str]) -> set:
+        if self.retry_failed or not keys:
+            return set()
+        cursor = self.db[ERRORS_COLLECTION].find({"_id": {"$in": keys}}, {"_id": 1})
+        return {doc["_id"] async for doc in cursor}
+
+    async def _summarize(self, pool, key: str, url: str, ids: List[Any]):
+        """Description d'une URL (cache, sinon crawl + résumé), ou None si échec"""
+        cached = await get_cached_description(self.db, url)
+        if cached:
+            self.stats["urls_reused"] += 1
+            return cached
+
+        try:
+            async with pool.crawler() as crawler:
+                markdown, description = await generate_description(url, crawler)
+            await store_description(self.db, url, markdown, description)
+        except (LLMBudgetExceeded, LLMCircuitOpen) as e:
+            # Ni l'URL ni la page ne sont en cause : pas d'entrée d'erreur
+            self.interrupted = str(e)
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Description impossible pour {url}: {e}")
+            self.stats["failed_urls"] += 1
+            await _record_error(self.db, key, url, ids, e)
+            return None
+
+        self.stats["urls_crawled"] += 1
+        if self.retry_failed:
+            await self.db[ERRORS_COLLECTION].delete_one({"_id": key})
+        return description
+
+    async def _process_batch(self, pool, applications: List[dict]) -> None:
+        groups: Dict[str, Dict[str, Any]] = {}
+        for application in applications:
+            key = url_hash(application["url"])
+            if not key:
+                self.stats["skipped"] += 1
+                continue
+            group = groups.setdefault(key, {"url": application["url"], "ids": []})
+            group["ids"].append(application["_id"])
+
+        failed = await self._failed_keys(list(groups))
+        self.stats["skipped"] += sum(len(groups[key]["ids"]) for key in failed)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(key: str, group: Dict[str, Any]):
+            async with semaphore:
+                return key, await self._summarize(pool, key, group["url"], group["ids"])
+
+        results = await asyncio.gather(
+            *(run(key, group) for key, group in groups.items() if key not in failed)
+        )
+
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateMany(
+                {"_id": {"$in": groups[key]["ids"]}, **PENDING_QUERY},
+                {"$set": {"description": description, "updated_at": now}},
+            )
+            for key, description in results
+            if description
+        ]
+        if operations:
+            report = await bulk_write_in_batches(self.collection, operations)
+            self.stats["updated"] += report["modified"]
+
+    async def run(self, restart: bool = False) -> Dict[str, Any]:
+        """
+        Traite toutes les candidatures sans description.
+
+        Args:
+            restart: ignore le point de reprise et repart du début
+
+        Returns:
+            Compteurs et débit du passage
+        """
+        started = time.monotonic()
+        checkpoint = (
+            None if restart else await load_checkpoint(self.db, BACKFILL_CHECKPOINT)
+        )
+        last_id = checkpoint.get("last_id") if checkpoint else None
+        if last_id is not None:
+            logger.info(f"⏩ Reprise du backfill après {last_id}")
+
+        with llm_budget("backfill des descriptions", self.max_tokens, self.max_cost):
+            async with CrawlerPool(size=self.concurrency) as pool:
+                while True:
+                    applications = await self._pending_batch(last_id)
+                    if not applications:
+                        break
+
+                    await self._process_batch(pool, applications)
+                    if self.interrupted:
+                        # Le lot est incomplet : la reprise repartira de ce lot
+                        logger.warning(f"🛑 Backfill interrompu: {self.interrupted}")
+                        break
+                    self.stats["applications"] += len(applications)
+
+                    last_id = applications[-1]["_id"]
+                    await save_checkpoint(
+                        self.db, BACKFILL_CHECKPOINT, last_id=last_id, stats=self.stats
+                    )
+                    logger.info(f"📦 Backfill: {self.stats}")
+
+        if not self.interrupted:
+            await clear_checkpoint(self.db, BACKFILL_CHECKPOINT)
+
+        duration = time.monotonic() - started
+        report = {
+            **self.stats,
+            "interrupted": self.interrupted,
+            "duration_seconds": round(duration, 2),
+            "applications_per_minute": (
+                round(self.stats["applications"] * 60 / duration, 2) if duration else 0
+            ),
+            "urls_per_minute": (
+                round(self.stats["urls_crawled"] * 60 / duration, 2) if duration else 0
+            ),
+        }
+        logger.info(f"✅ Backfill des descriptions terminé: {report}")
+        return report
@@ -0,0 +1,143 @@
+"""
+Cache partagé URL -> description (collection `job_descriptions`).
+
+Plusieurs utilisateurs suivent souvent la même offre : la page n'est
+crawlée et résumée qu'une fois par URL canonique. Chaque entrée garde le
+markdown filtré, le résumé, le modèle et la version du prompt ; une entrée
+produite par un autre modèle ou un autre prompt est ignorée. Les entrées
+expirent après DESCRIPTION_CACHE_TTL_DAYS (TTL sur generated_at).
+"""
+
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.llm.utils import (
+    SUMMARY_MODEL,
+    SUMMARY_PROMPT_VERSION,
+    fetch_documents,
+    split_documents,
+    summarize_chunks,
+)
+from app.utils import url_hash
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTIONS_COLLECTION = "job_descriptions"
+
+
+class DescriptionError(Exception):
+    """Échec de génération d'une description, avec un code de cause"""
+
+    def __init__(self, code: str, message: str = ""):
+        super().__init__(message or code)
+        self.code = code
+
+
+async def get_cached_description(db, url: str) -> Optional[str]:
+    """Description en cache pour cette URL (modèle et prompt courants), ou None"""
+    key = url_hash(url)
+    if not key:
+        return None
+    entry = await db[DESCRIPTIONS_COLLECTION].find_one(
+        {
+            "_id": key,
+            "model": SUMMARY_MODEL,
+            "prompt_version": SUMMARY_PROMPT_VERSION,
+        },
+        {"description": 1},
+    )
+    return entry["description"] if entry else None
+
+
+async def get_cached_descriptions(db, urls: List[str]) -> Dict[str, str]:
+    """Descriptions en cache pour plusieurs URLs, en une lecture : {url: description}"""
+    keys = {url: url_hash(url) for url in urls}
+    keys = {url: key for url, key in keys.items() if key}
+    if not keys:
+        return {}
+    cursor = db[DESCRIPTIONS_COLLECTION].find(
+        {
+            "_id": {"$in": list(set(keys.values()))},
+            "model": SUMMARY_MODEL,
+            "prompt_version": SUMMARY_PROMPT_VERSION,
+        },
+        {"description": 1},
+    )
+    by_key = {entry["_id"]: entry["description"] async for entry in cursor}
+    return {url: by_key[key] for url, key in keys.items() if key in by_key}
+
+
+async def store_description(db, url: str, markdown: str, description: str) -> None:
+    key = url_hash(url)
+    if not key:
+        return
+    now = datetime.now(timezone.utc)
+    await db[DESCRIPTIONS_COLLECTION].update_one(
+        {"_id": key},
+        {
+            "$set": {
+                "url": url,
+                "markdown": markdown,
+                "description": description,
+                "model": SUMMARY_MODEL,
+                "prompt_version": SUMMARY_PROMPT_VERSION,
+                "generated_at": now,
+            },
+            "$setOnInsert": {"created_at": now},
+        },
+        upsert=True,
+    )
+
+
+async def generate_description(
+    url: str, crawler=None, progress=None
+) -> Tuple[str, str]:
+    """
+    Crawl + résumé d'une page d'offre, sans passer par le cache.
+
+    Args:
+        progress: DescriptionProgress optionnel recevant les étapes et les
+            tokens du résumé
+
+    Returns:
+        (markdown filtré, description) ; lève DescriptionError en cas d'échec
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        raise DescriptionError("no_api_key", "OPENAI_API_KEY n'est pas définie")
+
+    # Le crawl inclut le filtrage LLM du contenu (LLMContentFilter)
+    if progress:
+        await progress.stage("fetching")
+    docs = await fetch_documents(url, crawler=crawler)
+    if not docs:
+        raise DescriptionError("no_content", f"Aucun contenu récupéré depuis {url}")
+
+    if progress:
+        await progress.stage("summarizing")
+    description = await summarize_chunks(
+        split_documents(docs), on_token=progress.token if progress else None
+    )
+    if not description or not description.strip():
+        raise DescriptionError("empty_summary", "Résumé vide")
+
+    markdown = "\n\n".join(doc.page_content for doc in docs)
+    return markdown, description
+
+
+async def describe_url(db, url: str, crawler=None, progress=None) -> Tuple[str, bool]:
+    """
+    Description d'une offre : lue dans le cache, sinon générée puis mise en cache.
+
+    Returns:
+        (description, True si elle venait du cache)
+    """
+    cached = await get_cached_description(db, url)
+    if cached:
+        logger.info(f"♻️ Description en cache pour {url}")
+        return cached, True
+
+    markdown, description = await generate_description(url, crawler, progress)
+    await store_description(db, url, markdown, description)
+    return description, False
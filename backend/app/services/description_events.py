@@ -0,0 +1,141 @@
+"""
+Progression de la génération des descriptions (collection plafonnée
+`description_events`).
+
+Le worker qui traite un job publie ses étapes (fetching, summarizing), les
+tokens du résumé au fil de la génération puis un événement final (done ou
+error). Les routes SSE lisent ces événements avec un curseur tailable : le
+worker et la connexion du navigateur peuvent être sur deux réplicas
+différents de l'API.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+EVENTS_COLLECTION = "description_events"
+# Taille de la collection plafonnée : les événements les plus anciens sont écrasés
+EVENTS_MAX_BYTES = int(os.getenv("DESCRIPTION_EVENTS_MAX_BYTES", str(32 * 1024**2)))
+# Regroupement des tokens avant publication (une écriture par lot)
+TOKEN_FLUSH_CHARS = int(os.getenv("DESCRIPTION_TOKEN_FLUSH_CHARS", "80"))
+TOKEN_FLUSH_SECONDS = float(os.getenv("DESCRIPTION_TOKEN_FLUSH_SECONDS", "0.2"))
+
+# Types d'événements
+STAGE = "stage"
+TOKEN = "token"
+DONE = "done"
+ERROR = "error"
+FINAL_EVENTS = (DONE, ERROR)
+
+
+async def ensure_events_collection(db) -> None:
+    """Crée la collection plafonnée si elle n'existe pas (au démarrage de l'API)"""
+    try:
+        await db.create_collection(
+            EVENTS_COLLECTION, capped=True, size=EVENTS_MAX_BYTES
+        )
+        logger.info(f"📡 Collection {EVENTS_COLLECTION} créée")
+    except CollectionInvalid:
+        pass
+
+
+class DescriptionProgress:
+    """
+    Publication de la progression d'un job de description.
+
+    Les tokens sont regroupés (TOKEN_FLUSH_CHARS / TOKEN_FLUSH_SECONDS) pour
+    ne pas écrire un document par token.
+    """
+
+    def __init__(self, db, job: dict, user_id: Optional[str] = None):
+        self.collection = db[EVENTS_COLLECTION]
+        self.job_id = job["_id"]
+        self.application_id = job["application_id"]
+        self.user_id = user_id
+        self._buffer = ""
+        self._last_flush = time.monotonic()
+
+    async def _publish(self, event: str, data: Dict[str, Any]) -> None:
+        try:
+            await self.collection.insert_one(
+                {
+                    "job_id": self.job_id,
+                    "application_id": self.application_id,
+                    "user_id": self.user_id,
+                    "event": event,
+                    "data": data,
+                    "created_at": datetime.now(timezone.utc),
+                }
+            )
+        except Exception as e:
+            # La progression est informative : elle ne doit pas faire échouer le job
+            logger.warning(f"⚠️ Événement {event} non publié: {e}")
+
+    async def stage(self, name: str) -> None:
+        await self.flush()
+        await self._publish(STAGE, {"stage": name})
+
+    async def token(self, text: str) -> None:
+        self._buffer += text
+        elapsed = time.monotonic() - self._last_flush
+        if len(self._buffer) >= TOKEN_FLUSH_CHARS or elapsed >= TOKEN_FLUSH_SECONDS:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._buffer:
+            text, self._buffer = self._buffer, ""
+            await self._publish(TOKEN, {"text": text})
+        self._last_flush = time.monotonic()
+
+    async def done(self, description: str, cached: bool = False) -> None:
+        await self.flush()
+        await self._publish(DONE, {"description": description, "cached": cached})
+
+    async def error(self, message: str, retrying: bool) -> None:
+        await self.flush()
+        event = STAGE if retrying else ERROR
+        data = {"stage": "retrying"} if retrying else {}
+        await self._publish(event, {**data, "message": message})
+
+
+async def tail_events(
+    db, query: Dict[str, Any], since: Optional[ObjectId] = None
+) -> AsyncIterator[Optional[dict]]:
+    """
+    Suit les événements correspondant à `query` à partir de `since`.
+
+    Produit None quand aucun événement n'arrive pendant une seconde, pour que
+    l'appelant puisse envoyer un keep-alive ou vérifier la déconnexion.
+    """
+    collection = db[EVENTS_COLLECTION]
+    if since is None:
+        # Reprise après le dernier événement existant
+        last = await collection.find_one({}, sort=[("$natural", -1)])
+        since = last["_id"] if last else ObjectId.from_datetime(datetime(1970, 1, 1))
+
+    while True:
+        cursor = collection.find(
+            {**query, "_id": {"$gt": since}},
+            cursor_type=CursorType.TAILABLE_AWAIT,
+            max_await_time_ms=1000,
+        )
+        while cursor.alive:
+            received = False
+            async for event in cursor:
+                since = event["_id"]
+                received = True
+                yield event
+            if not received:
+                yield None
+        # Curseur mort (collection vide au départ, ou invalidée) : on réessaie
+        await asyncio.sleep(1)
+        yield None
@@ -0,0 +1,401 @@
+"""
+File de génération des descriptions de candidatures (collection `description_jobs`).
+
+Les routes enregistrent un job par (application_id, url) au lieu d'une tâche
+en mémoire : le travail survit à un redémarrage, le nombre de générations
+simultanées est borné par DESCRIPTION_WORKERS et les échecs sont retentés
+avec un délai exponentiel. Un worker prend un job avec un bail (lease)
+renouvelé pendant le traitement ; un job dont le bail expire (réplique
+arrêtée) est repris par un autre worker.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.llm.governor import INTERACTIVE, llm_priority
+from app.services.application_archive import find_application
+from app.services.bulk_writes import bulk_write_in_batches
+from app.services.description_cache import describe_url
+from app.services.description_events import DescriptionProgress
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "description_jobs"
+
+# Générations simultanées par processus API (0 désactive les workers)
+DESCRIPTION_WORKERS = int(os.getenv("DESCRIPTION_WORKERS", "2"))
+JOB_LEASE_SECONDS = float(os.getenv("DESCRIPTION_JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("DESCRIPTION_JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.getenv("DESCRIPTION_JOB_BACKOFF_SECONDS", "30"))
+JOB_BACKOFF_MAX_SECONDS = float(
+    os.getenv("DESCRIPTION_JOB_BACKOFF_MAX_SECONDS", "3600")
+)
+JOB_POLL_SECONDS = float(os.getenv("DESCRIPTION_JOB_POLL_SECONDS", "2"))
+
+# Statuts d'un job
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def backoff_delay(attempts: int) -> float:
+    """Délai avant la tentative suivante, après `attempts` échecs"""
+    return min(JOB_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), JOB_BACKOFF_MAX_SECONDS)
+
+
+def _requeue(now: datetime) -> dict:
+    """Mise à jour remettant un job terminé ou abandonné dans la file"""
+    return {
+        "$set": {
+            "status": PENDING,
+            "attempts": 0,
+            "run_at": now,
+            "enqueued_at": now,
+            "updated_at": now,
+        },
+        "$unset": {"last_error": "", "finished_at": ""},
+    }
+
+
+async def enqueue_description(
+    db, application_id, url: str, user_id=None, regenerate: bool = False
+) -> dict:
+    """
+    Planifie la génération de la description d'une candidature.
+    `user_id` permet de diffuser la progression sur le flux de l'utilisateur.
+
+    Idempotent par (application_id, url) : un job existant est renvoyé tel
+    quel, sauf s'il a définitivement échoué, auquel cas il est relancé.
+    Avec `regenerate` (la route demande explicitement une nouvelle
+    description, p. ex. l'URL a changé puis est revenue), un job terminé
+    est relancé lui aussi.
+    """
+    now = datetime.now(timezone.utc)
+    collection = db[JOBS_COLLECTION]
+    query = {"application_id": application_id, "url": url}
+
+    try:
+        job = await collection.find_one_and_update(
+            query,
+            {
+                "$setOnInsert": {
+                    "user_id": user_id,
+                    "status": PENDING,
+                    "attempts": 0,
+                    "run_at": now,
+                    "enqueued_at": now,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # Deux requêtes simultanées : l'autre a créé le job
+        job = await collection.find_one(query)
+
+    requeued = [FAILED, DONE] if regenerate else [FAILED]
+    if job["status"] in requeued:
+        job = await collection.find_one_and_update(
+            {"_id": job["_id"], "status": {"$in": requeued}},
+            _requeue(now),
+            return_document=ReturnDocument.AFTER,
+        ) or await collection.find_one({"_id": job["_id"]})
+
+    return job
+
+
+async def enqueue_descriptions(
+    db, jobs: List[Tuple[Any, str]], user_id=None, regenerate: bool = False
+) -> int:
+    """
+    Planifie plusieurs générations (application_id, url) en un seul bulk_write.
+    Les jobs existants sont laissés tels quels, même en échec définitif
+    (contrairement à enqueue_description) ; avec `regenerate`, les jobs
+    terminés sont relancés.
+
+    Returns:
+        Nombre de jobs créés
+    """
+    if not jobs:
+        return 0
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"application_id": application_id, "url": url},
+            {
+                "$setOnInsert": {
+                    "user_id": user_id,
+                    "status": PENDING,
+                    "attempts": 0,
+                    "run_at": now,
+                    "enqueued_at": now,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            },
+            upsert=True,
+        )
+        for application_id, url in jobs
+    ]
+    if regenerate:
+        # Sans effet sur un job absent : l'upsert ci-dessus le crée en attente
+        operations += [
+            UpdateOne(
+                {"application_id": application_id, "url": url, "status": DONE},
+                _requeue(now),
+            )
+            for application_id, url in jobs
+        ]
+    report = await bulk_write_in_batches(db[JOBS_COLLECTION], operations)
+    return report["upserted"]
+
+
+async def fail_expired_leases(db, now: datetime) -> int:
+    """
+    Abandonne les jobs dont le bail a expiré après JOB_MAX_ATTEMPTS tentatives :
+    un job qui fait tomber son processus (OOM de Chromium, redémarrage) ne
+    passe jamais par fail_job et serait sinon repris indéfiniment.
+
+    Returns:
+        Nombre de jobs passés en échec définitif
+    """
+    result = await db[JOBS_COLLECTION].update_many(
+        {
+            "status": RUNNING,
+            "lease_expires_at": {"$lte": now},
+            "attempts": {"$gte": JOB_MAX_ATTEMPTS},
+        },
+        {
+            "$set": {
+                "status": FAILED,
+                "last_error": "Bail expiré (worker arrêté pendant le traitement)",
+                "finished_at": now,
+                "updated_at": now,
+            },
+            "$unset": {"lease_owner": "", "lease_expires_at": ""},
+        },
+    )
+    if result.modified_count:
+        logger.warning(
+            f"⚠️ {result.modified_count} jobs abandonnés après {JOB_MAX_ATTEMPTS} "
+            f"baux expirés"
+        )
+    return result.modified_count
+
+
+async def claim_job(db, worker_id: str) -> Optional[dict]:
+    """Prend le prochain job dû (ou dont le bail a expiré) sous un nouveau bail"""
+    now = datetime.now(timezone.utc)
+    await fail_expired_leases(db, now)
+    return await db[JOBS_COLLECTION].find_one_and_update(
+        {
+            "$or": [
+                {"status": PENDING, "run_at": {"$lte": now}},
+                {
+                    "status": RUNNING,
+                    "lease_expires_at": {"$lte": now},
+                    "attempts": {"$lt": JOB_MAX_ATTEMPTS},
+                },
+            ]
+        },
+        {
+            "$set": {
+                "status": RUNNING,
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "started_at": now,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def extend_lease(db, job: dict, worker_id: str) -> bool:
+    """Prolonge le bail ; False si le job a été repris par un autre worker"""
+    now = datetime.now(timezone.utc)
+    result = await db[JOBS_COLLECTION].update_one(
+        {"_id": job["_id"], "status": RUNNING, "lease_owner": worker_id},
+        {
+            "$set": {
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "updated_at": now,
+            }
+        },
+    )
+    return result.modified_count == 1
+
+
+async def complete_job(db, job: dict, worker_id: str) -> None:
+    now = datetime.now(timezone.utc)
+    await db[JOBS_COLLECTION].update_one(
+        {"_id": job["_id"], "lease_owner": worker_id},
+        {
+            "$set": {"status": DONE, "finished_at": now, "updated_at": now},
+            "$unset": {"lease_owner": "", "lease_expires_at": "", "last_error": ""},
+        },
+    )
+
+
+async def fail_job(db, job: dict, worker_id: str, error: Exception) -> str:
+    """
+    Enregistre un échec : nouvel essai différé, ou échec définitif après
+    JOB_MAX_ATTEMPTS tentatives.
+
+    Returns:
+        Le nouveau statut du job
+    """
+    now = datetime.now(timezone.utc)
+    changes = {"last_error": str(error) or type(error).__name__, "updated_at": now}
+    if job["attempts"] >= JOB_MAX_ATTEMPTS:
+        status = FAILED
+        changes["finished_at"] = now
+    else:
+        status = PENDING
+        changes["run_at"] = now + timedelta(seconds=backoff_delay(job["attempts"]))
+
+    await db[JOBS_COLLECTION].update_one(
+        {"_id": job["_id"], "lease_owner": worker_id},
+        {
+            "$set": {"status": status, **changes},
+            "$unset": {"lease_owner": "", "lease_expires_at": ""},
+        },
+    )
+    return status
+
+
+async def process_job(db, job: dict, progress: DescriptionProgress) -> None:
+    """Génère la description et l'enregistre si l'URL de la candidature n'a pas changé"""
+    application, collection_name = await find_application(
+        db, {"_id": job["application_id"]}
+    )
+    if not application or (application.get("url") or "").strip() != job["url"]:
+        logger.info(
+            f"⏭️ Job {job['_id']} obsolète (candidature supprimée ou URL modifiée)"
+        )
+        await progress.error("Candidature supprimée ou URL modifiée", retrying=False)
+        return
+
+    description, cached = await describe_url(db, job["url"], progress=progress)
+
+    # Filtre sur l'URL lue : une modification pendant la génération l'emporte
+    await db[collection_name].update_one(
+        {"_id": job["application_id"], "url": application["url"]},
+        {
+            "$set": {
+                "description": description,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        },
+    )
+    await progress.done(description, cached)
+    logger.info(
+        f"✅ Description générée pour {job['application_id']} ({len(description)} chars)"
+    )
+
+
+async def run_job(db, job: dict, worker_id: str) -> None:
+    """Traite un job en renouvelant son bail jusqu'à la fin"""
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            if not await extend_lease(db, job, worker_id):
+                logger.warning(f"⚠️ Bail perdu pour le job {job['_id']}")
+                return
+
+    progress = DescriptionProgress(db, job, job.get("user_id"))
+    renewal = asyncio.create_task(heartbeat())
+    try:
+        # Un utilisateur attend cette description : elle passe devant la collecte
+        with llm_priority(INTERACTIVE):
+            await process_job(db, job, progress)
+        await complete_job(db, job, worker_id)
+    except Exception as e:
+        status = await fail_job(db, job, worker_id, e)
+        await progress.error(str(e), retrying=status == PENDING)
+        logger.error(
+            f"💥 Job {job['_id']} en échec (tentative {job['attempts']}, "
+            f"statut {status}): {e}"
+        )
+    finally:
+        renewal.cancel()
+
+
+async def get_latest_job(db, application_id, url: str) -> Optional[dict]:
+    """
+    Dernier job de génération d'une candidature pour son URL actuelle : les
+    jobs d'une ancienne URL ne décrivent plus la candidature.
+    """
+    jobs = (
+        await db[JOBS_COLLECTION]
+        .find({"application_id": application_id, "url": url})
+        .sort("created_at", -1)
+        .limit(1)
+        .to_list(length=1)
+    )
+    return jobs[0] if jobs else None
+
+
+class DescriptionWorkers:
+    """
+    Workers de la file, lancés au démarrage de l'API.
+
+    Usage:
+        workers = DescriptionWorkers(db)
+        workers.start()
+        ...
+        await workers.stop()
+    """
+
+    def __init__(
+        self,
+        db,
+        concurrency: int = DESCRIPTION_WORKERS,
+        poll_interval: float = JOB_POLL_SECONDS,
+    ):
+        self.db = db
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        for index in range(self.concurrency):
+            self._tasks.append(
+                asyncio.create_task(self._work(f"{self.worker_id}-{index}"))
+            )
+        logger.info(f"🚀 {self.concurrency} workers de description démarrés")
+
+    async def stop(self) -> None:
+        # Un job interrompu garde son bail : il sera repris à son expiration
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _work(self, worker_id: str) -> None:
+        while True:
+            try:
+                job = await claim_job(self.db, worker_id)
+            except Exception as e:
+                logger.error(f"💥 Lecture de la file impossible: {e}")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            await run_job(self.db, job, worker_id)
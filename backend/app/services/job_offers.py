@@ -11,8 +11,19 @@ from difflib import SequenceMatcher
 import re
 from deep_translator import GoogleTranslator
 
+from app.database import get_database
+from app.llm.governor import governor, llm_budget
+from app.services.crawl_ledger import CrawlLedger
+
 logger = logging.getLogger(__name__)
 
+# Budget LLM d'une collecte (crew + crawl) ; vide = pas de limite
+COLLECT_TOKEN_BUDGET = os.getenv("LLM_COLLECT_TOKEN_BUDGET")
+COLLECT_COST_BUDGET = os.getenv("LLM_COLLECT_COST_BUDGET")
+# Réservation auprès du régulateur pour une exécution du crew (réconciliée ensuite)
+CREW_RUN_TOKENS = int(os.getenv("CREW_RUN_TOKENS", "20000"))
+CREW_RUN_REQUESTS = int(os.getenv("CREW_RUN_REQUESTS", "10"))
+
 
 def extract_urls_from_crew(crew_result) -> List[str]:
     """Extraction simple - attend un JSON array d'URLs"""
@@ -46,9 +57,28 @@ def extract_urls_from_crew(crew_result) -> List[str]:
 
 
 async def get_job_offers_from_query(user_query: str) -> List[dict]:
+    """
+    Collecte les offres d'une requête : CrewAI trouve les URLs puis le crawler
+    extrait les offres. Les appels LLM de la collecte partagent un budget
+    (LLM_COLLECT_TOKEN_BUDGET / LLM_COLLECT_COST_BUDGET).
+    """
+    with llm_budget(
+        f"collecte '{user_query}'",
+        max_tokens=int(COLLECT_TOKEN_BUDGET) if COLLECT_TOKEN_BUDGET else None,
+        max_cost=float(COLLECT_COST_BUDGET) if COLLECT_COST_BUDGET else None,
+    ):
+        return await _collect_offers(user_query)
+
+
+async def _collect_offers(user_query: str) -> List[dict]:
     try:
         # 1. CrewAI : obtenir la liste d'URLs
-        crew_result = run_crew(user_query)
+        async with governor.limit(
+            tokens=CREW_RUN_TOKENS, requests=CREW_RUN_REQUESTS
+        ) as lease:
+            crew_result = run_crew(user_query)
+            usage = getattr(crew_result, "token_usage", None)
+            lease.record(getattr(usage, "total_tokens", None))
 
         # Log seulement le type, pas le contenu complet
         # logger.debug(f"CrewAI result type: {type(crew_result)}")
@@ -72,11 +102,13 @@ async def get_job_offers_from_query(user_query: str) -> List[dict]:
         if not api_key:
             raise ValueError("OPENAI_API_KEY manquante")
 
-        #  crawler
+        #  crawler (le registre évite de re-crawler les pages vues récemment)
+        ledger = CrawlLedger(await get_database())
         crawl_result = await crawl_and_extract_jobs_optimized(
             clean_urls,
             api_key=api_key,
             max_concurrent=2,  # Réduire pour être plus gentil avec les sites
+            ledger=ledger,
             # filter_keywords=extract_keywords_from_query(user_query)  #  Filtrage intelligent
         )
 
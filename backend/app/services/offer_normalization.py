@@ -0,0 +1,212 @@
+import hashlib
+import re
+import unicodedata
+from typing import Any, List, Optional, Tuple
+
+from app.utils import url_hash
+
+# ======================================================================
+# FONCTIONS DE NORMALISATION
+# ======================================================================
+
+
+def normalize_city(city: str) -> str:
+    """Normalise les noms de villes pour éviter les doublons"""
+    if not city:
+        return "Non spécifié"
+
+    # Supprimer les codes postaux complets (ex: "44000 Nantes" -> "Nantes")
+    city = re.sub(r"^\d{5}\s+", "", city)
+
+    # Supprimer les codes postaux avec tiret (ex: "Nantes - 44" -> "Nantes")
+    city = re.sub(r"\s*-\s*\d+.*$", "", city)
+
+    # Supprimer les arrondissements avec tiret (ex: "Lyon - 01" -> "Lyon")
+    city = re.sub(r"\s*-\s*\d{2}$", "", city)
+
+    # Supprimer les arrondissements avec espace (ex: "LYON 01" -> "LYON")
+    city = re.sub(r"\s+\d{2}$", "", city)
+
+    # Supprimer les arrondissements avec "er", "ème", etc. (ex: "Lyon 1er" -> "Lyon")
+    city = re.sub(r"\s+\d{1,2}(er|ème|e)?$", "", city, flags=re.IGNORECASE)
+
+    # Supprimer les parenthèses et leur contenu (ex: "Lyon (Rhône)" -> "Lyon")
+    city = re.sub(r"\s*\([^)]*\)", "", city)
+
+    # Nettoyer les espaces multiples
+    city = re.sub(r"\s+", " ", city.strip())
+
+    # Capitaliser correctement (première lettre de chaque mot en majuscule)
+    return city.title() if city else "Non spécifié"
+
+
+def normalize_company(company: str) -> str:
+    """Normalise les noms d'entreprises pour éviter les doublons"""
+    if not company:
+        return "Non spécifié"
+
+    # Convertir en majuscules pour comparaison
+    normalized = company.upper()
+
+    # Supprimer les suffixes courants
+    suffixes = [" SAS", " SA", " SARL", " EURL", " SNC", " SCOP", " SASU", " SCIC"]
+    for suffix in suffixes:
+        if normalized.endswith(suffix):
+            normalized = normalized[: -len(suffix)]
+            break
+
+    # Nettoyer les espaces multiples
+    normalized = re.sub(r"\s+", " ", normalized.strip())
+
+    return normalized if normalized else "Non spécifié"
+
+
+def extract_domain(url: str) -> str:
+    """Extrait et normalise le domaine d'une URL"""
+    if not url:
+        return "Non spécifié"
+
+    try:
+        # Extraire le domaine
+        if "://" in url:
+            domain = url.split("://")[1].split("/")[0]
+        else:
+            domain = url.split("/")[0]
+
+        # Supprimer www.
+        if domain.startswith("www."):
+            domain = domain[4:]
+
+        return domain.lower()
+    except Exception:
+        return "Non spécifié"
+
+
+# ======================================================================
+# CLÉS DE RECHERCHE
+# ======================================================================
+
+
+def search_key(text: Optional[str]) -> Optional[str]:
+    """
+    Clé de recherche : minuscules, sans accents, espaces normalisés.
+
+    Exemples:
+        "Société Générale" -> "societe generale"
+    """
+    if not text:
+        return None
+
+    decomposed = unicodedata.normalize("NFKD", text)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    key = re.sub(r"\s+", " ", without_accents.lower()).strip()
+    return key or None
+
+
+def company_search_key(company: Optional[str]) -> Optional[str]:
+    """Clé de recherche d'une entreprise (suffixes juridiques retirés)"""
+    if not company or not company.strip():
+        return None
+    return search_key(normalize_company(company))
+
+
+def city_search_key(city: Optional[str]) -> Optional[str]:
+    """Clé de recherche d'une ville (codes postaux et arrondissements retirés)"""
+    if not city or not city.strip():
+        return None
+    return search_key(normalize_city(city))
+
+
+def title_search_key(title: Optional[str]) -> Optional[str]:
+    """Clé d'un intitulé de poste, sans les mentions de genre (H/F, F/H...)"""
+    if not title:
+        return None
+    title = re.sub(r"\(?\b[hf]\s*/\s*[hf]\b\)?", " ", title, flags=re.IGNORECASE)
+    return search_key(title)
+
+
+# Valeurs par défaut de l'ingestion, qui ne doivent pas rapprocher deux offres
+PLACEHOLDER_KEYS = {"non specifie", "entreprise non specifiee", "poste non specifie"}
+
+
+def offer_fingerprint(offer: dict) -> Optional[str]:
+    """
+    Empreinte d'une offre publiée sur plusieurs sites : même entreprise,
+    même intitulé et même ville normalisés, quelle que soit l'URL.
+    """
+    parts = (
+        company_search_key(offer.get("entreprise")),
+        title_search_key(offer.get("poste")),
+        city_search_key(offer.get("localisation")),
+    )
+    if any(not part or part in PLACEHOLDER_KEYS for part in parts[:2]):
+        return None
+    content = "|".join(part or "" for part in parts)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+# ======================================================================
+# CHAMPS NORMALISÉS D'UNE OFFRE
+# ======================================================================
+
+# À incrémenter quand les règles de normalisation changent : les offres
+# d'une version antérieure sont reprises par normalize_existing_data
+NORMALIZATION_VERSION = 2
+
+# Champs lus pour recalculer les champs normalisés d'une offre existante
+NORMALIZATION_PROJECTION = {
+    "poste": 1,
+    "entreprise": 1,
+    "localisation": 1,
+    "url": 1,
+    "created_at": 1,
+    "normalized_company": 1,
+    "normalized_city": 1,
+    "normalized_site": 1,
+    "company_key": 1,
+    "city_key": 1,
+    "url_hash": 1,
+    "fingerprint": 1,
+}
+
+
+def normalized_fields(offer: dict) -> dict:
+    """
+    Champs dérivés calculés une fois à l'écriture d'une offre : valeurs
+    normalisées (statistiques) et clés de recherche (filtres de /job-offers).
+    Les champs absents de l'offre donnent None.
+    """
+    company = offer.get("entreprise")
+    city = offer.get("localisation")
+    url = offer.get("url")
+
+    return {
+        "normalized_company": normalize_company(company) if company else None,
+        "normalized_city": normalize_city(city) if city else None,
+        "normalized_site": extract_domain(url) if url else None,
+        "company_key": company_search_key(company),
+        "city_key": city_search_key(city),
+        "url_hash": url_hash(url),
+        "fingerprint": offer_fingerprint(offer),
+    }
+
+
+def normalization_updates(offers: List[dict]) -> List[Tuple[Any, dict]]:
+    """
+    Calcule les champs à mettre à jour pour un lot d'offres existantes.
+    Fonction de module (sérialisable) pour pouvoir tourner dans un pool de
+    processus.
+
+    Returns:
+        Liste de (_id, champs modifiés), version de normalisation incluse
+    """
+    updates = []
+    for offer in offers:
+        changes = {
+            field: value
+            for field, value in normalized_fields(offer).items()
+            if value != offer.get(field)
+        }
+        changes["normalization_version"] = NORMALIZATION_VERSION
+        updates.append((offer["_id"], changes))
+    return updates
@@ -0,0 +1,58 @@
+import re
+from typing import NamedTuple, Optional
+
+from app.services.offer_normalization import city_search_key, company_search_key
+
+# Longueur maximale d'une recherche par mots-clés
+MAX_KEYWORDS_LENGTH = 200
+
+
+class OfferQuery(NamedTuple):
+    filter: dict
+    text_search: bool
+
+
+def sanitize_text_search(keywords: str) -> str:
+    """
+    Neutralise la syntaxe de $text (guillemets = phrase exacte, "-" = exclusion)
+    pour que la saisie utilisateur soit traitée comme de simples mots.
+    """
+    words = keywords[:MAX_KEYWORDS_LENGTH].replace('"', " ").split()
+    return " ".join(word.lstrip("-") for word in words if word.lstrip("-"))
+
+
+def prefix_filter(key: Optional[str]) -> Optional[dict]:
+    """Préfixe ancré et échappé : utilisable par un index (pas d'option "i")"""
+    if not key:
+        return None
+    return {"$regex": f"^{re.escape(key)}"}
+
+
+def compile_offer_query(
+    keywords: Optional[str] = None,
+    location: Optional[str] = None,
+    company: Optional[str] = None,
+) -> OfferQuery:
+    """
+    Traduit les filtres de recherche des offres en requête MongoDB indexable :
+    - mots-clés : index texte ($text, tri par pertinence)
+    - entreprise / ville : préfixe sur les clés normalisées company_key / city_key
+    """
+    query_filter = {}
+    text_search = False
+
+    if keywords:
+        search = sanitize_text_search(keywords)
+        if search:
+            query_filter["$text"] = {"$search": search}
+            text_search = True
+
+    company_filter = prefix_filter(company_search_key(company))
+    if company_filter:
+        query_filter["company_key"] = company_filter
+
+    city_filter = prefix_filter(city_search_key(location))
+    if city_filter:
+        query_filter["city_key"] = city_filter
+
+    return OfferQuery(query_filter, text_search)
@@ -0,0 +1,265 @@
+"""
+Rollup des statistiques des offres d'emploi (collection `offer_stats`).
+
+Un document par (dimension, valeur) porte un compteur `count` :
+entreprise, ville et site normalisés, jour de création, plus un total.
+Les compteurs suivent l'ingestion et les tâches de nettoyage (offer_deltas,
+changed_offer_deltas puis apply_deltas). Les offres supprimées par l'index TTL sur last_seen ne
+sont pas décomptées : cette dérive n'est corrigée que par la reconstruction
+complète, lancée chaque nuit à la fin de cleanup_workflow ou à la main :
+
+    python -m app.services.offer_stats rebuild
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from app.database import get_database
+from app.indexes import INDEXES, sync_collection_indexes
+from app.services.bulk_writes import bulk_write_in_batches
+
+logger = logging.getLogger(__name__)
+
+STATS_COLLECTION = "offer_stats"
+
+# Dimension du rollup -> champ normalisé de l'offre
+DIMENSIONS = {
+    "company": "normalized_company",
+    "city": "normalized_city",
+    "site": "normalized_site",
+}
+DAY_DIMENSION = "day"
+TOTAL_ID = "total"
+
+# Jour de création d'une offre (dates en chaîne des anciennes données ignorées)
+DAY_EXPRESSION = {
+    "$dateToString": {
+        "format": "%Y-%m-%d",
+        "date": {
+            "$convert": {
+                "input": "$created_at",
+                "to": "date",
+                "onError": None,
+                "onNull": None,
+            }
+        },
+    }
+}
+
+
+def _stat_id(dimension: str, value: str) -> str:
+    return f"{dimension}|{value}"
+
+
+def _offer_day(offer: dict) -> Optional[str]:
+    created_at = offer.get("created_at")
+    if isinstance(created_at, datetime):
+        return created_at.strftime("%Y-%m-%d")
+    return None
+
+
+def offer_deltas(offers: Iterable[dict], sign: int = 1) -> Counter:
+    """Variations de compteurs induites par l'ajout (+1) ou le retrait (-1) d'offres"""
+    deltas: Counter = Counter()
+    for offer in offers:
+        deltas[(TOTAL_ID, None)] += sign
+        for dimension, field in DIMENSIONS.items():
+            if offer.get(field):
+                deltas[(dimension, offer[field])] += sign
+        day = _offer_day(offer)
+        if day:
+            deltas[(DAY_DIMENSION, day)] += sign
+    return deltas
+
+
+def changed_offer_deltas(pairs: Iterable[Tuple[dict, dict]]) -> Counter:
+    """Variations pour des offres modifiées : (ancienne version, nouvelle version)"""
+    deltas: Counter = Counter()
+    for previous, current in pairs:
+        deltas.update(offer_deltas([previous], -1))
+        deltas.update(offer_deltas([current], 1))
+    return deltas
+
+
+async def apply_deltas(db, deltas: Counter) -> Dict[str, Any]:
+    """Applique les variations au rollup par lots de $inc"""
+    operations = []
+    for (dimension, value), delta in deltas.items():
+        if not delta:
+            continue
+        if dimension == TOTAL_ID:
+            operations.append(
+                UpdateOne(
+                    {"_id": TOTAL_ID},
+                    {"$inc": {"count": delta}, "$setOnInsert": {"dimension": TOTAL_ID}},
+                    upsert=True,
+                )
+            )
+            continue
+        operations.append(
+            UpdateOne(
+                {"_id": _stat_id(dimension, value)},
+                {
+                    "$inc": {"count": delta},
+                    "$setOnInsert": {"dimension": dimension, "value": value},
+                },
+                upsert=True,
+            )
+        )
+
+    if not operations:
+        return {"errors": []}
+
+    report = await bulk_write_in_batches(db[STATS_COLLECTION], operations)
+    for error in report["errors"]:
+        logger.error(f"💥 Erreur mise à jour offer_stats: {error['message']}")
+    return report
+
+
+def _facet_pipeline(query: dict, limit: Optional[int] = None) -> List[dict]:
+    """
+    Agrégation $facet des offres correspondant à `query`, par dimension.
+    Sans `limit`, toutes les valeurs sont retournées (reconstruction, retraits).
+    """
+
+    def branch(expression) -> List[dict]:
+        stages = [
+            {"$group": {"_id": expression, "count": {"$sum": 1}}},
+            {"$match": {"_id": {"$nin": [None, ""]}}},
+        ]
+        if limit:
+            stages += [{"$sort": {"count": -1, "_id": 1}}, {"$limit": limit}]
+        return stages
+
+    facets = {"total": [{"$count": "count"}]}
+    for dimension, field in DIMENSIONS.items():
+        facets[dimension] = branch(f"${field}")
+    facets[DAY_DIMENSION] = branch(DAY_EXPRESSION)
+
+    return [
+        {"$match": query},
+        {"$project": {**{field: 1 for field in DIMENSIONS.values()}, "created_at": 1}},
+        {"$facet": facets},
+    ]
+
+
+async def _aggregate_counts(
+    collection, query: dict, limit: Optional[int] = None
+) -> Dict[str, List[dict]]:
+    result = await collection.aggregate(
+        _facet_pipeline(query, limit), allowDiskUse=True
+    ).to_list(length=1)
+    return result[0] if result else {}
+
+
+def _facet_deltas(facets: Dict[str, List[dict]], sign: int) -> Counter:
+    deltas: Counter = Counter()
+    total = facets.get("total") or [{"count": 0}]
+    deltas[(TOTAL_ID, None)] = sign * total[0]["count"]
+    for dimension in (*DIMENSIONS, DAY_DIMENSION):
+        for entry in facets.get(dimension, []):
+            deltas[(dimension, entry["_id"])] = sign * entry["count"]
+    return deltas
+
+
+async def decrement_matching(db, query: dict) -> None:
+    """
+    Décompte les offres correspondant à `query`, à appeler juste avant
+    leur suppression par les tâches de nettoyage.
+    """
+    facets = await _aggregate_counts(db["job_offers"], query)
+    await apply_deltas(db, _facet_deltas(facets, -1))
+
+
+async def rebuild_offer_stats(db) -> Dict[str, Any]:
+    """
+    Recalcule entièrement le rollup à partir de job_offers.
+    Le résultat est écrit dans une collection temporaire puis renommé,
+    les lecteurs ne voient jamais de rollup partiel.
+    """
+    started = datetime.now(timezone.utc)
+    facets = await _aggregate_counts(db["job_offers"], {})
+    deltas = _facet_deltas(facets, 1)
+
+    documents = []
+    for (dimension, value), count in deltas.items():
+        if dimension == TOTAL_ID:
+            documents.append({"_id": TOTAL_ID, "dimension": TOTAL_ID, "count": count})
+        elif count:
+            documents.append(
+                {
+                    "_id": _stat_id(dimension, value),
+                    "dimension": dimension,
+                    "value": value,
+                    "count": count,
+                }
+            )
+
+    staging = db[f"{STATS_COLLECTION}_rebuild"]
+    await staging.drop()
+    await staging.insert_many(documents)
+    await sync_collection_indexes(staging, INDEXES[STATS_COLLECTION])
+    await staging.rename(STATS_COLLECTION, dropTarget=True)
+
+    duration = (datetime.now(timezone.utc) - started).total_seconds()
+    logger.info(
+        f"✅ offer_stats reconstruit: {len(documents)} compteurs en {duration:.2f}s"
+    )
+    return {"counters": len(documents), "duration": duration}
+
+
+async def top_values(db, dimension: str, limit: int = 10) -> List[dict]:
+    """Valeurs les plus fréquentes d'une dimension, au format {_id, count}"""
+    cursor = (
+        db[STATS_COLLECTION]
+        .find({"dimension": dimension, "count": {"$gt": 0}}, {"value": 1, "count": 1})
+        .sort([("count", DESCENDING), ("value", ASCENDING)])
+        .limit(limit)
+    )
+    return [{"_id": entry["value"], "count": entry["count"]} async for entry in cursor]
+
+
+async def get_stats_summary(db, limit: int = 10) -> Dict[str, Any]:
+    """
+    Statistiques de /job-offers/stats/summary lues dans le rollup.
+    Si le rollup n'a jamais été construit, on se rabat sur l'agrégation.
+    """
+    total = await db[STATS_COLLECTION].find_one({"_id": TOTAL_ID})
+    if total is None:
+        logger.warning("⚠️ offer_stats vide : agrégation directe sur job_offers")
+        facets = await _aggregate_counts(db["job_offers"], {}, limit)
+        count = (facets.get("total") or [{"count": 0}])[0]["count"]
+        return {
+            "total_offers": count,
+            "top_websites": facets.get("site", []),
+            "top_companies": facets.get("company", []),
+            "top_cities": facets.get("city", []),
+        }
+
+    return {
+        "total_offers": max(total.get("count", 0), 0),
+        "top_websites": await top_values(db, "site", limit),
+        "top_companies": await top_values(db, "company", limit),
+        "top_cities": await top_values(db, "city", limit),
+    }
+
+
+async def _main(command: str) -> int:
+    db = await get_database()
+    if command == "rebuild":
+        report = await rebuild_offer_stats(db)
+        print(f"offer_stats: {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rollup des statistiques d'offres")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+    asyncio.run(_main(args.command))
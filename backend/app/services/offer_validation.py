@@ -0,0 +1,107 @@
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+
+from app.services.offer_normalization import search_key
+from app.utils import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Offres refusées à l'ingestion, conservées pour analyse puis expirées (TTL)
+REJECTED_COLLECTION = "job_offers_rejected"
+REJECTED_RETENTION_DAYS = float(os.getenv("REJECTED_RETENTION_DAYS", "30"))
+
+# Codes de rejet
+NOT_A_DICT = "not_a_dict"
+MISSING_TITLE = "missing_title"
+MISSING_COMPANY = "missing_company"
+
+# Valeurs renvoyées par l'extraction quand le champ est inconnu
+PLACEHOLDERS = {
+    "",
+    "non specifie",
+    "non specifiee",
+    "poste non specifie",
+    "entreprise non specifiee",
+    "n/a",
+    "none",
+    "null",
+    "inconnu",
+}
+
+
+def _is_placeholder(value: Any) -> bool:
+    if value is None:
+        return True
+    return (search_key(str(value)) or "") in PLACEHOLDERS
+
+
+def validate_offer(offer: Any) -> Optional[str]:
+    """
+    Vérifie qu'une offre extraite peut entrer dans job_offers.
+
+    Returns:
+        None si l'offre est valide, sinon le code de rejet
+    """
+    if not isinstance(offer, dict):
+        return NOT_A_DICT
+    if _is_placeholder(offer.get("poste")):
+        return MISSING_TITLE
+    if _is_placeholder(offer.get("entreprise")):
+        return MISSING_COMPANY
+    return None
+
+
+def valid_url(offer: dict) -> Optional[str]:
+    """URL de l'offre si elle est exploitable (http/https), sinon None"""
+    url = offer.get("url") or offer.get("source_url")
+    if url and canonicalize_url(url):
+        return url
+    return None
+
+
+def split_offers(offers: List[Any]) -> Tuple[List[dict], List[Tuple[Any, str]]]:
+    """Sépare les offres valides des offres rejetées (avec leur code)"""
+    accepted, rejected = [], []
+    for offer in offers:
+        reason = validate_offer(offer)
+        if reason:
+            rejected.append((offer, reason))
+        else:
+            accepted.append(offer)
+    return accepted, rejected
+
+
+async def quarantine_offers(
+    db, rejected: List[Tuple[Any, str]], source_query: Optional[str] = None
+) -> Counter:
+    """
+    Range les offres rejetées dans job_offers_rejected.
+
+    Returns:
+        Nombre d'offres rejetées par code
+    """
+    reasons = Counter(reason for _, reason in rejected)
+    if not rejected:
+        return reasons
+
+    now = datetime.now(timezone.utc)
+    documents = [
+        {
+            "reason": reason,
+            "raw_data": offer if isinstance(offer, dict) else repr(offer),
+            "source_query": source_query,
+            "rejected_at": now,
+        }
+        for offer, reason in rejected
+    ]
+
+    try:
+        await db[REJECTED_COLLECTION].insert_many(documents, ordered=False)
+    except Exception as e:
+        # La quarantaine est un diagnostic : elle ne doit pas bloquer la collecte
+        logger.error(f"💥 Erreur sauvegarde des offres rejetées: {e}")
+
+    return reasons
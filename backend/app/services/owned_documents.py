@@ -0,0 +1,233 @@
+"""
+Accès aux documents appartenant à un utilisateur (candidatures, tâches).
+
+La propriété fait partie du filtre ({_id, user_id}) au lieu d'être vérifiée
+après une première lecture : chaque mutation est un seul aller-retour
+(find_one_and_update / delete_one) et un document d'un autre utilisateur
+est indiscernable d'un document inexistant (404). Les documents créés sont
+renvoyés tels qu'insérés, sans relecture.
+
+Les candidatures sont réparties entre la collection chaude et l'archive :
+les opérations essaient les collections dans l'ordre donné.
+
+`bulk` applique un lot de créations / modifications / suppressions avec une
+lecture groupée pour localiser les documents puis un bulk_write par
+collection, et renvoie un statut par élément.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+
+from app.services.bulk_writes import bulk_write_in_batches
+
+OwnedDocument = Tuple[Optional[dict], Optional[str]]
+
+# Statuts d'un élément de lot
+BULK_OK = "ok"
+BULK_NOT_FOUND = "not_found"
+BULK_INVALID = "invalid"
+BULK_ERROR = "error"
+
+
+def bulk_object_id(value) -> ObjectId:
+    """Identifiant d'un élément de lot ; ValueError s'il manque ou est invalide"""
+    if not value or not ObjectId.is_valid(value):
+        raise ValueError(f"Identifiant manquant ou invalide: {value!r}")
+    return ObjectId(value)
+
+
+def bulk_results(items: List[dict]) -> Dict[str, Any]:
+    """Résultats par élément et compteurs d'un lot (voir BulkResponse)"""
+    results = [
+        {
+            "index": item["index"],
+            "action": item["action"],
+            "id": str(item["id"]) if item.get("id") else None,
+            "status": item["status"],
+            "error": item.get("error"),
+        }
+        for item in items
+    ]
+    succeeded = sum(1 for item in items if item["status"] == BULK_OK)
+    return {
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+    }
+
+
+class OwnedDocuments:
+    """
+    Documents de `user_id` dans une ou plusieurs collections.
+
+    Usage:
+        tasks = OwnedDocuments(db, ["tasks"], current_user.id)
+        task, _ = await tasks.update(task_id, {"$set": {"status": "En cours"}})
+    """
+
+    def __init__(self, db, collection_names: Sequence[str], user_id):
+        self.db = db
+        self.collection_names = list(collection_names)
+        self.user_id = user_id
+
+    def _filter(self, document_id) -> Dict[str, Any]:
+        return {"_id": document_id, "user_id": self.user_id}
+
+    async def get(self, document_id, projection=None) -> OwnedDocument:
+        """(document, collection) ou (None, None) s'il n'existe pas pour cet utilisateur"""
+        for name in self.collection_names:
+            document = await self.db[name].find_one(
+                self._filter(document_id), projection
+            )
+            if document:
+                return document, name
+        return None, None
+
+    async def insert(self, data: dict) -> dict:
+        """Insère dans la première collection et renvoie le document construit localement"""
+        document = {**data, "user_id": self.user_id}
+        result = await self.db[self.collection_names[0]].insert_one(document)
+        document["_id"] = result.inserted_id
+        return document
+
+    async def update(
+        self,
+        document_id,
+        update: Dict[str, Any],
+        return_document: ReturnDocument = ReturnDocument.AFTER,
+    ) -> OwnedDocument:
+        """
+        Applique `update` en un aller-retour par collection essayée.
+
+        Returns:
+            (document après — ou avant avec ReturnDocument.BEFORE —, collection),
+            ou (None, None) si le document n'existe pas pour cet utilisateur
+        """
+        for name in self.collection_names:
+            document = await self.db[name].find_one_and_update(
+                self._filter(document_id), update, return_document=return_document
+            )
+            if document:
+                return document, name
+        return None, None
+
+    async def delete(self, document_id) -> bool:
+        """Supprime le document ; False s'il n'existe pas pour cet utilisateur"""
+        for name in self.collection_names:
+            result = await self.db[name].delete_one(self._filter(document_id))
+            if result.deleted_count:
+                return True
+        return False
+
+    async def locate(
+        self, document_ids: List[Any], projection=None
+    ) -> Dict[Any, Tuple[dict, str]]:
+        """Documents de l'utilisateur parmi `document_ids` : une lecture par collection"""
+        found: Dict[Any, Tuple[dict, str]] = {}
+        remaining = list(document_ids)
+        for name in self.collection_names:
+            if not remaining:
+                break
+            cursor = self.db[name].find(
+                {"_id": {"$in": remaining}, "user_id": self.user_id}, projection
+            )
+            async for document in cursor:
+                found[document["_id"]] = (document, name)
+            remaining = [i for i in remaining if i not in found]
+        return found
+
+    async def bulk(self, items: List[dict], projection=None) -> List[dict]:
+        """
+        Applique un lot d'opérations.
+
+        Chaque élément porte "action" ("create", "update" ou "delete") et,
+        selon l'action, "document" (création), "id" et "update". Un élément
+        ayant déjà un "status" (invalide) est ignoré.
+
+        Returns:
+            Les éléments complétés : "status", "error", "id" (créations),
+            "collection" et "previous" (document avant modification, réduit
+            à `projection`)
+        """
+        pending = [item for item in items if not item.get("status")]
+        targets = [item["id"] for item in pending if item["action"] != "create"]
+        located = await self.locate(targets, projection) if targets else {}
+
+        operations: Dict[str, List[Tuple[dict, Any]]] = {}
+        for item in pending:
+            if item["action"] == "create":
+                item["id"] = ObjectId()
+                document = {**item["document"], "_id": item["id"]}
+                document["user_id"] = self.user_id
+                item["document"] = document
+                name = self.collection_names[0]
+                operation = InsertOne(document)
+            else:
+                if item["id"] not in located:
+                    item["status"] = BULK_NOT_FOUND
+                    continue
+                item["previous"], name = located[item["id"]]
+                if item["action"] == "delete":
+                    operation = DeleteOne(self._filter(item["id"]))
+                else:
+                    operation = UpdateOne(self._filter(item["id"]), item["update"])
+            item["collection"] = name
+            operations.setdefault(name, []).append((item, operation))
+
+        for name, entries in operations.items():
+            report = await bulk_write_in_batches(
+                self.db[name], [operation for _, operation in entries]
+            )
+            for item, _ in entries:
+                item["status"] = BULK_OK
+            for error in report["errors"]:
+                item = entries[error["index"]][0]
+                item["status"] = BULK_ERROR
+                item["error"] = error["message"]
+            await self._check_untouched(name, [item for item, _ in entries], report)
+
+        return items
+
+    async def _check_untouched(self, name: str, items: List[dict], report) -> None:
+        """
+        Repère les opérations restées sans effet : document supprimé, déplacé
+        ou changé de propriétaire entre `locate` et l'écriture. Les compteurs
+        du bulk_write sont globaux ; on ne relit que s'ils ne tombent pas juste.
+        """
+        applied = [item for item in items if item["status"] == BULK_OK]
+        updates = [
+            item for item in applied if item["action"] not in ("create", "delete")
+        ]
+        deletes = [item for item in applied if item["action"] == "delete"]
+
+        if len(updates) != report["matched"]:
+            # Une modification a touché le document s'il est toujours à l'utilisateur
+            present = {
+                document["_id"]
+                async for document in self.db[name].find(
+                    {
+                        "_id": {"$in": [item["id"] for item in updates]},
+                        "user_id": self.user_id,
+                    },
+                    {"_id": 1},
+                )
+            }
+            for item in updates:
+                if item["id"] not in present:
+                    item["status"] = BULK_NOT_FOUND
+
+        if len(deletes) != report["deleted"]:
+            # Encore présent (sous un autre propriétaire) : la suppression n'a
+            # rien fait. Un document déjà supprimé par une requête concurrente
+            # reste "ok" : il n'existe plus, comme demandé.
+            remaining = {
+                document["_id"]
+                async for document in self.db[name].find(
+                    {"_id": {"$in": [item["id"] for item in deletes]}}, {"_id": 1}
+                )
+            }
+            for item in deletes:
+                if item["id"] in remaining:
+                    item["status"] = BULK_NOT_FOUND
@@ -0,0 +1,177 @@
+"""
+Cache des utilisateurs authentifiés (principals) de get_current_user.
+
+Chaque requête authentifiée relisait l'utilisateur dans `users`. Le
+UserModel est désormais gardé en mémoire quelques secondes, par
+(user_id, jti) du token, dans un LRU borné : un hit ne coûte que le
+décodage du JWT.
+
+Toute modification d'un utilisateur (mot de passe, profil, désactivation,
+suppression) doit appeler `invalidate_principal`. Avec plusieurs processus,
+PRINCIPAL_CACHE_CHANNEL=1 diffuse aussi l'invalidation aux autres workers
+par une collection plafonnée (`principal_invalidations`) ; sans canal, un
+autre worker peut servir une entrée périmée au plus PRINCIPAL_CACHE_TTL_SECONDS.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+# Diffusion des invalidations entre processus (collection plafonnée)
+PRINCIPAL_CACHE_CHANNEL = os.getenv("PRINCIPAL_CACHE_CHANNEL", "0") == "1"
+INVALIDATIONS_COLLECTION = "principal_invalidations"
+INVALIDATIONS_MAX_BYTES = 1024**2
+
+CacheKey = Tuple[str, Optional[str]]
+
+
+class PrincipalCache:
+    """
+    LRU à durée de vie courte : (user_id, jti) -> UserModel.
+
+    Une génération par utilisateur empêche une lecture commencée avant une
+    invalidation de réinsérer l'ancien utilisateur (voir `generation`).
+    """
+
+    def __init__(
+        self,
+        ttl: float = PRINCIPAL_CACHE_TTL_SECONDS,
+        max_size: int = PRINCIPAL_CACHE_SIZE,
+        clock=time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, object]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: str, jti: Optional[str]):
+        """UserModel en cache (copie), ou None"""
+        key = (user_id, jti)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            user = entry[1]
+        # Copie superficielle : une route ne modifie pas l'entrée partagée
+        return user.model_copy()
+
+    def generation(self, user_id: str) -> int:
+        """À lire avant la requête en base, puis à passer à `put`"""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, user_id: str, jti: Optional[str], user, generation: int) -> None:
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                # Invalidé pendant la lecture : l'utilisateur lu est peut-être périmé
+                return
+            self._entries[(user_id, jti)] = (self._clock() + self.ttl, user)
+            self._entries.move_to_end((user_id, jti))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """Retire toutes les entrées (tous tokens confondus) d'un utilisateur"""
+        user_id = str(user_id)
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+            self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+# Cache unique du processus
+principal_cache = PrincipalCache()
+
+
+async def invalidate_principal(db, user_id) -> None:
+    """Invalide l'utilisateur dans ce processus et, si le canal est actif, ailleurs"""
+    principal_cache.invalidate(str(user_id))
+    if not PRINCIPAL_CACHE_CHANNEL:
+        return
+    try:
+        await db[INVALIDATIONS_COLLECTION].insert_one(
+            {"user_id": str(user_id), "created_at": datetime.now(timezone.utc)}
+        )
+    except Exception as e:
+        # Les autres processus retrouveront l'utilisateur à jour après le TTL
+        logger.warning(f"⚠️ Invalidation de {user_id} non diffusée: {e}")
+
+
+class PrincipalInvalidationListener:
+    """
+    Applique les invalidations publiées par les autres processus
+    (PRINCIPAL_CACHE_CHANNEL=1), lancé au démarrage de l'API.
+
+    Usage:
+        listener = PrincipalInvalidationListener(db)
+        await listener.start()
+        ...
+        await listener.stop()
+    """
+
+    def __init__(self, db):
+        self.collection = db[INVALIDATIONS_COLLECTION]
+        self.db = db
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        try:
+            await self.db.create_collection(
+                INVALIDATIONS_COLLECTION, capped=True, size=INVALIDATIONS_MAX_BYTES
+            )
+        except CollectionInvalid:
+            pass
+        last = await self.collection.find_one({}, sort=[("$natural", -1)])
+        self._task = asyncio.create_task(self._listen(last["_id"] if last else None))
+        logger.info("📡 Canal d'invalidation des utilisateurs en écoute")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self, since) -> None:
+        while True:
+            query = {"_id": {"$gt": since}} if since is not None else {}
+            try:
+                cursor = self.collection.find(
+                    query, cursor_type=CursorType.TAILABLE_AWAIT, max_await_time_ms=1000
+                )
+                while cursor.alive:
+                    async for message in cursor:
+                        since = message["_id"]
+                        principal_cache.invalidate(message["user_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Canal d'invalidation interrompu: {e}")
+                # Sans canal fiable, on ne garde rien en cache au-delà du TTL
+                principal_cache.clear()
+            await asyncio.sleep(1)
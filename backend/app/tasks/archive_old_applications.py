@@ -1,162 +1,98 @@
+import asyncio
 import logging
 import os
-import pathlib
 from datetime import datetime, timedelta, timezone
-from pymongo import MongoClient
-from dotenv import load_dotenv
 
-# Configuration du logging standard
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-logger = logging.getLogger(__name__)
-
-# Chargement des variables d'environnement
-dotenv_path = pathlib.Path(__file__).parent.parent.parent.parent / ".env"
-load_dotenv(dotenv_path=dotenv_path)
+from app.database import get_database
+from app.services.application_archive import ARCHIVE_MODE, move_archived_applications
 
-# Configuration de la connexion MongoDB
-MONGO_USER = os.getenv("MONGO_USER")
-MONGO_PASSWORD = os.getenv("MONGO_PASSWORD")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
-MONGO_HOST = os.getenv("MONGO_HOST")
+logger = logging.getLogger(__name__)
 
 # Nombre de jours après lesquels une candidature est considérée comme "vieille"
-DAYS_THRESHOLD = 40  # au lieu de 45 jours
-
+DAYS_THRESHOLD = int(os.getenv("ARCHIVE_DAYS_THRESHOLD", "40"))
 
-def log_message(message):
-    """Log un message (anciennement envoyé à RabbitMQ)"""
-    logger.info(f"MESSAGE: {message}")
-    return True
+# Statuts des candidatures archivables
+ARCHIVABLE_STATUSES = ["Refusée", "Candidature envoyée"]
 
 
-def log_and_queue(level, message, **extra_data):
-    """Journalise sans envoyer à RabbitMQ"""
-    # Préparer le message enrichi
-    full_message = f"{message} | {extra_data if extra_data else ''}"
-
-    # Log standard
-    if level == "INFO":
-        logger.info(full_message)
-    elif level == "WARNING":
-        logger.warning(full_message)
-    elif level == "ERROR":
-        logger.error(full_message)
+def archive_query(cutoff_date: datetime) -> dict:
+    """
+    Candidatures à archiver : statut terminal, antérieures à la date limite.
+    Servie par l'index (archived, status, application_date).
+    """
+    return {
+        "archived": {"$ne": True},
+        "status": {"$in": ARCHIVABLE_STATUSES},
+        "application_date": {"$lt": cutoff_date},
+    }
 
 
-def archive_old_applications(mongo_uri=None, threshold_days=40):
+async def archive_old_applications(
+    threshold_days: int = DAYS_THRESHOLD, db=None
+) -> int:
     """
     Archive les candidatures rejetées ou envoyées datant de plus de X jours
 
+    Les dates de candidature sont des dates BSON (voir la migration
+    application_dates) : la comparaison se fait sur un datetime, et
+    l'archivage en un seul update_many. En mode ARCHIVE_MODE="move", les
+    candidatures archivées sont ensuite déplacées vers applications_archive.
+
     Args:
-        mongo_uri: URI de connexion MongoDB (optionnel)
         threshold_days: Nombre de jours avant archivage
+        db: base de données (par défaut celle de l'application)
 
     Returns:
         int: Nombre de candidatures archivées, -1 en cas d'erreur
     """
-    client = None
     try:
-        # Utiliser l'URI fourni ou construire depuis les variables d'environnement
-        if not mongo_uri:
-            mongo_uri = f"mongodb://{os.getenv('MONGO_USER')}:{os.getenv('MONGO_PASSWORD')}@{os.getenv('MONGO_HOST')}:27017/{os.getenv('DATABASE_NAME')}?authSource=admin"
-
-        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=6000)
-        db = client[os.getenv("DATABASE_NAME", "job_tracker")]
-
-        # Date limite unique en format naïve
-        today = datetime.now()
-        cutoff_date = (today - timedelta(days=threshold_days)).replace(tzinfo=None)
-
-        # Requête simplifiée
-        cutoff_date_str = cutoff_date.strftime("%Y-%m-%d")
-        query = {
-            "application_date": {"$lt": cutoff_date_str},
-            "status": {"$in": ["Refusée", "Candidature envoyée"]},
-            "archived": {"$ne": True},
-        }
-
-        # Log de la requête pour debug
-        log_and_queue("INFO", f"Requête MongoDB: {str(query)}")
-
-        # Compter le nombre de candidatures à archiver
-        count = db["applications"].count_documents(query)
-        log_and_queue("INFO", f"Nombre de candidatures à archiver: {count}")
-
-        # Si aucune candidature trouvée, faire l'échantillonnage
-        if count == 0:
-            # Examiner toutes les candidatures pour comprendre pourquoi
-            non_archived = db["applications"].count_documents(
-                {"archived": {"$ne": True}}
-            )
-            log_and_queue(
-                "INFO", f"Total de candidatures non archivées: {non_archived}"
-            )
+        db = db if db is not None else await get_database()
+        collection = db["applications"]
+
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=threshold_days)
+        query = archive_query(cutoff_date)
+
+        # Identifiants seuls (curseur projeté) pour le compte rendu
+        archived_ids = [
+            str(doc["_id"]) async for doc in collection.find(query, {"_id": 1})
+        ]
 
-            # Regarder les statuts disponibles
-            status_pipeline = [
-                {"$match": {"archived": {"$ne": True}}},
-                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
-            ]
-            statuses = list(db["applications"].aggregate(status_pipeline))
-            log_and_queue("INFO", f"Distribution des statuts: {statuses}")
-
-            log_and_queue("INFO", "Aucune candidature à archiver", count=0)
-            return 0
-
-        # Archivage normal
-        # Récupérer les candidatures à archiver
-        applications = list(db["applications"].find(query))
-
-        # Liste pour stocker les IDs des candidatures archivées
-        archived_ids = []
-
-        # Archiver chaque candidature
-        for app in applications:
-            app_id = app["_id"]
-            company = app.get("company", "Entreprise inconnue")
-            position = app.get("position", "Poste inconnu")
-            app_date = app.get("application_date", "Date inconnue")
-
-            # Mettre à jour le statut "archived"
-            result = db["applications"].update_one(
-                {"_id": app_id},
+        modified_count = 0
+        if archived_ids:
+            result = await collection.update_many(
+                query,
                 {"$set": {"archived": True, "updated_at": datetime.now(timezone.utc)}},
             )
+            modified_count = result.modified_count
+            logger.info(
+                f"Archivage terminé: {modified_count} candidatures archivées "
+                f"(antérieures au {cutoff_date:%Y-%m-%d})"
+            )
+            logger.debug(f"Candidatures archivées: {archived_ids}")
+        else:
+            logger.info("Aucune candidature à archiver")
+
+        # Mode chaud/froid : y compris les candidatures archivées à la main
+        if ARCHIVE_MODE == "move":
+            await move_archived_applications(db)
 
-            if result.modified_count > 0:
-                log_and_queue(
-                    "INFO", f"Candidature archivée: {company} - {position} ({app_date})"
-                )
-                archived_ids.append(str(app_id))
-            else:
-                log_and_queue(
-                    "WARNING", f"Échec de l'archivage: {company} - {position}"
-                )
-
-        # Envoyer un message de résumé
-        log_and_queue(
-            "INFO",
-            f"Archivage terminé: {len(archived_ids)} candidatures archivées sur {count}",
-            count=len(archived_ids),
-            archived_ids=archived_ids,
-        )
-
-        return len(archived_ids)
+        return modified_count
 
     except Exception as e:
-        error_message = f"Erreur lors de l'archivage des candidatures: {str(e)}"
-        log_and_queue("ERROR", error_message)
+        logger.error(f"Erreur lors de l'archivage des candidatures: {str(e)}")
         return -1
 
-    finally:
-        if client:
-            client.close()
-            log_and_queue("INFO", "Connexion MongoDB fermée")
+
+def archive_old_applications_sync(threshold_days: int = DAYS_THRESHOLD) -> int:
+    """Version synchrone pour l'intégration Airflow"""
+    return asyncio.run(archive_old_applications(threshold_days))
 
 
 if __name__ == "__main__":
     # Pour les tests manuels
-    result = archive_old_applications()
-    log_and_queue("INFO", f"Résultat de l'archivage: {result} candidatures archivées")
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    result = archive_old_applications_sync()
+    logger.info(f"Résultat de l'archivage: {result} candidatures archivées")
@@ -1,277 +1,221 @@
 import asyncio
-import re
 import logging
-from datetime import datetime, timedelta, timezone
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pymongo import UpdateOne
 from app.database import get_database
+from app.services.bulk_writes import BULK_BATCH_SIZE, bulk_write_in_batches
+from app.services.checkpoints import clear_checkpoint, load_checkpoint, save_checkpoint
+from app.services.offer_normalization import (
+    NORMALIZATION_PROJECTION,
+    NORMALIZATION_VERSION,
+    normalization_updates,
+)
+from app.services.offer_stats import (
+    apply_deltas,
+    changed_offer_deltas,
+    decrement_matching,
+    rebuild_offer_stats,
+)
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
 
+# Normalisation des offres existantes : taille des lots et du pool de processus
+NORMALIZE_BATCH_SIZE = int(os.getenv("NORMALIZE_BATCH_SIZE", str(BULK_BATCH_SIZE)))
+NORMALIZE_WORKERS = int(os.getenv("NORMALIZE_WORKERS", "0"))
+NORMALIZE_CHECKPOINT = "normalize_existing_data"
+
 
 # ======================================================================
-# FONCTIONS DE NORMALISATION
+# FONCTIONS DE NETTOYAGE
 # ======================================================================
 
 
-def normalize_city(city: str) -> str:
-    """Normalise les noms de villes pour éviter les doublons"""
-    if not city:
-        return "Non spécifié"
-
-    # Supprimer les codes postaux complets (ex: "44000 Nantes" -> "Nantes")
-    city = re.sub(r"^\d{5}\s+", "", city)
-
-    # Supprimer les codes postaux avec tiret (ex: "Nantes - 44" -> "Nantes")
-    city = re.sub(r"\s*-\s*\d+.*$", "", city)
-
-    # Supprimer les arrondissements avec tiret (ex: "Lyon - 01" -> "Lyon")
-    city = re.sub(r"\s*-\s*\d{2}$", "", city)
-
-    # Supprimer les arrondissements avec espace (ex: "LYON 01" -> "LYON")
-    city = re.sub(r"\s+\d{2}$", "", city)
-
-    # Supprimer les arrondissements avec "er", "ème", etc. (ex: "Lyon 1er" -> "Lyon")
-    city = re.sub(r"\s+\d{1,2}(er|ème|e)?$", "", city, flags=re.IGNORECASE)
-
-    # Supprimer les parenthèses et leur contenu (ex: "Lyon (Rhône)" -> "Lyon")
-    city = re.sub(r"\s*\([^)]*\)", "", city)
-
-    # Nettoyer les espaces multiples
-    city = re.sub(r"\s+", " ", city.strip())
-
-    # Capitaliser correctement (première lettre de chaque mot en majuscule)
-    return city.title() if city else "Non spécifié"
-
-
-def normalize_company(company: str) -> str:
-    """Normalise les noms d'entreprises pour éviter les doublons"""
-    if not company:
-        return "Non spécifié"
-
-    # Convertir en majuscules pour comparaison
-    normalized = company.upper()
-
-    # Supprimer les suffixes courants
-    suffixes = [" SAS", " SA", " SARL", " EURL", " SNC", " SCOP", " SASU", " SCIC"]
-    for suffix in suffixes:
-        if normalized.endswith(suffix):
-            normalized = normalized[: -len(suffix)]
-            break
-
-    # Nettoyer les espaces multiples
-    normalized = re.sub(r"\s+", " ", normalized.strip())
-
-    return normalized if normalized else "Non spécifié"
-
-
-def extract_domain(url: str) -> str:
-    """Extrait et normalise le domaine d'une URL"""
-    if not url:
-        return "Non spécifié"
-
-    try:
-        # Extraire le domaine
-        if "://" in url:
-            domain = url.split("://")[1].split("/")[0]
-        else:
-            domain = url.split("/")[0]
-
-        # Supprimer www.
-        if domain.startswith("www."):
-            domain = domain[4:]
-
-        return domain.lower()
-    except Exception:
-        return "Non spécifié"
+async def _compute_updates(offers: list, executor) -> list:
+    """Calcule les mises à jour d'un lot, dans le pool de processus s'il existe"""
+    if executor is None:
+        return normalization_updates(offers)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, normalization_updates, offers)
 
 
-# ======================================================================
-# FONCTIONS DE NETTOYAGE
-# ======================================================================
+async def normalize_existing_data(
+    batch_size: int = NORMALIZE_BATCH_SIZE, workers: int = NORMALIZE_WORKERS
+):
+    """
+    Normalise les données existantes en base.
 
+    Seules les offres dont la version de normalisation est absente ou
+    périmée sont lues, par lots triés sur _id. Chaque lot est écrit en un
+    bulk_write non ordonné puis le dernier _id traité est enregistré :
+    un traitement interrompu reprend là où il s'était arrêté.
 
-async def normalize_existing_data():
-    """Normalise les données existantes en base"""
+    Args:
+        batch_size: nombre d'offres lues et écrites par lot
+        workers: taille du pool de processus pour le calcul (0 = sur place)
+    """
     logger.info("🔄 Début de la normalisation des données existantes")
 
     db = await get_database()
     collection = db["job_offers"]
 
-    # Récupérer toutes les offres
-    offers = await collection.find({}).to_list(length=None)
-    logger.info(f"📊 {len(offers)} offres à traiter")
+    query = {"normalization_version": {"$ne": NORMALIZATION_VERSION}}
+    checkpoint = await load_checkpoint(db, NORMALIZE_CHECKPOINT)
+    last_id = None
+    if checkpoint and checkpoint.get("version") == NORMALIZATION_VERSION:
+        last_id = checkpoint.get("last_id")
+        logger.info(f"⏩ Reprise de la normalisation après {last_id}")
 
+    processed_count = 0
     updated_count = 0
     error_count = 0
 
-    for offer in offers:
-        try:
-            updates = {}
-
-            # Normaliser la ville
-            if offer.get("localisation"):
-                normalized_city = normalize_city(offer["localisation"])
-                if normalized_city != offer.get("normalized_city"):
-                    updates["normalized_city"] = normalized_city
-
-            # Normaliser l'entreprise
-            if offer.get("entreprise"):
-                normalized_company = normalize_company(offer["entreprise"])
-                if normalized_company != offer.get("normalized_company"):
-                    updates["normalized_company"] = normalized_company
-
-            # Normaliser le site web
-            if offer.get("url"):
-                normalized_site = extract_domain(offer["url"])
-                if normalized_site != offer.get("normalized_site"):
-                    updates["normalized_site"] = normalized_site
-
-            # Mettre à jour si nécessaire
-            if updates:
-                await collection.update_one({"_id": offer["_id"]}, {"$set": updates})
-                updated_count += 1
-
-        except Exception as e:
-            error_count += 1
-            logger.error(
-                f"💥 Erreur normalisation offre {offer.get('_id', 'unknown')}: {e}"
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    try:
+        while True:
+            batch_query = dict(query)
+            if last_id is not None:
+                batch_query["_id"] = {"$gt": last_id}
+
+            offers = (
+                await collection.find(batch_query, NORMALIZATION_PROJECTION)
+                .sort("_id", 1)
+                .limit(batch_size)
+                .to_list(length=batch_size)
             )
+            if not offers:
+                break
+
+            updates = await _compute_updates(offers, executor)
+            operations = [
+                UpdateOne({"_id": offer_id}, {"$set": changes})
+                for offer_id, changes in updates
+            ]
+            report = await bulk_write_in_batches(collection, operations, batch_size)
+
+            # Les champs normalisés alimentent offer_stats
+            failed = {error["index"] for error in report["errors"]}
+            changed = [
+                (offer, {**offer, **changes})
+                for index, (offer, (_, changes)) in enumerate(zip(offers, updates))
+                if index not in failed and len(changes) > 1
+            ]
+            await apply_deltas(db, changed_offer_deltas(changed))
+
+            processed_count += len(offers)
+            updated_count += len(changed)
+            error_count += len(failed)
+
+            last_id = offers[-1]["_id"]
+            await save_checkpoint(
+                db,
+                NORMALIZE_CHECKPOINT,
+                last_id=last_id,
+                version=NORMALIZATION_VERSION,
+            )
+            logger.debug(f"📦 {processed_count} offres normalisées (jusqu'à {last_id})")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    await clear_checkpoint(db, NORMALIZE_CHECKPOINT)
 
     logger.info(
-        f"✅ Normalisation terminée: {updated_count} offres mises à jour sur {len(offers)}"
+        f"✅ Normalisation terminée: {updated_count} offres mises à jour sur {processed_count}"
     )
     if error_count > 0:
         logger.warning(f"⚠️ {error_count} erreurs lors de la normalisation")
 
-    return {"normalized": updated_count, "total": len(offers), "errors": error_count}
-
-
-async def cleanup_old_offers(days: int = 6):
-    """Supprime les offres anciennes"""
-    logger.info(f"🗑️ Début du nettoyage des offres de plus de {days} jours")
-
-    db = await get_database()
-    collection = db["job_offers"]
-
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-    cutoff_date_str = cutoff_date.strftime("%Y-%m-%d %H:%M:%S")
-
-    try:
-        # Compter d'abord les offres à supprimer
-        count_to_delete = await collection.count_documents(
-            {"created_at": {"$lt": cutoff_date_str}}
-        )
-
-        if count_to_delete == 0:
-            logger.info("✅ Aucune offre ancienne à supprimer")
-            return {"deleted": 0}
+    return {
+        "normalized": updated_count,
+        "total": processed_count,
+        "errors": error_count,
+    }
 
-        # Supprimer les offres anciennes
-        result = await collection.delete_many({"created_at": {"$lt": cutoff_date_str}})
-
-        logger.info(
-            f"✅ Supprimé {result.deleted_count} offres anciennes sur {count_to_delete} identifiées"
-        )
-        return {"deleted": result.deleted_count}
 
-    except Exception as e:
-        logger.error(f"💥 Erreur lors du nettoyage: {e}")
-        return {"deleted": 0, "error": str(e)}
+# Survivant d'un groupe de doublons : l'offre vue le plus récemment
+SURVIVOR_SORT = {"last_seen": -1, "created_at": -1, "_id": -1}
 
 
-async def remove_duplicates():
-    """Supprime les doublons basés sur URL ou combinaison poste+entreprise+localisation"""
-    logger.info("🔍 Début de la suppression des doublons")
+async def _remove_duplicate_groups(db, field: str, batch_size: int) -> int:
+    """
+    Supprime les doublons partageant la même valeur de `field` en ne gardant
+    qu'un survivant par groupe.
 
-    db = await get_database()
+    L'agrégation ne conserve que la clé du groupe et l'_id du survivant
+    ($top), sans accumuler les documents : sa mémoire ne dépend pas de la
+    taille des groupes. Les suppressions se font par lots de groupes avec
+    delete_many({field: {$in: clés}, _id: {$nin: survivants}}).
+    """
     collection = db["job_offers"]
-
-    # Pipeline pour identifier les doublons par URL
-    url_duplicates_pipeline = [
-        {"$match": {"url": {"$nin": [None, ""]}}},
+    pipeline = [
+        {"$match": {field: {"$type": "string"}}},
         {
             "$group": {
-                "_id": "$url",
+                "_id": f"${field}",
                 "count": {"$sum": 1},
-                "docs": {"$push": {"id": "$_id", "created_at": "$created_at"}},
+                "survivor": {"$top": {"sortBy": SURVIVOR_SORT, "output": "$_id"}},
             }
         },
         {"$match": {"count": {"$gt": 1}}},
     ]
 
     deleted_count = 0
-
-    try:
-        # Traiter les doublons par URL
-        url_duplicates = await collection.aggregate(url_duplicates_pipeline).to_list(
-            length=None
-        )
-
-        for duplicate_group in url_duplicates:
-            # Garder le plus récent, supprimer les autres
-            docs = sorted(
-                duplicate_group["docs"], key=lambda x: x["created_at"], reverse=True
-            )
-            docs_to_delete = docs[1:]  # Tous sauf le premier (plus récent)
-
-            for doc in docs_to_delete:
-                await collection.delete_one({"_id": doc["id"]})
-                deleted_count += 1
-
-        logger.info(f"✅ Supprimé {deleted_count} doublons")
-        return {"deleted_duplicates": deleted_count}
-
-    except Exception as e:
-        logger.error(f"💥 Erreur lors de la suppression des doublons: {e}")
-        return {"deleted_duplicates": 0, "error": str(e)}
-
-
-async def cleanup_invalid_offers():
-    """Supprime les offres avec des données invalides ou incomplètes"""
-    logger.info("🧹 Début du nettoyage des offres invalides")
+    keys, survivors = [], []
+
+    async def flush():
+        nonlocal deleted_count
+        delete_filter = {field: {"$in": keys}, "_id": {"$nin": survivors}}
+        await decrement_matching(db, delete_filter)
+        result = await collection.delete_many(delete_filter)
+        deleted_count += result.deleted_count
+        keys.clear()
+        survivors.clear()
+
+    cursor = collection.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+    async for group in cursor:
+        keys.append(group["_id"])
+        survivors.append(group["survivor"])
+        if len(keys) >= batch_size:
+            await flush()
+
+    if keys:
+        await flush()
+
+    return deleted_count
+
+
+async def remove_duplicates(batch_size: int = BULK_BATCH_SIZE):
+    """
+    Supprime les doublons :
+    - exacts : même URL canonique (url_hash) ;
+    - approchés : même empreinte entreprise + poste + ville (fingerprint),
+      typiquement une offre publiée sur plusieurs sites.
+    """
+    logger.info("🔍 Début de la suppression des doublons")
 
     db = await get_database()
-    collection = db["job_offers"]
-
-    deleted_count = 0
 
     try:
-        # Supprimer les offres sans poste ni entreprise
-        result1 = await collection.delete_many(
-            {
-                "$or": [
-                    {"poste": {"$in": [None, "", "Poste non spécifié"]}},
-                    {
-                        "entreprise": {
-                            "$in": [
-                                None,
-                                "",
-                                "Entreprise non spécifiée",
-                                "Non spécifié",
-                            ]
-                        }
-                    },
-                ]
-            }
-        )
-        deleted_count += result1.deleted_count
-
-        # Supprimer les offres avec des URLs invalides
-        result2 = await collection.delete_many(
-            {
-                "url": {
-                    "$regex": "^(?!https?://).*"
-                }  # URLs qui ne commencent pas par http(s)://
-            }
-        )
-        deleted_count += result2.deleted_count
+        url_deleted = await _remove_duplicate_groups(db, "url_hash", batch_size)
+        near_deleted = await _remove_duplicate_groups(db, "fingerprint", batch_size)
+        deleted_count = url_deleted + near_deleted
 
-        logger.info(f"✅ Supprimé {deleted_count} offres invalides")
-        return {"deleted_invalid": deleted_count}
+        logger.info(
+            f"✅ Supprimé {deleted_count} doublons "
+            f"({url_deleted} par URL, {near_deleted} approchés)"
+        )
+        return {
+            "deleted_duplicates": deleted_count,
+            "url_duplicates": url_deleted,
+            "near_duplicates": near_deleted,
+        }
 
     except Exception as e:
-        logger.error(f"💥 Erreur lors du nettoyage des invalides: {e}")
-        return {"deleted_invalid": 0, "error": str(e)}
+        logger.error(f"💥 Erreur lors de la suppression des doublons: {e}")
+        return {"deleted_duplicates": 0, "error": str(e)}
 
 
 # ======================================================================
@@ -279,8 +223,13 @@ async def cleanup_invalid_offers():
 # ======================================================================
 
 
-async def cleanup_workflow(days: int = 6):
-    """Fonction principale de nettoyage pour Airflow"""
+async def cleanup_workflow():
+    """
+    Fonction principale de nettoyage pour Airflow.
+    L'expiration des anciennes offres est assurée par l'index TTL sur
+    last_seen (OFFER_RETENTION_DAYS) et les offres invalides sont refusées
+    dès l'ingestion : plus d'étape de suppression par balayage ici.
+    """
     logger.info("🚀 Début du workflow de nettoyage Airflow")
 
     results = {"start_time": datetime.now(timezone.utc), "steps": {}}
@@ -294,13 +243,9 @@ async def cleanup_workflow(days: int = 6):
         logger.info("🔍 Étape 2: Suppression des doublons")
         results["steps"]["duplicates"] = await remove_duplicates()
 
-        # Étape 3: Suppression des offres invalides
-        logger.info("🧹 Étape 3: Suppression des offres invalides")
-        results["steps"]["invalid"] = await cleanup_invalid_offers()
-
-        # Étape 4: Suppression des anciennes offres
-        logger.info(f"🗑️ Étape 4: Suppression des offres > {days} jours")
-        results["steps"]["old_offers"] = await cleanup_old_offers(days)
+        # Étape 3: Recalcul du rollup (les expirations TTL ne le décrémentent pas)
+        logger.info("📊 Étape 3: Reconstruction de offer_stats")
+        results["steps"]["stats"] = await rebuild_offer_stats(await get_database())
 
         # Résumé final
         results["end_time"] = datetime.now(timezone.utc)
@@ -308,12 +253,8 @@ async def cleanup_workflow(days: int = 6):
             results["end_time"] - results["start_time"]
         ).total_seconds()
 
-        total_deleted = sum(
-            [
-                results["steps"].get("duplicates", {}).get("deleted_duplicates", 0),
-                results["steps"].get("invalid", {}).get("deleted_invalid", 0),
-                results["steps"].get("old_offers", {}).get("deleted", 0),
-            ]
+        total_deleted = (
+            results["steps"].get("duplicates", {}).get("deleted_duplicates", 0)
         )
 
         total_normalized = results["steps"].get("normalize", {}).get("normalized", 0)
@@ -338,6 +279,6 @@ async def cleanup_workflow(days: int = 6):
         return results
 
 
-def cleanup_workflow_sync(days: int = 6):
+def cleanup_workflow_sync():
     """Version synchrone pour l'intégration Airflow"""
-    return asyncio.run(cleanup_workflow(days))
+    return asyncio.run(cleanup_workflow())
@@ -1,8 +1,29 @@
 import asyncio
+import hashlib
+import json
 import os
+from collections import Counter
 from datetime import datetime, timezone
 from app.services.job_offers import get_job_offers_from_query
 from app.database import get_database
+from app.services.bulk_writes import BULK_BATCH_SIZE, bulk_write_in_batches
+from app.services.offer_normalization import (
+    NORMALIZATION_VERSION,
+    normalized_fields,
+)
+from app.services.offer_validation import (
+    quarantine_offers,
+    split_offers,
+    valid_url,
+)
+from app.services.offer_stats import (
+    DIMENSIONS,
+    apply_deltas,
+    changed_offer_deltas,
+    offer_deltas,
+)
+from app.utils import url_hash
+from pymongo import UpdateOne
 import logging
 
 
@@ -26,7 +47,190 @@ def setup_logger():
 logger = setup_logger()
 
 
-async def collect_and_save_offers(query: str):
+# Champs qui définissent le contenu d'une offre (hors métadonnées de collecte)
+CONTENT_FIELDS = ("poste", "entreprise", "localisation", "date", "url", "source_url")
+
+
+def offer_key(offer: dict):
+    """
+    Clé d'identité d'une offre : hash de l'URL canonique si elle est exploitable,
+    sinon le triplet poste/entreprise/localisation.
+    """
+    key = url_hash(offer.get("url"))
+    if key:
+        return key
+    return (offer.get("poste"), offer.get("entreprise"), offer.get("localisation"))
+
+
+def offer_filter(offer: dict) -> dict:
+    """Filtre d'identité d'une offre (voir offer_key)"""
+    key = offer_key(offer)
+    if isinstance(key, str):
+        return {"url_hash": key}
+    poste, entreprise, localisation = key
+    return {"poste": poste, "entreprise": entreprise, "localisation": localisation}
+
+
+def offer_content_hash(offer: dict) -> str:
+    """Hash des champs significatifs, pour détecter une offre modifiée"""
+    content = json.dumps(
+        [offer.get(field) for field in CONTENT_FIELDS], ensure_ascii=False
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def build_offer_upsert(offer: dict, current_time: datetime) -> UpdateOne:
+    """Construit l'upsert complet d'une offre nouvelle ou modifiée"""
+    return UpdateOne(
+        offer_filter(offer),
+        {
+            "$set": {
+                "poste": offer["poste"],
+                "entreprise": offer["entreprise"],
+                "localisation": offer["localisation"],
+                "date": offer["date"],
+                "url": offer["url"],
+                "source_url": offer["source_url"],
+                "updated_at": current_time,
+                "last_seen": current_time,
+                "content_hash": offer["content_hash"],
+                "source_query": offer["source_query"],
+                "offer_id": offer["offer_id"],
+                "raw_data": offer["raw_data"],
+                **normalized_fields(offer),
+                "normalization_version": NORMALIZATION_VERSION,
+            },
+            "$setOnInsert": {"created_at": current_time, "first_seen": current_time},
+        },
+        upsert=True,
+    )
+
+
+def build_offer_touch(offer: dict, current_time: datetime) -> UpdateOne:
+    """Offre inchangée : seule la date de dernière observation avance"""
+    return UpdateOne(offer_filter(offer), {"$max": {"last_seen": current_time}})
+
+
+async def fetch_existing_offers(collection, offers: list, batch_size: int) -> dict:
+    """
+    Récupère le content_hash et les champs comptés dans offer_stats des offres
+    déjà en base, indexés par clé d'identité (voir offer_key).
+    """
+    existing = {}
+
+    for offset in range(0, len(offers), batch_size):
+        batch = offers[offset : offset + batch_size]
+        keys = [offer_key(offer) for offer in batch]
+        hashes = [key for key in keys if isinstance(key, str)]
+        clauses = [
+            offer_filter(offer)
+            for offer, key in zip(batch, keys)
+            if not isinstance(key, str)
+        ]
+        if hashes:
+            clauses.append({"url_hash": {"$in": hashes}})
+
+        cursor = collection.find(
+            {"$or": clauses},
+            {
+                "url_hash": 1,
+                "poste": 1,
+                "entreprise": 1,
+                "localisation": 1,
+                "content_hash": 1,
+                "created_at": 1,
+                **{field: 1 for field in DIMENSIONS.values()},
+            },
+        )
+        async for doc in cursor:
+            if doc.get("url_hash"):
+                existing[doc["url_hash"]] = doc
+            key = (doc.get("poste"), doc.get("entreprise"), doc.get("localisation"))
+            existing.setdefault(key, doc)
+
+    return existing
+
+
+def stats_deltas(rewritten: list, report: dict, current_time: datetime) -> Counter:
+    """
+    Variations de offer_stats après un lot d'upserts : +1 pour chaque offre
+    créée, ancienne version retirée / nouvelle ajoutée pour une offre modifiée.
+
+    Args:
+        rewritten: pour chaque opération, (offre, version en base) si l'offre
+            a été réécrite, None si seul last_seen a avancé
+    """
+    failed = {error["index"] for error in report["errors"]}
+    created, changed = [], []
+
+    for index, entry in enumerate(rewritten):
+        if entry is None or index in failed:
+            continue
+        offer, previous = entry
+        current = normalized_fields(offer)
+        if index in report["upserted_ids"]:
+            created.append({**current, "created_at": current_time})
+        elif previous:
+            changed.append(
+                (previous, {**current, "created_at": previous.get("created_at")})
+            )
+
+    deltas = offer_deltas(created, 1)
+    deltas.update(changed_offer_deltas(changed))
+    return deltas
+
+
+async def save_offers(collection, offers: list, batch_size: int = BULK_BATCH_SIZE):
+    """
+    Sauvegarde des offres enrichies par lots d'upserts.
+
+    Les offres déjà connues dont le contenu n'a pas changé ne reçoivent qu'un
+    `$max: {last_seen}` au lieu d'une réécriture complète du document.
+    Les compteurs de offer_stats sont ajustés pour les offres créées ou modifiées.
+
+    Returns:
+        Rapport de bulk_write_in_batches, complété par `saved`, `updated`
+        et `unchanged`
+    """
+    current_time = datetime.now(timezone.utc)
+
+    # Un même filtre deux fois dans un lot non ordonné créerait deux documents
+    unique_offers = list({offer_key(offer): offer for offer in offers}.values())
+
+    existing_offers = await fetch_existing_offers(collection, unique_offers, batch_size)
+
+    operations = []
+    rewritten = []
+    unchanged_count = 0
+    for offer in unique_offers:
+        offer["content_hash"] = offer_content_hash(offer)
+        previous = existing_offers.get(offer_key(offer))
+        if previous and previous.get("content_hash") == offer["content_hash"]:
+            operations.append(build_offer_touch(offer, current_time))
+            rewritten.append(None)
+            unchanged_count += 1
+        else:
+            operations.append(build_offer_upsert(offer, current_time))
+            rewritten.append((offer, previous))
+
+    report = await bulk_write_in_batches(collection, operations, batch_size)
+    for error in report["errors"]:
+        logger.error(
+            f"💥 Erreur sauvegarde offre #{error['index']}: {error['message']}"
+        )
+
+    await apply_deltas(
+        collection.database,
+        stats_deltas(rewritten, report, current_time),
+    )
+
+    report["saved"] = report["upserted"]
+    report["unchanged"] = unchanged_count
+    report["updated"] = max(report["matched"] - unchanged_count, 0)
+    return report
+
+
+async def collect_and_save_offers(query: str, batch_size: int = BULK_BATCH_SIZE):
     """Collecte et sauvegarde les offres d'emploi - Version optimisée logs"""
     try:
         logger.info(f"🚀 Collecte démarée: {query}")  # ✅ Log essentiel uniquement
@@ -56,114 +260,61 @@ async def collect_and_save_offers(query: str):
             logger.warning("⚠️ Aucune offre trouvée")
             return {"saved": 0, "updated": 0}
 
-        # ✅ Traitement avec logs réduits
-        enriched_offers = []
-        invalid_count = 0
-
-        for i, offer in enumerate(offers):
-            try:
-                if not isinstance(offer, dict):
-                    invalid_count += 1
-                    continue
-
-                url = offer.get("url") or offer.get("source_url") or ""
-
-                # ✅ Accepter même sans URL valide (ne pas skip systématiquement)
-                if url and not url.startswith("http"):
-                    url = None  # Standardiser plutôt que rejeter
-
-                enriched_offer = {
-                    "poste": str(offer.get("poste") or "Poste non spécifié"),
-                    "entreprise": str(
-                        offer.get("entreprise") or "Entreprise non spécifiée"
-                    ),
-                    "localisation": offer.get("localisation"),
-                    "date": offer.get("date"),
-                    "url": url,
-                    "source_url": offer.get("source_url"),
-                    "updated_at": datetime.now(timezone.utc),
-                    "source_query": query,
-                    "offer_id": str(offer.get("id", "")),
-                    "raw_data": offer,
-                }
-                enriched_offers.append(enriched_offer)
-
-            except Exception as e:
-                invalid_count += 1
-                logger.error(f"💥 Erreur Enrichissement: {e}")
-                # ✅ Log groupé plutôt qu'individuel
-                continue
-
-        # ✅ Log de résumé plutôt que détaillé
-        if invalid_count > 0:
-            logger.warning(f"⚠️ {invalid_count} offres invalides ignorées")
+        # ✅ Validation : les offres incomplètes partent en quarantaine
+        db = await get_database()
+        valid_offers, rejected = split_offers(offers)
+        rejected_reasons = await quarantine_offers(db, rejected, query)
+
+        if rejected:
+            logger.warning(
+                f"⚠️ {len(rejected)} offres rejetées: {dict(rejected_reasons)}"
+            )
+
+        enriched_offers = [
+            {
+                "poste": str(offer["poste"]).strip(),
+                "entreprise": str(offer["entreprise"]).strip(),
+                "localisation": offer.get("localisation"),
+                "date": offer.get("date"),
+                # URL non exploitable : standardisée à None plutôt que rejetée
+                "url": valid_url(offer),
+                "source_url": offer.get("source_url"),
+                "source_query": query,
+                "offer_id": str(offer.get("id", "")),
+                "raw_data": offer,
+            }
+            for offer in valid_offers
+        ]
 
         if not enriched_offers:
-            logger.warning("⚠️ Aucune offre valide après enrichissement")
-            return {"saved": 0, "updated": 0}
+            logger.warning("⚠️ Aucune offre valide après validation")
+            return {"saved": 0, "updated": 0, "rejected": len(rejected)}
 
         # logger.info(f"✅ {len(enriched_offers)} offres enrichies")
 
-        # ✅ Sauvegarde optimisée
-        db = await get_database()
-        collection = db["job_offers"]
-
-        saved_count = 0
-        updated_count = 0
-        error_count = 0
-
-        for offer in enriched_offers:
-            try:
-                # ✅ Filtre intelligent pour éviter doublons
-                if offer.get("url"):
-                    query_filter = {"url": offer["url"]}
-                else:
-                    query_filter = {
-                        "poste": offer["poste"],
-                        "entreprise": offer["entreprise"],
-                        "localisation": offer["localisation"],
-                    }
-
-                # ✅ Correction du conflit created_at
-                current_time = datetime.now(timezone.utc)
-
-                result = await collection.update_one(
-                    query_filter,
-                    {
-                        "$set": {
-                            "poste": offer["poste"],
-                            "entreprise": offer["entreprise"],
-                            "localisation": offer["localisation"],
-                            "date": offer["date"],
-                            "url": offer["url"],
-                            "source_url": offer["source_url"],
-                            "updated_at": current_time,
-                            "source_query": offer["source_query"],
-                            "offer_id": offer["offer_id"],
-                            "raw_data": offer["raw_data"],
-                        },
-                        "$setOnInsert": {"created_at": current_time},
-                    },
-                    upsert=True,
-                )
-
-                if result.upserted_id:
-                    saved_count += 1
-                else:
-                    updated_count += 1
+        # ✅ Sauvegarde groupée (bulk_write non ordonné)
+        report = await save_offers(db["job_offers"], enriched_offers, batch_size)
 
-            except Exception as e:
-                error_count += 1
-                logger.error(f"💥 Erreur Enrichissement : {e}")
-                continue
+        saved_count = report["saved"]
+        updated_count = report["updated"]
+        unchanged_count = report["unchanged"]
+        error_count = len(report["errors"])
 
         # ✅ Log final de résumé uniquement
-        logger.info(f"🎯 Terminé: {saved_count} créées, {updated_count} mises à jour")
+        logger.info(
+            f"🎯 Terminé: {saved_count} créées, {updated_count} mises à jour, "
+            f"{unchanged_count} inchangées"
+        )
 
         if error_count > 0:
             logger.warning(f"⚠️ {error_count} erreurs de sauvegarde")
 
-        return {"saved": saved_count, "updated": updated_count}
+        return {
+            "saved": saved_count,
+            "updated": updated_count,
+            "unchanged": unchanged_count,
+            "rejected": len(rejected),
+        }
 
     except Exception as e:
         logger.error(f"💥 Erreur collecte: {e}")
@@ -1,5 +1,11 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 from bson import ObjectId
 
+# Paramètres de tracking ignorés lors de la canonicalisation des URLs
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "ref", "source", "origin"}
+
 
 def serialize_mongodb_doc(doc):
     """
@@ -37,3 +43,43 @@ def capitalize_words(text):
 
     # Sépare les mots et capitalise chacun d'eux
     return " ".join(word.capitalize() for word in text.split())
+
+
+def canonicalize_url(url):
+    """
+    Retourne la forme canonique d'une URL pour qu'une même page ait une seule clé.
+
+    Exemples:
+        "HTTPS://WWW.Site.com/jobs/?utm_source=x&b=2&a=1#top"
+            -> "https://site.com/jobs?a=1&b=2"
+    """
+    if not url:
+        return None
+
+    parts = urlsplit(url.strip())
+    if parts.scheme.lower() not in ("http", "https") or not parts.netloc:
+        return None
+
+    netloc = parts.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    netloc = netloc.removesuffix(":80").removesuffix(":443")
+
+    # Supprimer les paramètres de tracking et trier les autres
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+
+    path = parts.path.rstrip("/") or "/"
+
+    return urlunsplit(("https", netloc, path, urlencode(query), ""))
+
+
+def url_hash(url):
+    """Hash stable (sha256) de l'URL canonique, utilisé comme clé d'index"""
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return None
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -0,0 +1,152 @@
+"""
+Benchmark : latence des autres routes pendant une rafale de connexions.
+
+Mesure la latence de GET /auth/me (p50/p95/p99) seule, puis pendant que
+--logins clients enchaînent des POST /auth/token. Avant le passage du
+hachage bcrypt dans un pool de threads, chaque connexion bloquait la
+boucle d'événements et le p99 de /auth/me suivait la durée de bcrypt.
+
+Usage (API démarrée) :
+    python benchmarks/login_storm.py --base-url http://localhost:8000 \\
+        --logins 20 --duration 15
+
+Un utilisateur de benchmark jetable est créé à chaque exécution.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+BENCH_PASSWORD = "BenchPassword123"
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    return {
+        "count": len(ordered),
+        "p50": statistics.median(ordered),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": ordered[-1],
+    }
+
+
+async def ensure_user(client: httpx.AsyncClient, username: str) -> str:
+    """Crée l'utilisateur et renvoie un token d'accès"""
+    await client.post(
+        "/auth/register",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": BENCH_PASSWORD,
+            "full_name": "Benchmark",
+        },
+    )
+    response = await client.post(
+        "/auth/token", data={"username": username, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def probe(
+    client: httpx.AsyncClient, token: str, stop: asyncio.Event, interval: float
+) -> List[float]:
+    """Latences (ms) de /auth/me jusqu'à `stop`"""
+    latencies = []
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/auth/me", headers=headers)
+        if response.status_code == 200:
+            latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_loop(
+    client: httpx.AsyncClient, username: str, stop: asyncio.Event
+) -> List[float]:
+    """Latences (ms) des connexions enchaînées jusqu'à `stop`"""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.post(
+            "/auth/token", data={"username": username, "password": BENCH_PASSWORD}
+        )
+        if response.status_code == 200:
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def phase(
+    base_url: str, token: str, username: str, logins: int, duration: float
+) -> Dict[str, Dict[str, float]]:
+    limits = httpx.Limits(max_connections=logins + 10)
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=60, limits=limits
+    ) as client:
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, token, stop, interval=0.02))
+        login_tasks = [
+            asyncio.create_task(login_loop(client, username, stop))
+            for _ in range(logins)
+        ]
+        await asyncio.sleep(duration)
+        stop.set()
+        me = await probe_task
+        login_latencies = [latency for task in login_tasks for latency in await task]
+
+    return {"me": percentiles(me), "login": percentiles(login_latencies)}
+
+
+def print_phase(title: str, result: Dict[str, Dict[str, float]], duration: float):
+    me, login = result["me"], result["login"]
+    print(f"\n== {title}")
+    print(
+        f"/auth/me    : {me['count']} req, p50 {me['p50']:.1f} ms, "
+        f"p95 {me['p95']:.1f} ms, p99 {me['p99']:.1f} ms, max {me['max']:.1f} ms"
+    )
+    if login["count"]:
+        print(
+            f"/auth/token : {login['count'] / duration:.1f} connexions/s, "
+            f"p50 {login['p50']:.1f} ms, p99 {login['p99']:.1f} ms"
+        )
+
+
+async def main(base_url: str, logins: int, duration: float) -> int:
+    username = f"bench_{uuid.uuid4().hex[:8]}"
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        try:
+            token = await ensure_user(client, username)
+        except httpx.HTTPError as e:
+            print(f"❌ Impossible de préparer l'utilisateur de benchmark: {e}")
+            return 1
+
+    baseline = await phase(base_url, token, username, 0, duration)
+    print_phase("Sans connexions concurrentes", baseline, duration)
+
+    storm = await phase(base_url, token, username, logins, duration)
+    print_phase(f"Pendant {logins} connexions concurrentes", storm, duration)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark rafale de connexions")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.base_url, args.logins, args.duration)))
@@ -1,10 +1,15 @@
 import asyncio
+import hashlib
 import os
 import tempfile
+import time
 import json
 import logging
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+
+from app.llm.governor import LLMBudgetExceeded, LLMCircuitOpen, governor
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, LLMConfig
 from crawl4ai.async_configs import BrowserConfig, CacheMode
 from crawl4ai.extraction_strategy import LLMExtractionStrategy
@@ -28,6 +33,11 @@ _browser_config = None
 _crawl_config = None
 _api_key_cache = None
 
+# Tokens réservés auprès du régulateur LLM par page crawlée (réconciliés ensuite)
+CRAWL_PAGE_TOKENS = int(os.getenv("CRAWL_PAGE_TOKENS", "8000"))
+# Statut d'une URL refusée par le régulateur (budget épuisé, disjoncteur ouvert)
+NOT_CRAWLED = "not_crawled"
+
 
 def get_shared_browser_config() -> BrowserConfig:
     """Configuration navigateur partagée et réutilisable"""
@@ -142,11 +152,24 @@ async def crawl_single_job_url_optimized(
     """Version optimisée qui réutilise un crawler et une config existants"""
     # logger.debug(f"🕷️ Crawl optimisé de: {url}")
 
+    started = time.perf_counter()
+    tokens_before = _llm_tokens_used(config)
+
     try:
-        result = await crawler.arun(url=url, config=config)
+        # Filtre + extraction LLM : réservation auprès du régulateur global
+        async with governor.limit(tokens=CRAWL_PAGE_TOKENS, requests=2) as lease:
+            result = await crawler.arun(url=url, config=config)
+            lease.record(_llm_tokens_used(config) - tokens_before)
 
         logger.debug(f"📊 Crawl terminé - Success: {result.success}")
 
+        # Métriques pour le registre de crawl
+        metrics = {
+            "latency_ms": int((time.perf_counter() - started) * 1000),
+            "tokens": _llm_tokens_used(config) - tokens_before,
+            "content_hash": _content_hash(result.markdown),
+        }
+
         if result.success and result.extracted_content:
             logger.debug("✅ Contenu extrait, parsing JSON...")
 
@@ -165,6 +188,7 @@ async def crawl_single_job_url_optimized(
                     "status": "success",
                     "offers_count": len(offers),
                     "offers": offers,
+                    **metrics,
                 }
 
             except json.JSONDecodeError as e:
@@ -174,6 +198,7 @@ async def crawl_single_job_url_optimized(
                     "status": "json_error",
                     "error": str(e),
                     "raw_content": result.extracted_content[:200] + "...",
+                    **metrics,
                 }
         else:
             error_msg = result.error_message or "Aucun contenu extrait"
@@ -182,11 +207,47 @@ async def crawl_single_job_url_optimized(
                 "url": url,
                 "status": "failed",
                 "error": error_msg,
+                **metrics,
             }
 
+    except (LLMBudgetExceeded, LLMCircuitOpen) as e:
+        # Appel refusé par le régulateur : la page n'a pas été crawlée
+        logger.warning(f"🛑 Crawl de {url} non lancé: {e}")
+        return {"url": url, "status": NOT_CRAWLED, "error": str(e)}
+
     except Exception as e:
         logger.error(f"💥 Exception lors du crawl de {url}: {e}")
-        return {"url": url, "status": "exception", "error": str(e)}
+        return {
+            "url": url,
+            "status": "exception",
+            "error": str(e),
+            "latency_ms": int((time.perf_counter() - started) * 1000),
+            "tokens": _llm_tokens_used(config) - tokens_before,
+        }
+
+
+def _llm_tokens_used(config: CrawlerRunConfig) -> int:
+    """
+    Total des tokens consommés par les stratégies LLM d'une config partagée.
+    Avec plusieurs crawls concurrents, le delta par URL reste une approximation.
+    """
+    strategies = [
+        config.extraction_strategy,
+        getattr(config.markdown_generator, "content_filter", None),
+    ]
+    total = 0
+    for strategy in strategies:
+        usage = getattr(strategy, "total_usage", None)
+        total += getattr(usage, "total_tokens", 0) or 0
+    return total
+
+
+def _content_hash(markdown) -> Optional[str]:
+    """Hash du contenu markdown brut d'une page (détection de changement)"""
+    raw = getattr(markdown, "raw_markdown", markdown)
+    if not raw:
+        return None
+    return hashlib.sha256(str(raw).encode("utf-8")).hexdigest()
 
 
 # =====================================================================
@@ -194,8 +255,53 @@ async def crawl_single_job_url_optimized(
 # =====================================================================
 
 
+class CrawlerPool:
+    """
+    Pool de navigateurs partagés : chaque crawler est démarré une fois puis
+    prêté aux tâches concurrentes, au lieu d'un lancement de navigateur par URL.
+
+    Usage:
+        async with CrawlerPool(size=3) as pool:
+            async with pool.crawler() as crawler:
+                await get_filtered_markdown(url, crawler=crawler)
+    """
+
+    def __init__(self, size: int = 3):
+        self.size = max(1, size)
+        self._crawlers: List[AsyncWebCrawler] = []
+        self._available: asyncio.Queue = asyncio.Queue()
+
+    async def __aenter__(self) -> "CrawlerPool":
+        for _ in range(self.size):
+            crawler = AsyncWebCrawler(config=get_shared_browser_config())
+            await crawler.start()
+            self._crawlers.append(crawler)
+            self._available.put_nowait(crawler)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        for crawler in self._crawlers:
+            try:
+                await crawler.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Fermeture du crawler impossible: {e}")
+        self._crawlers.clear()
+
+    @asynccontextmanager
+    async def crawler(self):
+        """Emprunte un crawler du pool (attend qu'un crawler se libère)"""
+        crawler = await self._available.get()
+        try:
+            yield crawler
+        finally:
+            self._available.put_nowait(crawler)
+
+
 async def get_filtered_markdown(
-    url: str, api_key: Optional[str] = None, include_raw_markdown: bool = False
+    url: str,
+    api_key: Optional[str] = None,
+    include_raw_markdown: bool = False,
+    crawler: Optional[AsyncWebCrawler] = None,
 ) -> Dict[str, Any]:
     """
     Récupère le markdown filtré d'une URL avec le filtre LLM
@@ -204,6 +310,8 @@ async def get_filtered_markdown(
         url: URL à crawler
         api_key: Clé API OpenAI (optionnelle)
         include_raw_markdown: Inclure aussi le markdown non filtré
+        crawler: crawler déjà démarré (voir CrawlerPool) ; sinon un navigateur
+            est lancé pour cette seule URL
 
     Returns:
         Dict contenant le markdown filtré et les métadonnées
@@ -279,43 +387,53 @@ async def get_filtered_markdown(
             markdown_generator=md_generator,
         )
 
-        # ✅ Crawler
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            logger.debug("📱 Crawler initialisé pour extraction markdown")
-            result = await crawler.arun(url=url, config=crawl_config)
-            logger.info(f"📊 Crawl terminé - Success: {result.success}")
+        # ✅ Crawler (partagé si fourni), filtre LLM sous le régulateur global
+        async with governor.limit(tokens=CRAWL_PAGE_TOKENS) as lease:
+            if crawler is not None:
+                result = await crawler.arun(url=url, config=crawl_config)
+            else:
+                async with AsyncWebCrawler(config=browser_config) as own_crawler:
+                    logger.debug("📱 Crawler initialisé pour extraction markdown")
+                    result = await own_crawler.arun(url=url, config=crawl_config)
+            usage = getattr(content_filter, "total_usage", None)
+            lease.record(getattr(usage, "total_tokens", None))
 
-            if result.success:
-                filtered_markdown = result.markdown
+        logger.info(f"📊 Crawl terminé - Success: {result.success}")
 
-                # Métadonnées
-                metadata = {
-                    "url": url,
-                    "title": getattr(result, "title", None),
-                    "timestamp": getattr(result, "timestamp", None),
-                    "word_count": (
-                        len(filtered_markdown.split()) if filtered_markdown else 0
-                    ),
-                    "char_count": len(filtered_markdown) if filtered_markdown else 0,
-                }
+        if result.success:
+            filtered_markdown = result.markdown
 
-                return {
-                    "status": "success",
-                    "url": url,
-                    "filtered_markdown": filtered_markdown,
-                    "metadata": metadata,
-                }
+            # Métadonnées
+            metadata = {
+                "url": url,
+                "title": getattr(result, "title", None),
+                "timestamp": getattr(result, "timestamp", None),
+                "word_count": (
+                    len(filtered_markdown.split()) if filtered_markdown else 0
+                ),
+                "char_count": len(filtered_markdown) if filtered_markdown else 0,
+            }
 
-            else:
-                error_msg = result.error_message or "Échec du crawl"
-                logger.error(f"❌ Crawl échoué pour {url}: {error_msg}")
+            return {
+                "status": "success",
+                "url": url,
+                "filtered_markdown": filtered_markdown,
+                "metadata": metadata,
+            }
 
-                return {
-                    "url": url,
-                    "status": "failed",
-                    "error": error_msg,
-                    "fit_markdown": None,
-                }
+        else:
+            error_msg = result.error_message or "Échec du crawl"
+            logger.error(f"❌ Crawl échoué pour {url}: {error_msg}")
+
+            return {
+                "url": url,
+                "status": "failed",
+                "error": error_msg,
+                "fit_markdown": None,
+            }
+    except (LLMBudgetExceeded, LLMCircuitOpen):
+        # Refus du régulateur : à l'appelant de décider (report, arrêt du passage)
+        raise
     except Exception as e:
         logger.error(f"💥 Exception lors du crawl markdown de {url}: {e}")
 
@@ -339,14 +457,29 @@ async def crawl_and_extract_jobs_optimized(
     filter_keywords: Optional[List[str]] = None,
     filter_locations: Optional[List[str]] = None,
     filter_companies: Optional[List[str]] = None,
+    ledger=None,
+    max_urls: Optional[int] = None,
 ) -> Dict[str, Any]:
-    """Version optimisée qui réutilise les configurations"""
+    """
+    Version optimisée qui réutilise les configurations
+
+    Args:
+        ledger: registre de crawl optionnel (voir app.services.crawl_ledger),
+            utilisé pour ignorer les URLs fraîches et prioriser les plus rentables
+        max_urls: nombre maximum d'URLs à crawler après priorisation
+    """
 
     if not api_key:
         api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY manquante")
 
+    skipped_urls = []
+    if ledger is not None:
+        urls, skipped_urls = await ledger.plan(urls)
+    if max_urls is not None:
+        urls = urls[:max_urls]
+
     try:
         #  Créer les configurations une seule fois
         browser_config = get_shared_browser_config()
@@ -390,6 +523,12 @@ async def crawl_and_extract_jobs_optimized(
                         offer["source_url"] = result["url"]
                         all_offers.append(offer)
 
+        if ledger is not None:
+            # Une URL non crawlée reste à crawler lors de la prochaine collecte
+            await ledger.record_many(
+                [r for r in processed_results if r.get("status") != NOT_CRAWLED]
+            )
+
         # ✅ Filtrage si nécessaire
         if filter_keywords or filter_locations or filter_companies:
             logger.info("🔍 Application des filtres...")
@@ -400,6 +539,7 @@ async def crawl_and_extract_jobs_optimized(
         # ✅ Résumé
         summary = {
             "total_urls": len(urls),
+            "skipped_urls": len(skipped_urls),
             "successful_crawls": sum(
                 1 for r in processed_results if r.get("status") == "success"
             ),
@@ -408,6 +548,7 @@ async def crawl_and_extract_jobs_optimized(
 
         logger.info("🎯 Pipeline optimisé terminé:")
         logger.info(f"  📊 URLs: {summary['total_urls']}")
+        logger.info(f"  ⏭️ Ignorées: {summary['skipped_urls']}")
         logger.info(f"  ✅ Succès: {summary['successful_crawls']}")
         logger.info(f"  📋 Offres: {summary['total_offers']}")
 
@@ -1,6 +1,5 @@
 from contextlib import asynccontextmanager
 
-import pymongo
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,6 +7,14 @@ from fastapi.staticfiles import StaticFiles
 
 
 from app.database import get_database
+from app.indexes import sync_indexes
+from app.pagination import NEXT_CURSOR_HEADER
+from app.services.description_events import ensure_events_collection
+from app.services.description_queue import DESCRIPTION_WORKERS, DescriptionWorkers
+from app.services.principal_cache import (
+    PRINCIPAL_CACHE_CHANNEL,
+    PrincipalInvalidationListener,
+)
 from app.routers import (
     auth_router,
     user_router,
@@ -20,21 +27,37 @@ from app.routers import (
 @asynccontextmanager
 async def lifespan(app):
     # Code de démarrage (remplace on_event("startup"))
+    workers = None
+    listener = None
     try:
         # Test réel de la connexion avec une commande ping
         db = await get_database()
         await db.command("ping")
         print("Connexion à la base de données établie avec succès")
 
-        # Créer les index nécessaires
-        await db["users"].create_index([("username", pymongo.ASCENDING)], unique=True)
-        await db["users"].create_index([("email", pymongo.ASCENDING)], unique=True)
+        # Synchroniser les index déclarés dans app/indexes.py
+        await sync_indexes(db)
+
+        # Workers de la file de génération des descriptions et leur progression
+        await ensure_events_collection(db)
+        if DESCRIPTION_WORKERS > 0:
+            workers = DescriptionWorkers(db)
+            workers.start()
+
+        # Invalidations du cache d'authentification publiées par les autres workers
+        if PRINCIPAL_CACHE_CHANNEL:
+            listener = PrincipalInvalidationListener(db)
+            await listener.start()
     except Exception as e:
         print(f"Erreur de connexion à la base de données: {e}")
 
     yield  # L'application s'exécute pendant cette période
 
     # Code d'arrêt (remplace on_event("shutdown"))
+    if workers:
+        await workers.stop()
+    if listener:
+        await listener.stop()
     print("Connexion à la base de données fermée")
 
 
@@ -53,6 +76,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Inclusion des routeurs
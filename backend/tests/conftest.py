@@ -48,6 +48,14 @@ async def get_test_database():
         client.close()
 
 
+@pytest.fixture
+async def test_db():
+    """Retourne directement la base de test (pour les tests hors API)."""
+    client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
+    yield client[DATABASE_NAME]
+    client.close()
+
+
 def override_dependencies():
     """Remplace les dépendances de l'application par celles de test."""
     app.dependency_overrides[get_database] = get_test_database
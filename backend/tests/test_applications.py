@@ -0,0 +1,100 @@
+import pytest
+
+
+@pytest.fixture
+def application_data():
+    """
+    Retourne des données pour créer une candidature de test (sans URL pour
+    ne pas déclencher la génération de description).
+    """
+    return {
+        "company": "Entreprise XYZ",
+        "position": "Développeur Full Stack",
+        "location": "Lyon",
+        "status": "Candidature envoyée",
+        "application_date": "2025-04-08T10:00:00Z",
+    }
+
+
+@pytest.fixture
+def create_application(client, auth_headers, application_data):
+    """
+    Fixture qui crée une candidature et la retourne.
+    """
+    response = client.post("applications/", json=application_data, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_get_application(client, auth_headers, create_application):
+    """
+    Teste la récupération d'une candidature par son identifiant.
+    """
+    response = client.get(
+        f"applications/{create_application['_id']}", headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["company"] == "Entreprise Xyz"
+
+
+def test_get_applications_cursor_pagination(client, auth_headers, application_data):
+    """
+    Teste la pagination par curseur de la liste des candidatures.
+    """
+    created_ids = []
+    for day in range(1, 6):
+        data = {**application_data, "application_date": f"2025-04-0{day}T10:00:00Z"}
+        response = client.post("applications/", json=data, headers=auth_headers)
+        assert response.status_code == 201
+        created_ids.append(response.json()["_id"])
+
+    first_page = client.get("applications/?limit=2", headers=auth_headers)
+    assert first_page.status_code == 200
+    assert len(first_page.json()) == 2
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    seen_ids = [app["_id"] for app in first_page.json()]
+    while cursor:
+        page = client.get(
+            f"applications/?limit=2&cursor={cursor}", headers=auth_headers
+        )
+        assert page.status_code == 200
+        seen_ids += [app["_id"] for app in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+
+    # Plus récentes d'abord, sans doublon ni perte
+    assert seen_ids == list(reversed(created_ids))
+
+
+def test_get_applications_invalid_cursor(client, auth_headers):
+    """
+    Teste qu'un curseur invalide est refusé.
+    """
+    response = client.get("applications/?cursor=invalide", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_get_applications_summary_view(client, auth_headers, create_application):
+    """
+    Teste la vue résumée : pas de description ni de notes, indicateurs calculés.
+    """
+    response = client.get("applications/?view=summary", headers=auth_headers)
+    assert response.status_code == 200
+    summary = response.json()[0]
+    assert summary["_id"] == create_application["_id"]
+    assert "description" not in summary
+    assert "notes" not in summary
+    assert summary["has_description"] is False
+    assert summary["notes_count"] == 0
+
+
+def test_get_applications_fields(client, auth_headers, create_application):
+    """
+    Teste la sélection de champs et le refus d'un champ inconnu.
+    """
+    response = client.get("applications/?fields=company,status", headers=auth_headers)
+    assert response.status_code == 200
+    assert set(response.json()[0]) == {"_id", "company", "status", "application_date"}
+
+    response = client.get("applications/?fields=company,secret", headers=auth_headers)
+    assert response.status_code == 400
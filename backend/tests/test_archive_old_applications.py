@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Response
+
+from app.pagination import fetch_merged_page
+from app.services.application_archive import (
+    ARCHIVE_COLLECTION,
+    find_application,
+    move_archived_applications,
+)
+from app.tasks.archive_old_applications import archive_old_applications
+
+
+async def test_archive_old_applications_uses_dates(test_db):
+    """
+    Teste que seules les candidatures terminées plus anciennes que le seuil
+    sont archivées, la comparaison portant sur des dates BSON.
+    """
+    now = datetime.now(timezone.utc)
+    user_id = f"archive-{now.timestamp()}"
+    old_refused = {
+        "user_id": user_id,
+        "status": "Refusée",
+        "application_date": now - timedelta(days=60),
+        "archived": False,
+    }
+    recent_refused = {**old_refused, "application_date": now - timedelta(days=5)}
+    old_interview = {**old_refused, "status": "Entretien"}
+    result = await test_db["applications"].insert_many(
+        [old_refused, recent_refused, old_interview]
+    )
+
+    archived = await archive_old_applications(threshold_days=40, db=test_db)
+
+    assert archived >= 1
+    flags = [
+        (await find_application(test_db, {"_id": _id}))[0]["archived"]
+        for _id in result.inserted_ids
+    ]
+    assert flags == [True, False, False]
+
+
+async def test_archived_applications_move_to_cold_collection(test_db):
+    """
+    Teste que les candidatures archivées quittent la collection chaude et
+    restent listées avec les autres, dans l'ordre des dates.
+    """
+    now = datetime.now(timezone.utc)
+    user_id = f"cold-{now.timestamp()}"
+    result = await test_db["applications"].insert_many(
+        [
+            {"user_id": user_id, "application_date": now, "archived": False},
+            {
+                "user_id": user_id,
+                "application_date": now - timedelta(days=90),
+                "archived": True,
+            },
+            {
+                "user_id": user_id,
+                "application_date": now - timedelta(days=1),
+                "archived": False,
+            },
+        ]
+    )
+    archived_id = result.inserted_ids[1]
+
+    await move_archived_applications(test_db)
+
+    assert await test_db["applications"].find_one({"_id": archived_id}) is None
+    _, collection_name = await find_application(test_db, {"_id": archived_id})
+    assert collection_name == ARCHIVE_COLLECTION
+
+    response = Response()
+    page = await fetch_merged_page(
+        [test_db["applications"], test_db[ARCHIVE_COLLECTION]],
+        {"user_id": user_id},
+        "application_date",
+        2,
+        response,
+    )
+    assert [doc["_id"] for doc in page] == [
+        result.inserted_ids[0],
+        result.inserted_ids[2],
+    ]
+    assert "X-Next-Cursor" in response.headers
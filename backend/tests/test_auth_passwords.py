@@ -0,0 +1,23 @@
+from passlib.context import CryptContext
+
+from app.auth import BCRYPT_ROUNDS, get_password_hash_async, verify_password_async
+
+
+async def test_password_hash_roundtrip_off_the_event_loop():
+    """Teste le hachage et la vérification via le pool de threads"""
+    hashed = await get_password_hash_async("TestPassword123")
+
+    assert await verify_password_async("TestPassword123", hashed) == (True, None)
+    assert (await verify_password_async("mauvais", hashed))[0] is False
+
+
+async def test_hash_with_another_cost_is_upgraded_on_login():
+    """Teste qu'un hash d'un autre coût bcrypt est refait à la vérification"""
+    old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS - 1)
+    old_hash = old_context.hash("TestPassword123")
+
+    valid, new_hash = await verify_password_async("TestPassword123", old_hash)
+
+    assert valid
+    assert new_hash and f"${BCRYPT_ROUNDS:02d}$" in new_hash
+    assert await verify_password_async("TestPassword123", new_hash) == (True, None)
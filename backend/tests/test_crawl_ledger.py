@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.crawl_ledger import CrawlLedger
+
+
+def test_failed_crawl_is_retried_before_freshness_window():
+    """
+    Teste qu'un échec ne rend pas l'URL fraîche : elle est retentée après un
+    délai qui double à chaque échec consécutif, plafonné par la fraîcheur.
+    """
+    ledger = CrawlLedger(
+        {"crawl_ledger": None}, freshness_hours=24, failure_backoff_minutes=30
+    )
+    now = datetime.now(timezone.utc)
+
+    assert ledger._retry_at(None) is None
+    assert ledger._retry_at({"last_crawled_at": now}) == now + timedelta(hours=24)
+    assert ledger._retry_at(
+        {"last_failed_at": now, "consecutive_failures": 1}
+    ) == now + timedelta(minutes=30)
+    assert ledger._retry_at(
+        {"last_failed_at": now, "consecutive_failures": 3}
+    ) == now + timedelta(minutes=120)
+    assert ledger._retry_at(
+        {"last_failed_at": now, "consecutive_failures": 20}
+    ) == now + timedelta(hours=24)
@@ -0,0 +1,30 @@
+from app.services.description_cache import (
+    DESCRIPTIONS_COLLECTION,
+    get_cached_description,
+    store_description,
+)
+from app.utils import url_hash
+
+
+async def test_cached_description_is_shared_by_canonical_url(test_db):
+    """Teste qu'une URL équivalente (paramètres de tracking) trouve la description"""
+    url = "https://example.com/offres/data-engineer-42"
+    await store_description(test_db, url, "# Data Engineer", "RÉSUMÉ: ...")
+
+    assert await get_cached_description(test_db, url) == "RÉSUMÉ: ..."
+    assert (
+        await get_cached_description(test_db, url + "?utm_source=linkedin")
+        == "RÉSUMÉ: ..."
+    )
+    assert await get_cached_description(test_db, "https://example.com/autre") is None
+
+
+async def test_cached_description_from_another_prompt_is_ignored(test_db):
+    """Teste qu'une entrée produite par une autre version du prompt est ignorée"""
+    url = "https://example.com/offres/ml-engineer-7"
+    await store_description(test_db, url, "# ML Engineer", "RÉSUMÉ: ...")
+    await test_db[DESCRIPTIONS_COLLECTION].update_one(
+        {"_id": url_hash(url)}, {"$set": {"prompt_version": 0}}
+    )
+
+    assert await get_cached_description(test_db, url) is None
@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from app.services.description_queue import (
+    DONE,
+    FAILED,
+    JOB_BACKOFF_MAX_SECONDS,
+    JOB_BACKOFF_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOBS_COLLECTION,
+    PENDING,
+    RUNNING,
+    backoff_delay,
+    claim_job,
+    complete_job,
+    enqueue_description,
+    fail_job,
+    get_latest_job,
+)
+
+
+def test_backoff_delay_is_exponential_and_capped():
+    """Teste que le délai double à chaque échec sans dépasser le plafond"""
+    assert backoff_delay(1) == JOB_BACKOFF_SECONDS
+    assert backoff_delay(2) == JOB_BACKOFF_SECONDS * 2
+    assert backoff_delay(3) == JOB_BACKOFF_SECONDS * 4
+    assert backoff_delay(100) == JOB_BACKOFF_MAX_SECONDS
+
+
+async def test_enqueue_is_idempotent_per_application_and_url(test_db):
+    """Teste qu'une même demande ne crée qu'un job, une autre URL un nouveau"""
+    application_id = ObjectId()
+    url = "https://example.com/offre/1"
+
+    first = await enqueue_description(test_db, application_id, url)
+    second = await enqueue_description(test_db, application_id, url)
+    other = await enqueue_description(test_db, application_id, url + "?v=2")
+
+    assert first["_id"] == second["_id"]
+    assert other["_id"] != first["_id"]
+    assert first["status"] == PENDING
+    assert (
+        await test_db[JOBS_COLLECTION].count_documents(
+            {"application_id": application_id}
+        )
+        == 2
+    )
+
+
+async def test_claim_lease_retry_and_completion(test_db):
+    """
+    Teste le cycle d'un job : prise sous bail, échec différé, reprise d'un
+    bail expiré, puis succès.
+    """
+    await test_db[JOBS_COLLECTION].delete_many({})
+    job = await enqueue_description(test_db, ObjectId(), "https://example.com/a")
+
+    claimed = await claim_job(test_db, "worker-a")
+    assert claimed["_id"] == job["_id"]
+    assert claimed["status"] == RUNNING
+    assert claimed["attempts"] == 1
+    # Un seul worker détient le job
+    assert await claim_job(test_db, "worker-b") is None
+
+    status = await fail_job(test_db, claimed, "worker-a", RuntimeError("timeout"))
+    assert status == PENDING
+    stored = await test_db[JOBS_COLLECTION].find_one({"_id": job["_id"]})
+    assert stored["last_error"] == "timeout"
+    # Le nouvel essai est différé
+    assert await claim_job(test_db, "worker-b") is None
+
+    # Bail expiré (worker arrêté) : le job est repris par un autre worker
+    await test_db[JOBS_COLLECTION].update_one(
+        {"_id": job["_id"]},
+        {
+            "$set": {
+                "status": RUNNING,
+                "lease_owner": "worker-a",
+                "lease_expires_at": datetime.now(timezone.utc) - timedelta(seconds=1),
+            }
+        },
+    )
+    reclaimed = await claim_job(test_db, "worker-b")
+    assert reclaimed["_id"] == job["_id"]
+    assert reclaimed["lease_owner"] == "worker-b"
+
+    # L'ancien détenteur ne peut plus conclure le job
+    await complete_job(test_db, reclaimed, "worker-a")
+    stored = await test_db[JOBS_COLLECTION].find_one({"_id": job["_id"]})
+    assert stored["status"] == RUNNING
+
+    await complete_job(test_db, reclaimed, "worker-b")
+    stored = await test_db[JOBS_COLLECTION].find_one({"_id": job["_id"]})
+    assert stored["status"] == DONE
+    assert "lease_owner" not in stored
+
+
+async def test_failed_job_is_requeued_on_new_request(test_db):
+    """Teste qu'un job abandonné est relancé par une nouvelle demande"""
+    application_id = ObjectId()
+    url = "https://example.com/b"
+    job = await enqueue_description(test_db, application_id, url)
+    await test_db[JOBS_COLLECTION].update_one(
+        {"_id": job["_id"]},
+        {"$set": {"status": FAILED, "attempts": JOB_MAX_ATTEMPTS}},
+    )
+
+    requeued = await enqueue_description(test_db, application_id, url)
+
+    assert requeued["_id"] == job["_id"]
+    assert requeued["status"] == PENDING
+    assert requeued["attempts"] == 0
+
+
+async def test_regenerate_requeues_done_job_for_current_url(test_db):
+    """
+    Teste qu'un retour à une URL déjà décrite relance son job terminé, et que
+    le dernier job suivi est celui de l'URL actuelle.
+    """
+    application_id = ObjectId()
+    first_url = "https://example.com/c"
+    job = await enqueue_description(test_db, application_id, first_url)
+    await test_db[JOBS_COLLECTION].update_one(
+        {"_id": job["_id"]}, {"$set": {"status": DONE}}
+    )
+    await enqueue_description(test_db, application_id, first_url + "?v=2")
+
+    unchanged = await enqueue_description(test_db, application_id, first_url)
+    assert unchanged["status"] == DONE
+
+    requeued = await enqueue_description(
+        test_db, application_id, first_url, regenerate=True
+    )
+    assert requeued["_id"] == job["_id"]
+    assert requeued["status"] == PENDING
+
+    latest = await get_latest_job(test_db, application_id, first_url)
+    assert latest["_id"] == job["_id"]
+
+
+async def test_expired_leases_fail_after_max_attempts(test_db):
+    """
+    Teste qu'un job dont le worker meurt à chaque essai (bail jamais rendu)
+    est abandonné après JOB_MAX_ATTEMPTS baux expirés.
+    """
+    await test_db[JOBS_COLLECTION].delete_many({})
+    job = await enqueue_description(test_db, ObjectId(), "https://example.com/d")
+
+    for attempt in range(1, JOB_MAX_ATTEMPTS + 1):
+        claimed = await claim_job(test_db, f"worker-{attempt}")
+        assert claimed["_id"] == job["_id"]
+        assert claimed["attempts"] == attempt
+        # Le processus tombe : le bail expire sans fail_job
+        await test_db[JOBS_COLLECTION].update_one(
+            {"_id": job["_id"]},
+            {
+                "$set": {
+                    "lease_expires_at": datetime.now(timezone.utc)
+                    - timedelta(seconds=1)
+                }
+            },
+        )
+
+    assert await claim_job(test_db, "worker-last") is None
+    stored = await test_db[JOBS_COLLECTION].find_one({"_id": job["_id"]})
+    assert stored["status"] == FAILED
+    assert "lease_owner" not in stored
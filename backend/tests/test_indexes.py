@@ -0,0 +1,54 @@
+from app.indexes import (
+    INDEXES,
+    OFFER_RETENTION_DAYS,
+    explain_hot_queries,
+    sync_indexes,
+)
+
+
+async def test_sync_indexes_is_idempotent(test_db):
+    """
+    Teste que la synchronisation crée les index déclarés une seule fois.
+    """
+    await sync_indexes(test_db)
+    report = await sync_indexes(test_db)
+
+    assert set(report) == set(INDEXES)
+    for entry in report.values():
+        assert entry["missing"] == []
+        assert entry["created"] == []
+        assert entry["errors"] == []
+
+
+async def test_hot_queries_do_not_collscan(test_db):
+    """
+    Teste que les requêtes fréquentes sont servies par un index.
+    """
+    await sync_indexes(test_db)
+    results = await explain_hot_queries(test_db)
+
+    collscans = [result for result in results if result["collscan"]]
+    assert collscans == []
+
+
+async def test_offer_stats_top_values_sort_uses_index(test_db):
+    """
+    Teste que le top-k du rollup (tri count puis value) évite le tri en mémoire.
+    """
+    await sync_indexes(test_db)
+    results = await explain_hot_queries(test_db)
+
+    top_k = [result for result in results if result["collection"] == "offer_stats"]
+    assert top_k and not any(result["in_memory_sort"] for result in top_k)
+
+
+async def test_job_offers_expire_on_last_seen(test_db):
+    """
+    Teste que les offres expirent via un index TTL sur last_seen.
+    """
+    await sync_indexes(test_db)
+    indexes = await test_db["job_offers"].index_information()
+
+    ttl = [index for index in indexes.values() if "expireAfterSeconds" in index]
+    assert [index["key"] for index in ttl] == [[("last_seen", 1)]]
+    assert ttl[0]["expireAfterSeconds"] == int(OFFER_RETENTION_DAYS * 86400)
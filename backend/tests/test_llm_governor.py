@@ -0,0 +1,72 @@
+import pytest
+
+from app.llm.governor import (
+    BATCH,
+    INTERACTIVE,
+    LLMBudgetExceeded,
+    LLMGovernor,
+    llm_budget,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_waits_for_refill():
+    """Teste qu'au-delà du débit par minute l'appel doit attendre le remplissage"""
+    clock = FakeClock()
+    governor = LLMGovernor(rpm=60, tpm=6000, clock=clock)
+
+    assert governor._try_acquire(BATCH, requests=1, tokens=5000) == 0
+    # 1000 tokens restants, 100 tokens/s : 2000 tokens dans 10 s
+    assert governor._try_acquire(BATCH, requests=1, tokens=3000) == pytest.approx(20)
+
+    clock.now += 20
+    assert governor._try_acquire(BATCH, requests=1, tokens=3000) == 0
+
+
+def test_batch_yields_to_waiting_interactive_calls():
+    """Teste qu'un appel de collecte attend tant qu'une description est en attente"""
+    governor = LLMGovernor(rpm=60, tpm=6000, clock=FakeClock())
+    governor._waiting[INTERACTIVE] = 1
+
+    assert governor._try_acquire(BATCH, requests=1, tokens=10) > 0
+    assert governor._try_acquire(INTERACTIVE, requests=1, tokens=10) == 0
+
+
+def test_rate_limit_pauses_every_call():
+    """Teste qu'un 429 met en pause tous les appels, avec un délai croissant"""
+    clock = FakeClock()
+    governor = LLMGovernor(rpm=60, tpm=6000, clock=clock)
+
+    first = governor.report_rate_limit()
+    second = governor.report_rate_limit()
+    assert second == 2 * first
+    assert governor._try_acquire(INTERACTIVE, requests=1, tokens=10) > 0
+
+    governor.report_success()
+    clock.now += second
+    assert governor._try_acquire(INTERACTIVE, requests=1, tokens=10) == 0
+
+
+async def test_budget_refuses_calls_once_exhausted():
+    """Teste qu'une exécution ayant épuisé son budget ne peut plus appeler le LLM"""
+    governor = LLMGovernor(rpm=60, tpm=100000, clock=FakeClock())
+
+    with llm_budget("test", max_tokens=1000) as budget:
+        async with governor.limit(tokens=500) as lease:
+            lease.record(1200)
+        assert budget.tripped
+
+        with pytest.raises(LLMBudgetExceeded):
+            async with governor.limit(tokens=500):
+                pass
+
+    # Hors du contexte, le budget ne s'applique plus
+    async with governor.limit(tokens=500):
+        pass
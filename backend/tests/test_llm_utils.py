@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from app.llm import utils
+from app.llm.governor import LLMBudgetExceeded
+from app.llm.utils import count_tokens, pack_by_tokens
+
+
+def test_pack_by_tokens_respects_budget():
+    """Teste que les textes sont regroupés dans l'ordre sans dépasser le budget"""
+    texts = ["compétences python " * 20, "missions data " * 20, "avantages " * 20]
+    budget = count_tokens(texts[0]) + count_tokens(texts[1])
+
+    groups = pack_by_tokens(texts, budget)
+
+    assert groups == [texts[:2], texts[2:]]
+
+
+def test_pack_by_tokens_keeps_oversized_text_alone():
+    """Teste qu'un texte plus long que le budget forme un lot à lui seul"""
+    texts = ["court", "très long " * 500, "court"]
+
+    groups = pack_by_tokens(texts, 50)
+
+    assert groups == [["court"], [texts[1]], ["court"]]
+
+
+def test_summarize_chunks_propagates_budget_exhaustion(monkeypatch):
+    """Teste qu'un budget épuisé n'est pas confondu avec un résumé vide"""
+
+    async def exhausted(*args, **kwargs):
+        raise LLMBudgetExceeded("Budget LLM épuisé")
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(utils, "_invoke", exhausted)
+
+    with pytest.raises(LLMBudgetExceeded):
+        asyncio.run(utils.summarize_chunks([Document(page_content="Offre")]))
@@ -0,0 +1,79 @@
+from app.services.offer_normalization import (
+    NORMALIZATION_VERSION,
+    normalization_updates,
+    normalized_fields,
+    offer_fingerprint,
+)
+from app.utils import url_hash
+
+
+def test_normalized_fields_are_computed_from_raw_offer():
+    """
+    Teste les champs normalisés écrits à l'ingestion d'une offre.
+    """
+    fields = normalized_fields(
+        {
+            "entreprise": "Acme  SAS",
+            "localisation": "69003 Lyon",
+            "url": "https://www.welcometothejungle.com/fr/jobs/123",
+        }
+    )
+
+    assert fields == {
+        "normalized_company": "ACME",
+        "normalized_city": "Lyon",
+        "normalized_site": "welcometothejungle.com",
+        "company_key": "acme",
+        "city_key": "lyon",
+        "url_hash": url_hash("https://welcometothejungle.com/fr/jobs/123"),
+        "fingerprint": None,
+    }
+
+
+def test_normalized_fields_keep_missing_values_empty():
+    """
+    Teste qu'une offre sans ville ni URL n'alimente pas les statistiques.
+    """
+    fields = normalized_fields({"entreprise": "Acme", "localisation": None})
+
+    assert fields["normalized_city"] is None
+    assert fields["normalized_site"] is None
+    assert fields["city_key"] is None
+
+
+def test_normalization_updates_only_rewrite_changed_fields():
+    """
+    Teste que le backfill ne réécrit que les champs modifiés et marque
+    toujours l'offre avec la version de normalisation courante.
+    """
+    offer = {
+        "_id": "offer-1",
+        "entreprise": "Acme SAS",
+        "normalized_company": "ACME",
+        "company_key": "acme",
+    }
+
+    [(offer_id, changes)] = normalization_updates([offer])
+
+    assert offer_id == "offer-1"
+    assert changes == {"normalization_version": NORMALIZATION_VERSION}
+
+
+def test_fingerprint_matches_offer_posted_on_several_sites():
+    """
+    Teste que la même offre publiée sur deux sites a la même empreinte,
+    mais pas une offre dont l'entreprise est inconnue.
+    """
+    apec = {
+        "entreprise": "AMILTONE",
+        "poste": "Data Scientist/IA F/H",
+        "localisation": "Lyon",
+    }
+    france_travail = {
+        "entreprise": "Amiltone SAS",
+        "poste": "Data Scientist/IA (H/F)",
+        "localisation": "69003 Lyon",
+    }
+
+    assert offer_fingerprint(apec) == offer_fingerprint(france_travail)
+    assert offer_fingerprint({**apec, "entreprise": "Entreprise non spécifiée"}) is None
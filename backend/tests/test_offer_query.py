@@ -0,0 +1,27 @@
+from app.services.offer_query import compile_offer_query
+
+
+def test_compile_offer_query_uses_indexable_filters():
+    """
+    Teste que les filtres entreprise / ville deviennent des préfixes ancrés
+    sur les clés normalisées et les mots-clés une recherche $text.
+    """
+    compiled = compile_offer_query("data scientist", "Lyon 3ème", "Société Générale SA")
+
+    assert compiled.text_search
+    assert compiled.filter == {
+        "$text": {"$search": "data scientist"},
+        "company_key": {"$regex": "^societe\\ generale"},
+        "city_key": {"$regex": "^lyon"},
+    }
+
+
+def test_compile_offer_query_escapes_user_input():
+    """
+    Teste que la saisie utilisateur ne peut pas injecter de regex ni de
+    syntaxe $text.
+    """
+    compiled = compile_offer_query('"python" -java', None, "a.*(b")
+
+    assert compiled.filter["$text"] == {"$search": "python java"}
+    assert compiled.filter["company_key"] == {"$regex": "^a\\.\\*\\(b"}
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+from app.services.offer_stats import (
+    STATS_COLLECTION,
+    changed_offer_deltas,
+    offer_deltas,
+    rebuild_offer_stats,
+)
+
+
+def test_changed_offer_moves_counters():
+    """
+    Teste qu'une offre modifiée est retirée de son ancienne entreprise
+    et ajoutée à la nouvelle, sans changer le total.
+    """
+    created_at = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    previous = {"normalized_company": "ACME", "created_at": created_at}
+    current = {"normalized_company": "GLOBEX", "created_at": created_at}
+
+    deltas = changed_offer_deltas([(previous, current)])
+
+    assert deltas[("company", "ACME")] == -1
+    assert deltas[("company", "GLOBEX")] == 1
+    assert deltas[("total", None)] == 0
+    assert deltas[("day", "2025-03-01")] == 0
+
+
+def test_offer_deltas_ignore_missing_fields():
+    """
+    Teste qu'une offre sans ville ni site ne crée pas de compteur vide.
+    """
+    deltas = offer_deltas([{"normalized_company": "ACME", "normalized_city": None}])
+
+    assert deltas == {("total", None): 1, ("company", "ACME"): 1}
+
+
+async def test_rebuild_offer_stats_counts_offers(test_db):
+    """
+    Teste que la reconstruction du rollup compte les offres par dimension.
+    """
+    company = f"ROLLUP-{datetime.now().timestamp()}"
+    await test_db["job_offers"].insert_many(
+        [
+            {"normalized_company": company, "normalized_city": "Lyon"},
+            {"normalized_company": company, "normalized_city": "Paris"},
+        ]
+    )
+
+    await rebuild_offer_stats(test_db)
+
+    counter = await test_db[STATS_COLLECTION].find_one({"_id": f"company|{company}"})
+    total = await test_db[STATS_COLLECTION].find_one({"_id": "total"})
+    assert counter["count"] == 2
+    assert total["count"] == await test_db["job_offers"].count_documents({})
@@ -0,0 +1,38 @@
+from app.services.offer_validation import (
+    MISSING_COMPANY,
+    MISSING_TITLE,
+    NOT_A_DICT,
+    split_offers,
+    valid_url,
+)
+
+
+def test_split_offers_rejects_placeholders_with_reason():
+    """
+    Teste que les offres sans poste ou sans entreprise sont rejetées avec
+    leur code, y compris quand l'extraction renvoie "Non spécifié".
+    """
+    valid = {"poste": "Data Engineer", "entreprise": "Acme"}
+    offers = [
+        valid,
+        {"poste": "Poste non spécifié", "entreprise": "Acme"},
+        {"poste": "Data Engineer", "entreprise": "  non specifié "},
+        "pas une offre",
+    ]
+
+    accepted, rejected = split_offers(offers)
+
+    assert accepted == [valid]
+    assert [reason for _, reason in rejected] == [
+        MISSING_TITLE,
+        MISSING_COMPANY,
+        NOT_A_DICT,
+    ]
+
+
+def test_valid_url_falls_back_to_source_and_drops_relative_urls():
+    """
+    Teste que seules les URLs http(s) exploitables sont conservées.
+    """
+    assert valid_url({"source_url": "https://site.com/job"}) == "https://site.com/job"
+    assert valid_url({"url": "/jobs/123"}) is None
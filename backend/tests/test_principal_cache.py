@@ -0,0 +1,72 @@
+from app.models import UserModel
+from app.services.principal_cache import PrincipalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_user(user_id="64b7f0c2a1b2c3d4e5f60718", **fields):
+    return UserModel(
+        _id=user_id,
+        username="johndoe",
+        email="john.doe@example.com",
+        hashed_password="hash",
+        **fields,
+    )
+
+
+def test_principal_expires_after_ttl():
+    """Teste qu'une entrée n'est plus servie après le TTL"""
+    clock = FakeClock()
+    cache = PrincipalCache(ttl=30, clock=clock)
+    user = make_user()
+
+    cache.put("u1", "jti-1", user, cache.generation("u1"))
+    assert cache.get("u1", "jti-1").username == "johndoe"
+    assert cache.get("u1", "jti-2") is None
+
+    clock.now += 31
+    assert cache.get("u1", "jti-1") is None
+
+
+def test_invalidation_drops_every_token_of_the_user():
+    """Teste que l'invalidation retire l'utilisateur pour tous ses tokens"""
+    cache = PrincipalCache(ttl=30, clock=FakeClock())
+    cache.put("u1", "a", make_user(), cache.generation("u1"))
+    cache.put("u1", "b", make_user(), cache.generation("u1"))
+    cache.put("u2", "c", make_user(), cache.generation("u2"))
+
+    cache.invalidate("u1")
+
+    assert cache.get("u1", "a") is None
+    assert cache.get("u1", "b") is None
+    assert cache.get("u2", "c") is not None
+
+
+def test_read_started_before_invalidation_is_not_cached():
+    """Teste qu'une lecture antérieure à l'invalidation ne réinsère pas l'ancien état"""
+    cache = PrincipalCache(ttl=30, clock=FakeClock())
+    generation = cache.generation("u1")
+
+    # Changement de mot de passe pendant la lecture en base
+    cache.invalidate("u1")
+    cache.put("u1", "a", make_user(), generation)
+
+    assert cache.get("u1", "a") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Teste l'éviction LRU au-delà de la taille maximale"""
+    cache = PrincipalCache(ttl=30, max_size=2, clock=FakeClock())
+    for user_id in ("u1", "u2"):
+        cache.put(user_id, None, make_user(), cache.generation(user_id))
+    cache.get("u1", None)
+    cache.put("u3", None, make_user(), cache.generation("u3"))
+
+    assert cache.get("u2", None) is None
+    assert cache.get("u1", None) is not None
@@ -1,4 +1,7 @@
 import pytest
+from bson import ObjectId
+
+from app.services.owned_documents import OwnedDocuments
 
 
 @pytest.fixture
@@ -83,3 +86,74 @@ def test_delete_task(client, auth_headers, create_task):
     """
     response = client.delete(f"tasks/{create_task['_id']}/", headers=auth_headers)
     assert response.status_code == 204
+
+
+def test_bulk_tasks(client, auth_headers, create_task, task_data):
+    """
+    Teste un lot mêlant création, changement de statut, archivage et
+    identifiants invalides ou inconnus.
+    """
+    operations = [
+        {"action": "create", "data": task_data},
+        {"action": "update", "id": create_task["_id"], "data": {"status": "Terminée"}},
+        {"action": "archive", "id": create_task["_id"]},
+        {"action": "delete", "id": "000000000000000000000000"},
+        {"action": "update", "id": "pas-un-id", "data": {"status": "Terminée"}},
+    ]
+    response = client.post(
+        "tasks/bulk", json={"operations": operations}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == [
+        "ok",
+        "ok",
+        "ok",
+        "not_found",
+        "invalid",
+    ]
+    assert body["succeeded"] == 3
+    assert body["failed"] == 2
+
+    task = client.get(f"tasks/{create_task['_id']}", headers=auth_headers).json()
+    assert task["status"] == "Terminée"
+    assert task["archived"] is True
+    assert len(client.get("tasks/", headers=auth_headers).json()) == 2
+
+
+async def test_bulk_reports_documents_gone_before_write(test_db):
+    """
+    Teste qu'une modification groupée sans effet (document supprimé entre la
+    lecture et l'écriture) est signalée not_found et non ok.
+    """
+    user_id = ObjectId()
+    tasks = OwnedDocuments(test_db, ["tasks"], user_id)
+    kept = await tasks.insert({"title": "Conservée"})
+    gone = await tasks.insert({"title": "Supprimée"})
+    items = [
+        {
+            "index": 0,
+            "action": "update",
+            "id": kept["_id"],
+            "update": {"$set": {"status": "Terminée"}},
+        },
+        {
+            "index": 1,
+            "action": "update",
+            "id": gone["_id"],
+            "update": {"$set": {"status": "Terminée"}},
+        },
+    ]
+
+    # Suppression concurrente après la lecture groupée de `bulk`
+    original_locate = tasks.locate
+
+    async def locate_then_delete(ids, projection=None):
+        located = await original_locate(ids, projection)
+        await test_db["tasks"].delete_one({"_id": gone["_id"]})
+        return located
+
+    tasks.locate = locate_then_delete
+    await tasks.bulk(items)
+
+    assert [item["status"] for item in items] == ["ok", "not_found"]
@@ -67,30 +67,53 @@ export default function ApplicationsPage() {
     fetchData().catch(console.error);
   }, []);
 
-  // polling SILENCIEUX toutes les 10s tant qu’il manque des descriptions
+  // flux SSE : la liste est rechargée quand une description est générée
   useEffect(() => {
-    if (isInitialLoad.current) return;
-    if (!applications.some((app) => !app.description)) return;
-    const intervalId = setInterval(() => {
-      fetchData(false); // pas de spinner
-    }, 10_000);
-    return () => clearInterval(intervalId);
-  }, [applications]);
-
-  // polling dédié pour la description en détail
+    const controller = new AbortController();
+    applicationApi
+      .streamDescriptionFeed((event) => {
+        if (event.event === "done") fetchData(false); // pas de spinner
+      }, controller.signal)
+      .catch((err) => {
+        if (!controller.signal.aborted) console.error(err);
+      });
+    return () => controller.abort();
+  }, []);
+
+  // description en direct pour la candidature ouverte (tokens du résumé)
+  const selectedRef = useRef<Application | null>(null);
+  selectedRef.current = selectedApplication;
+  const selectedId = selectedApplication?._id;
   useEffect(() => {
-    let detailInterval: NodeJS.Timeout;
-    if (selectedApplication && !selectedApplication.description) {
-      detailInterval = setInterval(async () => {
-        const updated = await applicationApi.getById(selectedApplication._id);
-        if (updated.description) {
-          setSelectedApplication(normalizeApiData(updated));
-          clearInterval(detailInterval);
-        }
-      }, 5_000);
-    }
-    return () => clearInterval(detailInterval);
-  }, [selectedApplication]);
+    if (!selectedId || selectedRef.current?.description) return;
+    const controller = new AbortController();
+    const setDescription = (description: string) =>
+      setSelectedApplication((app) =>
+        app && app._id === selectedId ? { ...app, description } : app,
+      );
+
+    let streamed = "";
+    applicationApi
+      .streamDescription(
+        selectedId,
+        (event) => {
+          if (event.event === "token" && event.text) {
+            streamed += event.text;
+            setDescription(streamed);
+          } else if (event.event === "stage" && event.stage === "retrying") {
+            streamed = "";
+            setDescription("");
+          } else if (event.event === "done" && event.description) {
+            setDescription(event.description);
+          }
+        },
+        controller.signal,
+      )
+      .catch((err) => {
+        if (!controller.signal.aborted) console.error(err);
+      });
+    return () => controller.abort();
+  }, [selectedId]);
 
   // Handlers pour les interactions utilisateur
   const handleCardClick = (application: Application): void => {
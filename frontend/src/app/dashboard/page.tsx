@@ -78,13 +78,18 @@ export default function DashboardPage() {
     });
   }, [fetchData]);
 
-  // polling SILENCIEUX toutes les 10s tant qu’il manque des descriptions
+  // flux SSE : rechargement silencieux quand une description est générée
   useEffect(() => {
-    if (isInitialLoad.current) return;
-    if (!applications.some((app) => !app.description)) return;
-    const id = setInterval(() => fetchData(false), 10_000);
-    return () => clearInterval(id);
-  }, [applications, fetchData]);
+    const controller = new AbortController();
+    applicationApi
+      .streamDescriptionFeed((event) => {
+        if (event.event === "done") fetchData(false);
+      }, controller.signal)
+      .catch((err) => {
+        if (!controller.signal.aborted) console.error(err);
+      });
+    return () => controller.abort();
+  }, [fetchData]);
 
   // État pour gérer l'onglet actif
   const [activeTab, setActiveTab] = useState<"active" | "archived">("active");
@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 import {
   jobOffersApi,
   type JobOffer,
@@ -36,6 +36,12 @@ export default function OffersPage() {
   // Pagination
   const [currentPage, setCurrentPage] = useState(1);
   const [totalOffers, setTotalOffers] = useState(0);
+  const [hasNextPage, setHasNextPage] = useState(false);
+  // Curseur de chaque page déjà atteinte, pour les filtres courants
+  const pageCursors = useRef<{ filters: string; cursors: (string | null)[] }>({
+    filters: "",
+    cursors: [null],
+  });
 
   // UI
   const [showFilters, setShowFilters] = useState(false);
@@ -64,20 +70,41 @@ export default function OffersPage() {
 
   // Fonction pour charger les offres
   const fetchOffers = useCallback(async () => {
+    const filters: JobOfferFilter = {
+      keywords: searchTerm || undefined,
+      location: locationFilter || undefined,
+      company: companyFilter || undefined,
+      limit: ITEMS_PER_PAGE,
+    };
+
+    // Les curseurs ne valent que pour les filtres qui les ont produits
+    const filtersKey = JSON.stringify(filters);
+    if (pageCursors.current.filters !== filtersKey) {
+      pageCursors.current = { filters: filtersKey, cursors: [null] };
+    }
+    const cursor = pageCursors.current.cursors[currentPage - 1];
+    if (cursor === undefined) {
+      // Page jamais atteinte avec ces filtres : on repart de la première
+      setCurrentPage(1);
+      return;
+    }
+
     setLoading(true);
     setError(null);
 
     try {
-      const filters: JobOfferFilter = {
-        keywords: searchTerm || undefined,
-        location: locationFilter || undefined,
-        company: companyFilter || undefined,
-        limit: ITEMS_PER_PAGE,
-        skip: (currentPage - 1) * ITEMS_PER_PAGE,
-      };
-
-      const data = await jobOffersApi.getAll(filters);
-      setOffers(data);
+      const page = await jobOffersApi.getAll({
+        ...filters,
+        cursor: cursor ?? undefined,
+      });
+      const cursors = pageCursors.current.cursors;
+      if (page.nextCursor) {
+        cursors[currentPage] = page.nextCursor;
+      } else {
+        cursors.length = currentPage;
+      }
+      setOffers(page.items);
+      setHasNextPage(page.nextCursor !== null);
     } catch (err) {
       setError("Erreur lors du chargement des offres d'emploi");
       console.error("Erreur:", err);
@@ -259,7 +286,7 @@ export default function OffersPage() {
           onClick={() =>
             setCurrentPage((prev) => Math.min(totalPages, prev + 1))
           }
-          disabled={currentPage === totalPages}
+          disabled={currentPage === totalPages || !hasNextPage}
           className="px-4 py-2 rounded-lg bg-blue-night-lighter text-white disabled:opacity-50 disabled:cursor-not-allowed hover:bg-blue-600 transition-colors"
         >
           Suivant
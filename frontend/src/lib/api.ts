@@ -55,6 +55,17 @@ async function fetchApi<T, D = Record<string, unknown>>(
   data?: D,
   options: RequestOptions = {},
 ): Promise<T> {
+  const response = await requestApi<T, D>(endpoint, method, data, options);
+  return response.data;
+}
+
+// Comme fetchApi, mais renvoie la réponse complète (en-têtes compris)
+async function requestApi<T, D = Record<string, unknown>>(
+  endpoint: string,
+  method: "GET" | "POST" | "PUT" | "DELETE" = "GET",
+  data?: D,
+  options: RequestOptions = {},
+): Promise<AxiosResponse<T>> {
   const config: AxiosRequestConfig = {
     method,
     url: endpoint,
@@ -91,7 +102,7 @@ async function fetchApi<T, D = Record<string, unknown>>(
         };
 
         const newResponse: AxiosResponse<T> = await apiClient(config);
-        return newResponse.data;
+        return newResponse;
       } else {
         // redirige vers la page login
         removeToken();
@@ -101,7 +112,7 @@ async function fetchApi<T, D = Record<string, unknown>>(
       }
     }
 
-    return response.data;
+    return response;
   } catch (error) {
     if (axios.isAxiosError(error) && error.response) {
       // Si on reçoit une 401 hors du cas précédent
@@ -119,6 +130,44 @@ async function fetchApi<T, D = Record<string, unknown>>(
   }
 }
 
+// Page d'une liste paginée par curseur (en-tête X-Next-Cursor)
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+type PageParams = Record<string, string | number | undefined>;
+
+async function fetchPage<T>(
+  endpoint: string,
+  params: PageParams,
+): Promise<Page<T>> {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value !== undefined && value !== "") query.append(key, String(value));
+  }
+  const response = await requestApi<T[]>(`${endpoint}?${query.toString()}`);
+  return {
+    items: response.data,
+    nextCursor: response.headers["x-next-cursor"] ?? null,
+  };
+}
+
+// Toutes les pages d'une liste, en suivant le curseur jusqu'au bout
+async function fetchAllPages<T>(
+  endpoint: string,
+  params: PageParams,
+): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const page = await fetchPage<T>(endpoint, { ...params, cursor });
+    items.push(...page.items);
+    cursor = page.nextCursor ?? undefined;
+  } while (cursor);
+  return items;
+}
+
 // Ajouter cette fonction de rafraîchissement proactif
 export const setupTokenRefresh = () => {
   const token = getToken();
@@ -242,7 +291,7 @@ export interface JobOfferFilter {
   location?: string;
   company?: string;
   limit?: number;
-  skip?: number;
+  cursor?: string;
 }
 
 export interface JobOfferStats {
@@ -349,6 +398,25 @@ export const userApi = {
   },
 };
 
+// Opérations groupées (/applications/bulk, /tasks/bulk)
+export interface BulkOperation<T> {
+  action: "create" | "update" | "archive" | "delete";
+  id?: string;
+  data?: Partial<T>;
+}
+
+export interface BulkResponse {
+  results: {
+    index: number;
+    action: BulkOperation<unknown>["action"];
+    id?: string;
+    status: "ok" | "not_found" | "invalid" | "error";
+    error?: string;
+  }[];
+  succeeded: number;
+  failed: number;
+}
+
 // API Tasks
 export const taskApi = {
   getAll: async () => {
@@ -372,15 +440,77 @@ export const taskApi = {
   delete: async (taskId: string) => {
     return fetchApi<void>(`/tasks/${taskId}`, "DELETE");
   },
+
+  bulk: async (operations: BulkOperation<Task>[]) => {
+    return fetchApi<BulkResponse>("/tasks/bulk", "POST", { operations });
+  },
 };
 
+// Événement de génération de description (flux SSE)
+export interface DescriptionEvent {
+  event: "stage" | "token" | "done" | "error";
+  application_id: string;
+  stage?: string;
+  text?: string;
+  description?: string;
+  message?: string;
+}
+
+// Lecture d'un flux SSE authentifié (EventSource ne permet pas d'envoyer
+// l'en-tête Authorization)
+async function streamEvents(
+  endpoint: string,
+  onEvent: (event: DescriptionEvent) => void,
+  signal: AbortSignal,
+): Promise<void> {
+  const response = await fetch(`${API_URL}${endpoint}`, {
+    headers: {
+      Accept: "text/event-stream",
+      Authorization: `Bearer ${getToken()}`,
+    },
+    credentials: "include",
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Flux indisponible (${response.status})`);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+
+    let separator = buffer.indexOf("\n\n");
+    while (separator >= 0) {
+      const block = buffer.slice(0, separator);
+      buffer = buffer.slice(separator + 2);
+      separator = buffer.indexOf("\n\n");
+
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (data) {
+        onEvent({ ...JSON.parse(data), event } as DescriptionEvent);
+      }
+    }
+  }
+}
+
+// Taille des pages lues pour charger toutes les candidatures (maximum de l'API)
+const APPLICATIONS_PAGE_SIZE = 500;
+
 // API Applications
 export const applicationApi = {
   getAll: async (status?: string) => {
-    const endpoint = status
-      ? `/applications/?status=${encodeURIComponent(status)}`
-      : "/applications/";
-    return fetchApi<Application[]>(endpoint, "GET");
+    return fetchAllPages<Application>("/applications/", {
+      status,
+      limit: APPLICATIONS_PAGE_SIZE,
+    });
   },
 
   getById: async (applicationId: string) => {
@@ -410,22 +540,38 @@ export const applicationApi = {
   delete: async (applicationId: string) => {
     return fetchApi<void>(`/applications/${applicationId}`, "DELETE");
   },
+
+  bulk: async (operations: BulkOperation<Application>[]) => {
+    return fetchApi<BulkResponse>("/applications/bulk", "POST", { operations });
+  },
+
+  // Génération de la description d'une candidature, tokens compris
+  streamDescription: (
+    applicationId: string,
+    onEvent: (event: DescriptionEvent) => void,
+    signal: AbortSignal,
+  ) => {
+    return streamEvents(
+      `/applications/${applicationId}/description/stream`,
+      onEvent,
+      signal,
+    );
+  },
+
+  // Fin des générations de description de l'utilisateur (sans les tokens)
+  streamDescriptionFeed: (
+    onEvent: (event: DescriptionEvent) => void,
+    signal: AbortSignal,
+  ) => {
+    return streamEvents("/applications/descriptions/stream", onEvent, signal);
+  },
 };
 
 // Ajouter l'API des offres d'emploi après taskApi
 export const jobOffersApi = {
-  // Récupérer les offres d'emploi avec filtres
+  // Récupérer une page d'offres d'emploi avec filtres (nextCursor : page suivante)
   getAll: async (filters: JobOfferFilter = {}) => {
-    const params = new URLSearchParams();
-
-    if (filters.keywords) params.append("keywords", filters.keywords);
-    if (filters.location) params.append("location", filters.location);
-    if (filters.company) params.append("company", filters.company);
-    if (filters.limit) params.append("limit", filters.limit.toString());
-    if (filters.skip) params.append("skip", filters.skip.toString());
-
-    const endpoint = `/job-offers/?${params.toString()}`;
-    return fetchApi<JobOffer[]>(endpoint, "GET");
+    return fetchPage<JobOffer>("/job-offers/", { ...filters });
   },
 
   // Récupérer une offre par ID
@@ -453,7 +599,7 @@ export const jobOffersApi = {
   },
 
   // Ajouter cette méthode pour compter le total
-  getCount: async (filters: Omit<JobOfferFilter, "limit" | "skip"> = {}) => {
+  getCount: async (filters: Omit<JobOfferFilter, "limit" | "cursor"> = {}) => {
     const params = new URLSearchParams();
 
     if (filters.keywords) params.append("keywords", filters.keywords);